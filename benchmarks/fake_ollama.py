@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Sahte Ollama sunucusu
+Proxy ve servis benchmark'ları için gerçek bir model çalıştırmadan
+/api/generate, /api/chat, /api/tags ve /api/ps uç noktalarını taklit eder.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_keep_alive(value, default):
+    """Ollama keep_alive değeri: saniye (sayı) veya "30s"/"5m"/"1h"; negatif = süresiz"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Proxy'nin iptal ettiği akışlar (BrokenPipe) beklenen durumdur
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Gerçek Ollama (Go net/http) gibi Nagle kapalı; aksi halde küçük NDJSON parçaları gecikir
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            return bytes(body)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _purge_expired(self):
+        """keep_alive süresi dolan modelleri boşalt"""
+        now = time.time()
+        with self.server.lock:
+            for model, expires in list(self.server.expires.items()):
+                if expires is not None and expires <= now:
+                    self.server.loaded.pop(model, None)
+                    del self.server.expires[model]
+
+    def do_GET(self):
+        self._purge_expired()
+        if self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": m} for m in self.server.models]})
+        elif self.path.startswith("/api/ps"):
+            self._send_json({"models": [{"name": m, "model": m} for m in sorted(self.server.loaded)]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._read_body()
+        if not (self.path.startswith("/api/generate") or self.path.startswith("/api/chat")):
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        payload = json.loads(body or b"{}")
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak_active = max(self.server.peak_active, self.server.active)
+        try:
+            # Gerçek Ollama gibi aynı anda yalnızca OLLAMA_NUM_PARALLEL kadar üretim yapılır
+            with self.server.slots:
+                self._generate(payload, len(body))
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def _generate(self, payload, body_size):
+        self._purge_expired()
+        model = payload.get("model", "")
+        keep_alive = parse_keep_alive(payload.get("keep_alive"), self.server.default_keep_alive)
+        if keep_alive == 0 and not payload.get("prompt") and not payload.get("messages"):
+            with self.server.lock:
+                self.server.loaded.pop(model, None)
+                self.server.expires.pop(model, None)
+            self._send_json({"model": model, "done": True, "done_reason": "unload"})
+            return
+        with self.server.lock:
+            self.server.calls += 1
+            self.server.received_bytes += body_size
+            cold = model not in self.server.loaded
+            if cold:
+                # VRAM dolu ise en eski modeli boşalt (model swap)
+                if self.server.max_loaded and len(self.server.loaded) >= self.server.max_loaded:
+                    self.server.loaded.pop(next(iter(self.server.loaded)))
+                    self.server.swaps += 1
+                self.server.loads += 1
+                self.server.loaded[model] = True
+        if cold and self.server.load_delay:
+            time.sleep(self.server.load_delay)
+        try:
+            self._respond(payload, model, cold)
+        finally:
+            with self.server.lock:
+                if keep_alive == 0:
+                    self.server.loaded.pop(model, None)
+                    self.server.expires.pop(model, None)
+                elif model in self.server.loaded:
+                    self.server.expires[model] = time.time() + keep_alive if keep_alive > 0 else None
+
+    def _respond(self, payload, model, cold):
+        load_duration = int(self.server.load_delay * 1e9) if cold else 0
+        if not payload.get("prompt") and not payload.get("messages"):
+            # Boş istek: Ollama modeli yalnızca yükler
+            with self.server.lock:
+                self.server.load_only += 1
+            self._send_json({"model": model, "done": True, "load_duration": load_duration, "done_reason": "load"})
+            return
+
+        tokens = self.server.tokens
+        delay = self.server.token_delay
+        chat = self.path.startswith("/api/chat")
+        # Prompt değerlendirme süresi prompt uzunluğuyla büyür (~4 karakter/token)
+        prompt = payload.get("prompt") or "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+        if self.server.context_tokens and len(prompt) > self.server.context_tokens * 4:
+            # Ollama gibi bağlam penceresine sığmayan prompt'un başını kırp
+            prompt = prompt[-self.server.context_tokens * 4:]
+            payload = dict(payload, prompt=prompt)
+        # KV önbelleği: son prompt'larla ortak önek yeniden değerlendirilmez (Ollama slot önbelleği taklidi)
+        cached = 0
+        if self.server.kv_cache:
+            with self.server.lock:
+                cached = max((len(os.path.commonprefix([prompt, p])) for p in self.server.recent_prompts), default=0)
+                self.server.recent_prompts.append(prompt)
+        prompt_tokens = max(1, (len(prompt) - cached) // 4)
+        prompt_seconds = (len(prompt) - cached) / 1000 * self.server.prompt_delay
+        if prompt_seconds:
+            time.sleep(prompt_seconds)
+        reply = self.server.reply(payload) if callable(self.server.reply) else self.server.reply
+
+        def chunk(i, done):
+            # Akışta sabit yanıt token sayısı kadar eşit parçaya bölünür (toplam süre akışsızla aynı)
+            text = reply[i * len(reply) // tokens:(i + 1) * len(reply) // tokens] if reply else f"tok{i} "
+            data = {"model": model, "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": "" if done else text}
+            else:
+                data["response"] = "" if done else text
+            if done:
+                data.update({"eval_count": tokens, "prompt_eval_count": prompt_tokens,
+                             "eval_duration": int(delay * tokens * 1e9),
+                             "prompt_eval_duration": int(prompt_seconds * 1e9) or 1000000,
+                             "load_duration": load_duration})
+            return data
+
+        if payload.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(tokens + 1):
+                if i < tokens:
+                    time.sleep(delay)
+                line = (json.dumps(chunk(i, i == tokens)) + "\n").encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(delay * tokens)
+            data = chunk(tokens, True)
+            if chat:
+                data["message"]["content"] = reply or "".join(f"tok{i} " for i in range(tokens))
+            else:
+                data["response"] = reply or "".join(f"tok{i} " for i in range(tokens))
+            self._send_json(data)
+
+
+def start_fake_ollama(port=0, tokens=20, token_delay=0.05, load_delay=0.0,
+                      models=("gemma3:27b", "qwen2.5vl:32b"), reply=None, parallel=0, max_loaded=0,
+                      default_keep_alive=0, prompt_delay=0.0, context_tokens=0, kv_cache=False):
+    """Sahte Ollama'yı arka plan thread'inde başlat, sunucu nesnesini döndür
+
+    reply sabit bir metin ya da istek gövdesini alıp metin döndüren bir fonksiyon olabilir;
+    prompt_delay, prompt'un her 1000 karakteri için eklenen değerlendirme süresidir;
+    context_tokens verilirse daha uzun prompt'ların başı kırpılır (num_ctx taklidi); kv_cache açıkken
+    son prompt'larla ortak önek için değerlendirme süresi ve prompt_eval_count harcanmaz.
+    """
+    server = FakeOllamaServer(("127.0.0.1", port), FakeOllamaHandler)
+    server.tokens = tokens
+    server.token_delay = token_delay
+    server.load_delay = load_delay
+    server.models = list(models)
+    server.loaded = {}  # yüklenme sırasıyla model -> True
+    server.expires = {}  # model -> boşaltılacağı zaman (None = süresiz)
+    server.default_keep_alive = default_keep_alive or -1  # 0 = süresiz (OLLAMA_KEEP_ALIVE taklidi)
+    server.load_only = 0
+    server.max_loaded = max_loaded
+    server.loads = 0
+    server.swaps = 0
+    server.reply = reply
+    server.prompt_delay = prompt_delay
+    server.context_tokens = context_tokens
+    server.kv_cache = kv_cache
+    server.recent_prompts = collections.deque(maxlen=max(parallel, 1))
+    server.calls = 0
+    server.received_bytes = 0
+    server.active = 0
+    server.peak_active = 0
+    server.lock = threading.Lock()
+    server.slots = threading.BoundedSemaphore(parallel) if parallel else contextlib.nullcontext()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sahte Ollama sunucusu")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--load-delay", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0, help="eşzamanlı üretim slotu (0 = sınırsız)")
+    args = parser.parse_args()
+
+    server = start_fake_ollama(args.port, args.tokens, args.token_delay, args.load_delay, parallel=args.parallel)
+    print(f"Fake Ollama: http://127.0.0.1:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
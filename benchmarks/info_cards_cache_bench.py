@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Bilgi kartı önbellek benchmark'ı
+Aynı ders notu için farklı num_cards değerleriyle art arda kart üretir (öğretmenin desteyi yeniden
+üretmesi). Önbellek kapalı (CARD_CACHE_MAX_CARDS=0) ve açıkken istek başına gecikme, LLM çağrısı,
+önbellek durumu (hit / partial / miss) ve kartların tekrarsız olup olmadığı raporlanır.
+
+Kullanım:
+    python benchmarks/info_cards_cache_bench.py --sequence 5 5 3 10 10 8 15 20
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+CARDS_APP = os.path.join(ROOT, "services", "text", "info-cards", "app.py")
+TEXT = ("Fotosentez, yeşil bitkilerin güneş ışığını kullanarak karbondioksit ve sudan glikoz ve oksijen "
+        "ürettiği süreçtir. Kloroplastlarda gerçekleşir ve klorofil pigmenti ışığı soğurur. ") * 10
+WORDS = ("klorofil ışık enerji glikoz oksijen karbondioksit su kloroplast stoma yaprak nişasta ATP NADPH "
+         "Calvin döngüsü tilakoid stroma pigment dalga boyu sıcaklık").split()
+EXCLUDED = re.compile(r"^\s*- Kavram (\d+) nedir\?$", re.MULTILINE)
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "")
+    count = int(re.search(r"(\d+) adet bilgi kartı", prompt).group(1))
+    excluded = {int(k) for k in EXCLUDED.findall(prompt)}
+    numbers = [k for k in range(1, 100) if k not in excluded][:count]
+    cards = [{"title": f"Kavram {k} nedir?", "content": " ".join(WORDS[(k * m + m - 1) % len(WORDS)] for m in (1, 3, 5)),
+              "type": "question_answer"} for k in numbers]
+    return "```json\n" + json.dumps({"cards": cards}, ensure_ascii=False) + "\n```"
+
+
+def run(args, max_cards: int):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply)
+    proc, port = start_service(CARDS_APP, fake.server_address[1], {"CARD_CACHE_MAX_CARDS": str(max_cards)})
+    rows = []
+    try:
+        for num_cards in args.sequence:
+            calls = fake.calls
+            elapsed, body = post(port, "/generate-cards", {"text": TEXT, "num_cards": num_cards}, with_body=True)
+            titles = [card["title"] for card in body["cards"]]
+            rows.append((num_cards, elapsed, fake.calls - calls, body["metadata"].get("cache", "-"),
+                         len(titles), len(set(titles))))
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=60) as resp:
+            health = json.loads(resp.read())
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    return rows, health.get("card_cache")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bilgi kartı önbellek benchmark'ı")
+    parser.add_argument("--sequence", type=int, nargs="+", default=[5, 5, 3, 10, 10, 8, 15, 20])
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for label, max_cards in (("önbellek kapalı", 0), ("önbellek açık", 20000)):
+        rows, stats = run(args, max_cards)
+        print(f"{label}: toplam {sum(r[1] for r in rows):.2f}s, {sum(r[2] for r in rows)} LLM çağrısı")
+        for num_cards, elapsed, calls, status, count, unique in rows:
+            print(f"   num_cards={num_cards:>2}: {elapsed * 1000:7.0f}ms, {calls} çağrı, {status:>7}, "
+                  f"{count} kart ({unique} farklı)")
+        if max_cards:
+            print(f"   /health card_cache: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Bilgi kartı map-reduce benchmark'ı
+Çok konulu uzun ders notlarını info-cards servisine gönderir. Sahte Ollama bağlam penceresini taklit
+eder (context_tokens): pencereyi aşan prompt'un başı, yani talimat kırpılır ve model geçersiz yanıt
+döner. Tek prompt (CARD_SECTION_CHARS çok büyük) ile bölümlü üretim için gecikme, yer tutucu
+("Bilgi Kartı N") kart sayısı, kapsanan konu sayısı ve elenen tekrarlar raporlanır.
+
+Kullanım:
+    python benchmarks/info_cards_mapreduce_bench.py --topics 12 --cards 10 --context-tokens 8192
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+CARDS_APP = os.path.join(ROOT, "services", "text", "info-cards", "app.py")
+TOPIC = re.compile(r"Konu (\d+): ([^\n.]+)\. ([^\n.]+)\.")
+FILLER = ("Bu bölümde kavramın tanımı, tarihsel gelişimi, temel bileşenleri ve günlük hayattaki "
+          "uygulamaları örneklerle ayrıntılı biçimde ele alınmaktadır. ")
+
+TOPICS = [
+    ("Fotosentez", "Bitkiler ışık enerjisiyle karbondioksit ve sudan glikoz üretir"),
+    ("Hücre zarı", "Seçici geçirgen zar madde alışverişini denetler"),
+    ("Mitoz bölünme", "Bir hücreden kalıtsal olarak özdeş iki hücre oluşur"),
+    ("Enzimler", "Protein yapılı katalizörler tepkimeleri hızlandırır"),
+    ("Ekosistem", "Canlılar ile cansız çevre arasında enerji akışı olur"),
+    ("Genetik kod", "DNA üzerindeki üçlü bazlar amino asitleri belirler"),
+    ("Solunum", "Mitokondride glikoz yıkılarak ATP elde edilir"),
+    ("Sindirim", "Büyük besin molekülleri emilebilecek küçük parçalara ayrılır"),
+    ("Dolaşım", "Kalp ve damarlar oksijeni dokulara taşır"),
+    ("Sinir sistemi", "Nöronlar elektriksel uyarıları iletir"),
+    ("Hormonlar", "Endokrin bezler kana düzenleyici salgılar bırakır"),
+    ("Evrim", "Doğal seçilim popülasyonlarda kalıtsal değişime yol açar"),
+]
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "")
+    # Talimat pencereden taştıysa model metni sürdürür, JSON üretmez
+    if "bilgi kartı oluştur" not in prompt:
+        return "Bu bölümde kavramın tanımı ve uygulamaları ele alınmaktadır..."
+    count = int(re.search(r"(\d+) adet bilgi kartı", prompt).group(1))
+    cards = [{"title": "Bu ders notları neyi kapsar?",
+              "content": "Ders notları temel kavramları, tanımları ve uygulamaları özetler.", "type": "definition"}]
+    for number, name, summary in TOPIC.findall(prompt):
+        cards.append({"title": f"{name} nedir?", "content": f"{summary}.", "type": "question_answer"})
+    return "```json\n" + json.dumps({"cards": cards[:count]}, ensure_ascii=False) + "\n```"
+
+
+def make_notes(topics: int, filler_repeat: int) -> str:
+    return "\n\n".join(f"Konu {i + 1}: {TOPICS[i % len(TOPICS)][0]}. {TOPICS[i % len(TOPICS)][1]}. "
+                       + FILLER * filler_repeat for i in range(topics))
+
+
+def run(args, text, section_chars: int):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply, parallel=args.parallel,
+                             prompt_delay=args.prompt_delay, context_tokens=args.context_tokens)
+    proc, port = start_service(CARDS_APP, fake.server_address[1], {"CARD_SECTION_CHARS": str(section_chars),
+                                                                    "CARD_SECTION_CONCURRENCY": str(args.parallel)})
+    try:
+        elapsed, body = post(port, "/generate-cards", {"text": text, "num_cards": args.cards}, with_body=True)
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    cards = body["cards"]
+    placeholders = sum(card["title"].startswith("Bilgi Kartı") for card in cards)
+    topics = len({card["title"] for card in cards if card["title"].endswith("nedir?")})
+    return elapsed, len(cards), placeholders, topics, body["metadata"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bilgi kartı map-reduce benchmark'ı")
+    parser.add_argument("--topics", type=int, default=12)
+    parser.add_argument("--filler", type=int, default=30, help="konu başına dolgu cümlesi")
+    parser.add_argument("--cards", type=int, default=10)
+    parser.add_argument("--context-tokens", type=int, default=8192)
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--parallel", type=int, default=12, help="Ollama ve servis tarafı eşzamanlı çağrı sınırı")
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    text = make_notes(args.topics, args.filler)
+    print(f"Ders notu {len(text)} karakter, {args.topics} konu; bağlam penceresi ~{args.context_tokens * 4} karakter")
+    for label, section_chars in (("tek prompt", 10 ** 9), ("bölümlü", 6000)):
+        elapsed, count, placeholders, topics, metadata = run(args, text, section_chars)
+        extra = (f", {metadata['sections']} bölüm, {metadata['candidates']} aday, "
+                 f"{metadata['duplicates_removed']} tekrar elendi") if "sections" in metadata else ""
+        print(f"{label:>10}: {elapsed:6.2f}s, {count} kart ({placeholders} yer tutucu), "
+              f"{topics} farklı konu{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bilgi kartı akış benchmark'ı
+info-cards servisini, kartlar JSON'unu token token akıtan sahte Ollama'ya karşı çalıştırır;
+/generate-cards (tüm yanıtı bekler) ile /generate-cards/stream (NDJSON, kart kapandıkça) için
+ilk kartın ve tüm kartların istemciye ulaşma süresini karşılaştırır.
+
+Kullanım:
+    python benchmarks/info_cards_stream_bench.py --cards 20 --tokens 400 --token-delay 0.02
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+CARDS_APP = os.path.join(ROOT, "services", "text", "info-cards", "app.py")
+TEXT = ("Fotosentez, yeşil bitkilerin güneş ışığını kullanarak karbondioksit ve sudan glikoz ve oksijen "
+        "ürettiği süreçtir. Kloroplastlarda gerçekleşir ve klorofil pigmenti ışığı soğurur. ") * 10
+
+
+def cards_reply(count: int) -> str:
+    cards = [{"id": i, "title": f"Fotosentez sorusu {i}?",
+              "content": "Fotosentez kloroplastlarda gerçekleşir; klorofil ışığı soğurur ve glikoz üretilir.",
+              "type": "question_answer"} for i in range(1, count + 1)]
+    return "```json\n" + json.dumps({"cards": cards}, ensure_ascii=False, indent=2) + "\n```"
+
+
+def stream(port: int, path: str, payload: dict):
+    start = time.perf_counter()
+    first, cards, done = None, 0, None
+    with urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}{path}", data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"}), timeout=600) as resp:
+        for line in resp:
+            event = json.loads(line)
+            if event["type"] == "card":
+                cards += 1
+                if first is None:
+                    first = time.perf_counter() - start
+            elif event["type"] == "done":
+                done = event["metadata"]
+    return first, time.perf_counter() - start, cards, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bilgi kartı akış benchmark'ı")
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=cards_reply(args.cards))
+    proc, port = start_service(CARDS_APP, fake.server_address[1])
+    payload = {"text": TEXT, "num_cards": args.cards}
+    try:
+        total, body = post(port, "/generate-cards", payload, with_body=True)
+        first, stream_total, count, _ = stream(port, "/generate-cards/stream", payload)
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+    print(f"/generate-cards:        {len(body['cards'])} kart, ilk kart = tüm kartlar {total:.2f}s")
+    print(f"/generate-cards/stream: {count} kart, ilk kart {first:.2f}s, tüm kartlar {stream_total:.2f}s "
+          f"(ilk kart toplam sürenin %{first / stream_total * 100:.0f}'i)")
+
+
+if __name__ == "__main__":
+    main()
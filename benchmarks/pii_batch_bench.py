@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+PII toplu maskeleme benchmark'ı
+pii-masking servisini sahte Ollama'ya karşı çalıştırır ve aynı kısa kayıt kümesini
+1) tek tek /mask istekleriyle (sıralı, tipik ETL döngüsü),
+2) tek bir /mask/batch (NDJSON) isteğiyle
+maskeler. Toplam süre, kayıt/sn, LLM çağrı sayısı ve her kayıttaki ismin maskelenip maskelenmediği raporlanır.
+Sahte model prompt'ta geçen isimleri döndürür; paketlenmiş prompt'ta bulunan isimler kendi kayıtlarına dağıtılmalıdır.
+
+Kullanım:
+    python benchmarks/pii_batch_bench.py --records 200 --parallel 2 --prompt-delay 0.3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+NAMES = ["Kerem Aydınoğlu", "Selin Karaca", "Onur Bektaşoğlu", "Derya Kılınç", "Murat Erdoğdu",
+         "Ayşe Tunçel", "Hakan Yıldırım", "Gizem Korkmaz"]
+TEMPLATES = [
+    "Müşteri {name} iade talebinde bulundu, iletişim: {email}",
+    "{name} randevusunu {day} tarihine erteledi.",
+    "Şikayet kaydı: {name} kargonun hasarlı geldiğini bildirdi.",
+    "{name} üyelik iptali istedi; telefon 0532 {num} 45 67",
+]
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "")
+    return json.dumps({"entities": [{"type": "PERSON", "value": name} for name in NAMES if name in prompt]},
+                      ensure_ascii=False)
+
+
+def make_records(count: int):
+    rng = random.Random(11)
+    records = []
+    for i in range(count):
+        name = rng.choice(NAMES)
+        text = rng.choice(TEMPLATES).format(name=name, email=f"musteri{i}@ornek.com",
+                                            day=f"{rng.randint(1, 28)}.03.2025", num=rng.randint(100, 999))
+        records.append({"id": f"kayit-{i}", "text": text, "name": name})
+    return records
+
+
+def post_ndjson(port: int, path: str, records):
+    body = "\n".join(json.dumps({"id": r["id"], "text": r["text"]}, ensure_ascii=False) for r in records)
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}{path}", data=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"}), timeout=600) as resp:
+        lines = [json.loads(line) for line in resp if line.strip()]
+    return time.perf_counter() - start, lines
+
+
+def leaks(records, masked_texts) -> int:
+    return sum(r["name"] in masked for r, masked in zip(records, masked_texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII toplu maskeleme benchmark'ı")
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--parallel", type=int, default=2, help="sahte Ollama'nın eşzamanlı istek sınırı")
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply,
+                             parallel=args.parallel, prompt_delay=args.prompt_delay, kv_cache=True)
+    proc, port = start_service(PII_APP, fake.server_address[1],
+                               {"PII_BATCH_CONCURRENCY": str(args.parallel)})
+    try:
+        start = time.perf_counter()
+        single = [post(port, "/mask", {"text": r["text"]}, with_body=True)[1]["masked_text"] for r in records]
+        single_time = time.perf_counter() - start
+        single_calls = fake.calls
+
+        batch_time, lines = post_ndjson(port, "/mask/batch", records)
+        batch_calls = fake.calls - single_calls
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+    in_order = [line.get("id") for line in lines] == [r["id"] for r in records]
+    print(f"{args.records} kayıt (ortalama {sum(len(r['text']) for r in records) // len(records)} karakter)")
+    print(f"  tek tek /mask: {single_time:6.2f}s ({args.records / single_time:6.1f} kayıt/sn), "
+          f"{single_calls} LLM çağrısı, sızan isim {leaks(records, single)}")
+    print(f"  /mask/batch:   {batch_time:6.2f}s ({args.records / batch_time:6.1f} kayıt/sn), "
+          f"{batch_calls} LLM çağrısı, sızan isim {leaks(records, [l.get('masked_text', '') for l in lines])}, "
+          f"giriş sırası {'korundu' if in_order else 'BOZUK'}")
+
+
+if __name__ == "__main__":
+    main()
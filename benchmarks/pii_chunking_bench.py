@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+PII parçalı tespit benchmark'ı
+pii-masking servisini, prompt uzunluğuyla yavaşlayan ve bağlam penceresini aşan prompt'ların başını
+kırpan sahte bir Ollama'ya karşı çalıştırır. Farklı uzunluktaki dilekçelerde tek prompt
+(PII_CHUNK_CHARS çok büyük) ile parçalı eşzamanlı tespiti gecikme ve maskelenen isim oranıyla karşılaştırır.
+
+Kullanım:
+    python benchmarks/pii_chunking_bench.py --sizes 2000,8000,32000 --prompt-delay 0.3 --context-tokens 2048
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+FIRST_NAMES = ["Kerem", "Selin", "Onur", "Derya", "Murat", "Gizem", "Tolga", "Ebru", "Sinan", "Pelin",
+               "Cem", "Aslı", "Emre", "Burcu", "Levent", "Tuğba", "Serkan", "Özge", "Barış", "Deniz"]
+LAST_NAMES = ["Aydınoğlu", "Karaca", "Bektaşoğlu", "Kılınç", "Erdoğdu", "Tunalı", "Sarıkaya", "Gündoğdu",
+              "Akbulut", "Ceylan", "Ertürk", "Kocabaş", "Yalçınkaya", "Özdemirci", "Başaran", "Uysal",
+              "Karagöz", "Işıkçı", "Demirtaş", "Soylu"]
+# Her isim metinde bir kez geçer, böylece maskelenen isim sayısı doğrudan tespit edilen isim sayısıdır
+NAMES = [f"{first} {last}" for last in LAST_NAMES for first in FIRST_NAMES]
+SENTENCES = [
+    "Dilekçe ekinde sunulan belgeler incelenmiştir.",
+    "Başvuru sahibinin talebi kurum mevzuatı çerçevesinde değerlendirmeye alınmıştır.",
+    "Konuya ilişkin görüşlerin en geç on beş gün içinde bildirilmesi gerekmektedir.",
+    "Toplantıya {name} ve ekibi katılmış, tutanak birlikte imzalanmıştır.",
+]
+NAME_PATTERN = re.compile("|".join(map(re.escape, NAMES)))
+
+
+def llm_reply(payload):
+    """Prompt'ta (kırpılmış hali dahil) görünen tam isimleri PERSON olarak döndür"""
+    found = {m.group() for m in NAME_PATTERN.finditer(payload.get("prompt", ""))}
+    return json.dumps({"entities": [{"type": "PERSON", "value": name} for name in sorted(found)]})
+
+
+def make_petition(size: int, rng: random.Random) -> str:
+    names = iter(rng.sample(NAMES, len(NAMES)))
+    parts, length = [], 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        if "{name}" in sentence:
+            sentence = sentence.format(name=next(names))
+        parts.append(sentence + ("\n\n" if rng.random() < 0.2 else " "))
+        length += len(parts[-1])
+    return "".join(parts)
+
+
+def run(args, chunk_chars: int, docs):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=llm_reply,
+                             parallel=args.parallel, prompt_delay=args.prompt_delay,
+                             context_tokens=args.context_tokens)
+    proc, port = start_service(PII_APP, fake.server_address[1], {"PII_CHUNK_CHARS": str(chunk_chars)})
+    rows = []
+    try:
+        for text in docs:
+            elapsed, result = post(port, "/mask", {"text": text}, with_body=True)
+            planted = len(NAME_PATTERN.findall(text))
+            rows.append((len(text), elapsed, planted - len(NAME_PATTERN.findall(result["masked_text"])), planted))
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII parçalı tespit benchmark'ı")
+    parser.add_argument("--sizes", default="2000,8000,16000,32000")
+    parser.add_argument("--chunk-chars", type=int, default=2000)
+    parser.add_argument("--parallel", type=int, default=4, help="sahte Ollama'nın eşzamanlı üretim slotu")
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--context-tokens", type=int, default=2048)
+    parser.add_argument("--tokens", type=int, default=10)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    docs = [make_petition(int(size), rng) for size in args.sizes.split(",")]
+    single = run(args, 10 ** 9, docs)
+    chunked = run(args, args.chunk_chars, docs)
+    print(f"{'karakter':>9} | {'tek prompt':>22} | {'parçalı':>22}")
+    for (size, t1, m1, n), (_, t2, m2, _) in zip(single, chunked):
+        print(f"{size:>9} | {t1:6.2f}s  maskelenen {m1:>3}/{n:<3} | {t2:6.2f}s  maskelenen {m2:>3}/{n:<3}")
+
+
+if __name__ == "__main__":
+    main()
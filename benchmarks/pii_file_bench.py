@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+PII dosya maskeleme benchmark'ı
+Farklı boyutlarda .txt ve .docx dosyaları üretip pii-masking servisinin /mask/file endpoint'ine yükler;
+yanıtı akışla okuyarak ilk bayta kadar geçen süreyi, toplam süreyi ve servis sürecinin tepe bellek
+kullanımını (/proc/<pid>/status VmHWM) raporlar. Akışlı işlemede tepe bellek dosya boyutundan bağımsız
+kalmalıdır. Ayrıca çıktıda isimlerin maskelendiği ve .docx paragraf sayısının korunduğu kontrol edilir.
+
+Kullanım:
+    python benchmarks/pii_file_bench.py --sizes 1 8 --formats txt docx
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+NAMES = ["Kerem Aydınoğlu", "Selin Karaca", "Onur Bektaşoğlu", "Derya Kılınç", "Murat Erdoğdu"]
+WORDS = ("dilekçe başvuru kurum talep inceleme karar tarih belge ek yazı birim müdürlük personel "
+         "izin görev rapor süre kayıt tebliğ itiraz").split()
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "").split("Metin: ", 1)[-1]
+    return json.dumps({"entities": [{"type": "PERSON", "value": name} for name in NAMES if name in prompt]},
+                      ensure_ascii=False)
+
+
+def make_paragraphs(megabytes: float):
+    rng = random.Random(9)
+    paragraphs, size = [], 0
+    while size < megabytes * 1e6:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(20, 60))]
+        words.insert(rng.randint(0, len(words)), rng.choice(NAMES))
+        paragraph = " ".join(words).capitalize() + f". Kayıt no {rng.randint(10 ** 6, 10 ** 7)}."
+        paragraphs.append(paragraph)
+        size += len(paragraph.encode())
+    return paragraphs
+
+
+def make_file(fmt: str, paragraphs):
+    if fmt == "txt":
+        return "\n".join(paragraphs).encode()
+    import docx
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def upload(port: int, filename: str, content: bytes):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}/mask/file", data=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}), timeout=3600) as resp:
+        chunks = [resp.read1(65536)]
+        first_byte = time.perf_counter() - start
+        for chunk in iter(lambda: resp.read1(65536), b""):
+            chunks.append(chunk)
+    return first_byte, time.perf_counter() - start, b"".join(chunks)
+
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def check_output(fmt: str, data: bytes, paragraphs) -> str:
+    if fmt == "txt":
+        text, count = data.decode(), len(data.decode().split("\n"))
+    else:
+        import docx
+        document = docx.Document(io.BytesIO(data))
+        text, count = "\n".join(p.text for p in document.paragraphs), len(document.paragraphs)
+    leaked = sum(text.count(name) for name in NAMES)
+    return f"{count}/{len(paragraphs)} paragraf, sızan isim {leaked}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII dosya maskeleme benchmark'ı")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 8], help="metin boyutu (MB)")
+    parser.add_argument("--formats", nargs="+", default=["txt", "docx"])
+    args = parser.parse_args()
+
+    for fmt in args.formats:
+        for megabytes in args.sizes:
+            paragraphs = make_paragraphs(megabytes)
+            content = make_file(fmt, paragraphs)
+            # Her ölçüm temiz bir süreçte yapılır ki tepe bellek yalnızca bu dosyayı yansıtsın
+            fake = start_fake_ollama(tokens=5, token_delay=0.0, reply=reply, parallel=4)
+            proc, port = start_service(PII_APP, fake.server_address[1], {"PII_SENTENCE_CACHE_SIZE": "0"})
+            try:
+                baseline = peak_rss_mb(proc.pid)
+                first_byte, total, data = upload(port, f"bench.{fmt}", content)
+                peak = peak_rss_mb(proc.pid)
+            finally:
+                proc.terminate()
+                proc.wait()
+                fake.shutdown()
+            print(f"{fmt:>4} {len(content) / 1e6:6.1f} MB: ilk bayt {first_byte:5.2f}s, toplam {total:6.1f}s, "
+                  f"tepe bellek {peak:5.0f} MB (boşta {baseline:.0f} MB), {check_output(fmt, data, paragraphs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+PII prompt boyutu benchmark'ı
+pii-masking servisini, prompt değerlendirmesini karakter başına ücretlendiren ve ortak öneki KV
+önbelleğinden karşılayan sahte bir Ollama'ya karşı çalıştırır. Kısa metinlerde filtresiz ve
+entities filtreli istekler için ortalama prompt_eval_count, prompt_eval_duration ve /mask gecikmesini
+servisin /health -> llm_stats özetinden raporlar.
+
+Kullanım:
+    python benchmarks/pii_prompt_bench.py --requests 20 --prompt-delay 0.3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+SCENARIOS = [("filtresiz", []), ("PERSON+HEALTH", ["PERSON", "HEALTH"])]
+TEMPLATES = [
+    "{name} {year} yılında başvurusunu yapmış, astım rahatsızlığı nedeniyle rapor sunmuştur.",
+    "Toplantıya {name} katılmış, sendika üyeliği ile ilgili dilekçesini teslim etmiştir.",
+    "{name} evli ve iki çocuk sahibidir; yüzme ve fotoğrafçılıkla ilgilenmektedir.",
+]
+NAMES = ["Kerem Aydınoğlu", "Selin Karaca", "Onur Bektaşoğlu", "Derya Kılınç", "Murat Erdoğdu"]
+
+
+def run(args, entities, texts):
+    reply = json.dumps({"entities": [{"type": "PERSON", "value": NAMES[0]}]})
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply,
+                             prompt_delay=args.prompt_delay, kv_cache=True)
+    proc, port = start_service(PII_APP, fake.server_address[1])
+    try:
+        start = time.perf_counter()
+        for text in texts:
+            post(port, "/mask", {"text": text, "entities": entities})
+        latency = (time.perf_counter() - start) / len(texts)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=10) as resp:
+            stats = json.loads(resp.read())["llm_stats"]
+        prompt_chars = len(fake.recent_prompts[-1])
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    return latency, stats, prompt_chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII prompt boyutu benchmark'ı")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--tokens", type=int, default=10)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    texts = [rng.choice(TEMPLATES).format(name=rng.choice(NAMES), year=rng.randint(2015, 2024))
+             for _ in range(args.requests)]
+    for label, entities in SCENARIOS:
+        latency, stats, prompt_chars = run(args, entities, texts)
+        print(f"{label:>14}: prompt {prompt_chars} karakter, /mask {latency * 1000:6.0f}ms, "
+              f"prompt_eval_count ort. {stats.get('avg_prompt_eval_count')}, "
+              f"prompt_eval_duration ort. {stats.get('avg_prompt_eval_duration_ms')}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+PII kural motoru benchmark'ı
+1) pii_rules.detect'in süreç içi hızını (doküman/sn) ve sentetik dokümanlara gömülü yapısal PII'ı
+   yakalama oranını ölçer.
+2) pii-masking servisini sahte Ollama'ya karşı çalıştırır; /mask'ı yalnızca yapısal türler istenerek
+   (LLM atlanır) ve filtresiz (LLM geçişi dahil) çağırıp doküman/sn karşılaştırır.
+
+Kullanım:
+    python benchmarks/pii_rules_bench.py --docs 2000 --requests 40 --concurrency 4 --token-delay 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_DIR = os.path.join(ROOT, "services", "text", "pii-masking")
+sys.path.insert(0, PII_DIR)
+import pii_rules
+
+NAMES = ["Ahmet Yılmaz", "Elif Demir", "Burak Kaya", "Zeynep Şahin", "Can Öztürk"]
+FILLER = ("Dilekçe ekinde sunulan belgeler incelenmiş olup başvuru sahibinin talebi kurum "
+          "mevzuatı çerçevesinde değerlendirmeye alınmıştır. ")
+
+
+def tckn(rng: random.Random) -> str:
+    d = [rng.randint(1, 9)] + [rng.randint(0, 9) for _ in range(8)]
+    d.append(((d[0] + d[2] + d[4] + d[6] + d[8]) * 7 - (d[1] + d[3] + d[5] + d[7])) % 10)
+    d.append(sum(d) % 10)
+    return "".join(map(str, d))
+
+
+def luhn_complete(prefix: str, length: int, rng: random.Random) -> str:
+    body = prefix + "".join(str(rng.randint(0, 9)) for _ in range(length - len(prefix) - 1))
+    for check in "0123456789":
+        if pii_rules.luhn_valid(body + check):
+            return body + check
+
+
+def tr_iban(rng: random.Random) -> str:
+    bban = "".join(str(rng.randint(0, 9)) for _ in range(22))
+    check = 98 - int(bban + "292700") % 97  # "TR00" -> 29 27 00
+    raw = f"TR{check:02d}{bban}"
+    return " ".join(raw[i:i + 4] for i in range(0, len(raw), 4))
+
+
+def make_doc(rng: random.Random):
+    card = luhn_complete("4", 16, rng)
+    planted = [
+        ("ID_NUMBER", tckn(rng)),
+        ("IBAN", tr_iban(rng)),
+        ("CREDIT_CARD", " ".join(card[i:i + 4] for i in range(0, 16, 4))),
+        ("EMAIL", f"kisi{rng.randint(1, 9999)}@ornek.com.tr"),
+        ("PHONE", f"0532 {rng.randint(100, 999)} {rng.randint(10, 99)} {rng.randint(10, 99)}"),
+        ("IP_ADDRESS", f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"),
+        ("MAC_ADDRESS", ":".join(f"{rng.randint(0, 255):02X}" for _ in range(6))),
+        ("IMEI", luhn_complete("35", 15, rng)),
+        ("LICENSE_PLATE", f"{rng.randint(1, 81):02d} ABC {rng.randint(100, 999)}"),
+    ]
+    text = f"{rng.choice(NAMES)} tarafından verilen bilgiler: " + " ".join(
+        f"{FILLER * rng.randint(1, 3)}{pii_type}: {value}." for pii_type, value in planted)
+    return text, planted
+
+
+def bench_engine(docs):
+    start = time.perf_counter()
+    found = [pii_rules.detect(text) for text, _ in docs]
+    elapsed = time.perf_counter() - start
+    hits = total = 0
+    for (_, planted), entities in zip(docs, found):
+        values = {(e["type"], e["value"]) for e in entities}
+        total += len(planted)
+        hits += sum(item in values for item in planted)
+    size = sum(len(text) for text, _ in docs) / 1e6
+    print(f"Kural motoru: {len(docs) / elapsed:,.0f} doküman/sn ({size / elapsed:.1f} MB/sn), "
+          f"yakalama {hits}/{total}")
+
+
+def bench_service(docs, args):
+    reply = json.dumps({"entities": [{"type": "PERSON", "value": NAMES[0], "start": 0, "end": 12}]})
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply)
+    proc, port = start_service(os.path.join(PII_DIR, "app.py"), fake.server_address[1])
+    try:
+        for label, entities in (("LLM'siz (yalnızca yapısal türler)", sorted(pii_rules.STRUCTURED_TYPES)),
+                                ("LLM geçişi dahil", [])):
+            payloads = [{"text": text, "entities": entities} for text, _ in docs[:args.requests]]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                list(pool.map(lambda p: post(port, "/mask", p), payloads))
+            elapsed = time.perf_counter() - start
+            print(f"/mask {label}: {len(payloads) / elapsed:.1f} doküman/sn")
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII kural motoru benchmark'ı")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    docs = [make_doc(rng) for _ in range(args.docs)]
+    bench_engine(docs)
+    bench_service(docs, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+PII cümle önbelleği benchmark'ı
+Ortak antet, imza bloğu ve yasal dipnot taşıyan, gövdesi değişen dokümanları pii-masking servisine
+sırayla gönderir; cümle önbelleği açık ve kapalı (PII_SENTENCE_CACHE_SIZE=0) iki çalıştırmada toplam
+süre, LLM'e giden prompt_eval_count toplamı, sızan isim sayısı ve /health'teki önbellek isabet oranı raporlanır.
+
+Kullanım:
+    python benchmarks/pii_sentence_cache_bench.py --docs 40 --prompt-delay 0.3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+NAMES = ["Kerem Aydınoğlu", "Selin Karaca", "Onur Bektaşoğlu", "Derya Kılınç", "Murat Erdoğdu",
+         "Ayşe Tunçel", "Hakan Yıldırım", "Gizem Korkmaz", "Av. Nihat Sarıgül"]
+LETTERHEAD = ("T.C.\nANKARA BÜYÜKŞEHİR BELEDİYESİ\nİnsan Kaynakları ve Eğitim Dairesi Başkanlığı\n"
+              "Hukuk Müşavirliği\n")
+FOOTER = ("Bilgilerinize arz ederim.\n\nSaygılarımla,\nAv. Nihat Sarıgül\nHukuk Müşaviri\n\n"
+          "Bu belge 5070 sayılı Elektronik İmza Kanunu uyarınca güvenli elektronik imza ile imzalanmıştır. "
+          "Belgenin aslına e-Devlet üzerinden doğrulama kodu ile ulaşılabilir. Bu yazı ve ekleri kişisel "
+          "veri içerebilir; 6698 sayılı Kişisel Verilerin Korunması Kanunu kapsamında yetkisiz kişilerle "
+          "paylaşılması yasaktır. Yanlışlıkla size ulaştıysa lütfen göndericiye bildiriniz ve siliniz.")
+BODIES = [
+    "{name} tarafından {day} tarihinde verilen dilekçe incelenmiştir. Talep uygun bulunmuştur.",
+    "İlgi yazı ile {name} hakkında disiplin soruşturması başlatılmıştır. Savunmanın yedi gün içinde verilmesi gerekmektedir.",
+    "{name} adlı personelin yıllık izin talebi {day} itibarıyla onaylanmıştır.",
+]
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "").split("Metin: ", 1)[-1]
+    return json.dumps({"entities": [{"type": "PERSON", "value": name} for name in NAMES if name in prompt]},
+                      ensure_ascii=False)
+
+
+def make_docs(count: int):
+    rng = random.Random(3)
+    docs = []
+    for i in range(count):
+        name = rng.choice(NAMES[:-1])
+        body = rng.choice(BODIES).format(name=name, day=f"{rng.randint(1, 28)}.0{rng.randint(1, 9)}.2025")
+        docs.append((f"{LETTERHEAD}\nSayı: E-{1000 + i}\nKonu: Personel işlemleri\n\n{body}\n\n{FOOTER}", name))
+    return docs
+
+
+def run(args, docs, cache_size: int):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply,
+                             prompt_delay=args.prompt_delay, kv_cache=True)
+    proc, port = start_service(PII_APP, fake.server_address[1], {"PII_SENTENCE_CACHE_SIZE": str(cache_size)})
+    try:
+        start = time.perf_counter()
+        results = [post(port, "/mask", {"text": text}, with_body=True)[1] for text, _ in docs]
+        elapsed = time.perf_counter() - start
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=10) as resp:
+            cache = json.loads(resp.read())["sentence_cache"]
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    prompt_tokens = sum(r["llm_usage"].get("prompt_eval_count", 0) for r in results)
+    leaked = sum(name in r["masked_text"] or "Nihat Sarıgül" in r["masked_text"]
+                 for r, (_, name) in zip(results, docs))
+    return elapsed, prompt_tokens, leaked, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII cümle önbelleği benchmark'ı")
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    print(f"{args.docs} doküman (ortalama {sum(len(t) for t, _ in docs) // len(docs)} karakter)")
+    for label, cache_size in (("önbelleksiz", 0), ("cümle önbelleği", 20000)):
+        elapsed, prompt_tokens, leaked, cache = run(args, docs, cache_size)
+        print(f"{label:>16}: {elapsed:6.2f}s ({elapsed / len(docs) * 1000:5.0f}ms/doküman), "
+              f"prompt_eval_count toplam {prompt_tokens}, sızan isim {leaked}, "
+              f"isabet oranı {cache['hit_rate']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+PII artımlı yeniden maskeleme benchmark'ı
+Uzun bir belge üzerinde art arda tek kelimelik düzenlemeler yapar ve her sürümü
+1) /mask'a baştan (cümle önbelleği kapalı),
+2) /mask/session oturumuna PUT ile
+gönderir. Sürüm başına gecikme, LLM çağrı sayısı ve prompt_eval_count ile oturum çıktısının baştan
+maskelemeyle aynı olup olmadığı raporlanır.
+
+Kullanım:
+    python benchmarks/pii_session_bench.py --sentences 400 --edits 10 --prompt-delay 0.3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+PII_APP = os.path.join(ROOT, "services", "text", "pii-masking", "app.py")
+NAMES = ["Kerem Aydınoğlu", "Selin Karaca", "Onur Bektaşoğlu", "Derya Kılınç", "Murat Erdoğdu"]
+VERBS = ["iletmiştir", "sunmuştur", "göndermiştir", "teslim etmiştir"]
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "").split("Metin: ", 1)[-1]
+    return json.dumps({"entities": [{"type": "PERSON", "value": name} for name in NAMES if name in prompt]},
+                      ensure_ascii=False)
+
+
+def put(port: int, path: str, payload: dict):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"}, method="PUT")
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=600) as resp:
+        data = json.loads(resp.read())
+    return time.perf_counter() - start, data
+
+
+def make_versions(sentences: int, edits: int):
+    rng = random.Random(4)
+    words = [f"{rng.choice(NAMES)}, {i + 1} numaralı dosyaya ilişkin talebini k{i}@ornek.com adresinden "
+             f"{rng.choice(VERBS)}." for i in range(sentences)]
+    versions = [" ".join(words)]
+    for _ in range(edits):
+        i = rng.randrange(sentences)
+        words[i] = words[i].replace(words[i].rsplit(" ", 1)[1], rng.choice(VERBS) + ".")
+        versions.append(" ".join(words))
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PII artımlı yeniden maskeleme benchmark'ı")
+    parser.add_argument("--sentences", type=int, default=400)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--prompt-delay", type=float, default=0.3, help="1000 prompt karakteri başına saniye")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    versions = make_versions(args.sentences, args.edits)
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply,
+                             prompt_delay=args.prompt_delay, parallel=4)
+    proc, port = start_service(PII_APP, fake.server_address[1], {"PII_SENTENCE_CACHE_SIZE": "0"})
+    full, incremental, mismatches = [], [], 0
+    try:
+        elapsed, created = post(port, "/mask/session", {"text": versions[0]}, with_body=True)
+        session_id = created["session_id"]
+        print(f"Belge {len(versions[0])} karakter, {created['total_sentences']} cümle; "
+              f"oturum oluşturma {elapsed:.2f}s, {created['llm_usage']['calls']} LLM çağrısı")
+        for text in versions[1:]:
+            calls = fake.calls
+            elapsed, masked = post(port, "/mask", {"text": text}, with_body=True)
+            full.append((elapsed, fake.calls - calls, masked["llm_usage"]["prompt_eval_count"]))
+
+            calls = fake.calls
+            elapsed, updated = put(port, f"/mask/session/{session_id}", {"text": text})
+            incremental.append((elapsed, fake.calls - calls, updated["llm_usage"]["prompt_eval_count"]))
+            mismatches += updated["masked_text"] != masked["masked_text"]
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+    for label, rows in (("baştan /mask", full), ("oturum PUT", incremental)):
+        count = len(rows)
+        print(f"{label:>13}: sürüm başına {sum(r[0] for r in rows) / count * 1000:7.0f}ms, "
+              f"{sum(r[1] for r in rows) / count:5.1f} LLM çağrısı, "
+              f"prompt_eval_count {sum(r[2] for r in rows) / count:7.0f}")
+    print(f"Oturum çıktısı baştan maskelemeyle {'aynı' if not mismatches else f'{mismatches} sürümde FARKLI'}")
+
+
+if __name__ == "__main__":
+    main()
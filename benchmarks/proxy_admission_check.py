@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Admission control kontrolü
+Sahte Ollama'ya karşı proxy'yi küçük bir slot/kuyruk ile çalıştırır ve şunları doğrular:
+  - upstream'deki eşzamanlı üretim sayısı PROXY_MAX_CONCURRENT'ı aşmaz
+  - kuyruk dolunca istekler beklemeden 429 + Retry-After alır
+  - kuyruğa sonradan giren interaktif (vqa) istekler, dolu kuyrukta bile yer bulur ve
+    bekleyen batch (quiz-generator) isteklerinden önce tamamlanır
+  - servis başına kota (PROXY_SERVICE_LIMITS) uygulanır
+
+Kullanım:
+    python benchmarks/proxy_admission_check.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import start_proxy
+
+
+async def post(session, port, service, prompt):
+    body = json.dumps({"model": "gemma3:27b", "prompt": prompt, "stream": False})
+    start = time.perf_counter()
+    async with session.post(f"http://127.0.0.1:{port}/api/generate", data=body,
+                            headers={"X-Service-Name": service}) as resp:
+        await resp.read()
+        return service, resp.status, resp.headers.get("Retry-After"), time.perf_counter() - start, time.perf_counter()
+
+
+async def scenario(port, batch, interactive):
+    async with aiohttp.ClientSession() as session:
+        tasks = [asyncio.create_task(post(session, port, "quiz-generator", f"quiz {i}")) for i in range(batch)]
+        await asyncio.sleep(0.2)
+        tasks += [asyncio.create_task(post(session, port, "vqa", f"soru {i}")) for i in range(interactive)]
+        results = await asyncio.gather(*tasks)
+        async with session.get(f"http://127.0.0.1:{port}/proxy/metrics") as resp:
+            metrics = await resp.text()
+    return results, metrics
+
+
+def check(args) -> bool:
+    ok = True
+
+    # 1) Global sınır, öncelik ve 429
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay)
+    proc, port = start_proxy(fake.server_address[1], streaming=True, extra_env={
+        "PROXY_MAX_CONCURRENT": str(args.slots), "PROXY_QUEUE_SIZE": str(args.queue)})
+    try:
+        results, metrics = asyncio.run(scenario(port, args.batch, args.interactive))
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+    rejected = [r for r in results if r[1] == 429]
+    done = [r for r in results if r[1] == 200]
+    fast_reject = all(r[3] < 0.5 and r[2] for r in rejected)
+    vqa_done = max((r[4] for r in done if r[0] == "vqa"), default=0)
+    batch_after_vqa = sum(1 for r in done if r[0] == "quiz-generator" and r[4] > vqa_done)
+    vqa_ok = all(r[1] == 200 for r in results if r[0] == "vqa")
+    passed = fake.peak_active <= args.slots and rejected and fast_reject and vqa_ok and batch_after_vqa > 0
+    ok = ok and bool(passed)
+    print(f"slot={args.slots} kuyruk={args.queue} upstream tepe={fake.peak_active} "
+          f"200={len(done)} 429={len(rejected)} (Retry-After={rejected[0][2] if rejected else '-'}) "
+          f"vqa sonrası biten batch={batch_after_vqa} -> {'OK' if passed else 'HATA'}")
+    for line in metrics.splitlines():
+        if line.startswith(("ollama_proxy_queue_wait_seconds_count", "ollama_proxy_admission_requests_total")):
+            print("   ", line)
+
+    # 2) Servis başına kota: quiz-generator en fazla 1 slot kullanabilir
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay)
+    proc, port = start_proxy(fake.server_address[1], streaming=True, extra_env={
+        "PROXY_MAX_CONCURRENT": str(args.slots), "PROXY_SERVICE_LIMITS": "quiz-generator=1"})
+    try:
+        results, _ = asyncio.run(scenario(port, 4, 0))
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    passed = fake.peak_active == 1 and all(r[1] == 200 for r in results)
+    ok = ok and passed
+    print(f"quiz-generator=1 kotası: upstream tepe={fake.peak_active} -> {'OK' if passed else 'HATA'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ollama_proxy admission control kontrolü")
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--interactive", type=int, default=2)
+    parser.add_argument("--tokens", type=int, default=10)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    sys.exit(0 if check(parser.parse_args()) else 1)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Model affinity benchmark'ı
+Her biri VRAM'de tek model tutabilen iki sahte Ollama'ya gemma3/qwen2.5vl karışık
+trafik gönderir; affinity açık ve kapalı iken toplam model swap sayısını ve süreyi karşılaştırır.
+
+Kullanım:
+    python benchmarks/proxy_affinity_bench.py --requests 60 --load-delay 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import start_proxy
+
+MODELS = ["gemma3:27b"] * 5 + ["qwen2.5vl:32b"]  # beş metin servisi, bir VQA
+
+
+async def fire(port: int, models, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession() as session:
+        async def one(i, model):
+            async with sem:
+                body = json.dumps({"model": model, "prompt": f"merhaba {i}", "stream": False})
+                async with session.post(f"http://127.0.0.1:{port}/api/generate", data=body) as resp:
+                    await resp.read()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i, m) for i, m in enumerate(models)))
+        return time.perf_counter() - start
+
+
+def run(args):
+    rng = random.Random(42)
+    models = [rng.choice(MODELS) for _ in range(args.requests)]
+    print(f"{args.requests} istek, 2 backend (VRAM: 1 model), swap maliyeti {args.load_delay * 1000:.0f} ms")
+    print(f"{'affinity':<10} {'süre (ms)':>10} {'swap':>6} {'önlenen swap':>14}")
+    for affinity in (False, True):
+        fakes = [start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay,
+                                   load_delay=args.load_delay, max_loaded=1, parallel=args.parallel)
+                 for _ in range(2)]
+        env = {
+            "OLLAMA_SERVERS": ",".join(f"http://127.0.0.1:{f.server_address[1]}" for f in fakes),
+            "PROXY_MODEL_AFFINITY": "1" if affinity else "0",
+            "PROXY_BACKEND_SLOTS": str(args.parallel),
+            "PROXY_HEALTH_INTERVAL": "1"
+        }
+        proc, port = start_proxy(fakes[0].server_address[1], streaming=True, extra_env=env)
+        try:
+            wall = asyncio.run(fire(port, models, args.concurrency))
+            status = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{port}/proxy/status").read())
+        finally:
+            proc.terminate()
+            proc.wait()
+            for f in fakes:
+                f.shutdown()
+        swaps = sum(f.swaps for f in fakes)
+        avoided = status.get("routing", {}).get("swaps_avoided", 0)
+        print(f"{'açık' if affinity else 'kapalı':<10} {wall * 1000:>10.0f} {swaps:>6} {avoided:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ollama_proxy model affinity benchmark'ı")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=5)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--load-delay", type=float, default=0.5)
+    run(parser.parse_args())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Proxy eşzamanlılık benchmark'ı
+Sahte Ollama'ya karşı N adet uzun süren eşzamanlı /api/generate çağrısı yapar;
+toplam süre, tek çağrı süresine ne kadar yakınsa proxy o kadar iyi paralelleştiriyor demektir.
+--backends ile birden fazla sahte Ollama başlatılır; her biri --parallel kadar slot sunar,
+böylece toplam throughput'un backend sayısıyla ölçeklenmesi gözlenebilir.
+
+Kullanım:
+    python benchmarks/proxy_concurrency_bench.py --concurrency 64 --tokens 20 --token-delay 0.05
+    python benchmarks/proxy_concurrency_bench.py --backends 3 --parallel 4 --concurrency 48
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import start_proxy
+
+
+async def fire(port: int, concurrency: int, stream: bool):
+    latencies = []
+    errors = 0
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        async def one(i):
+            nonlocal errors
+            # Her istek farklı prompt taşır, aksi halde proxy bunları tek çağrıda birleştirir
+            body = json.dumps({"model": "gemma3:27b", "prompt": f"merhaba {i}", "stream": stream})
+            start = time.perf_counter()
+            async with session.post(f"http://127.0.0.1:{port}/api/generate", data=body) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(concurrency)))
+        wall = time.perf_counter() - start
+    return wall, latencies, errors
+
+
+def run(args):
+    fakes = [start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, parallel=args.parallel)
+             for _ in range(args.backends)]
+    single = args.tokens * args.token_delay
+    extra_env = {
+        "PROXY_POOL_SIZE": str(args.pool_size),
+        "OLLAMA_SERVERS": ",".join(f"http://127.0.0.1:{f.server_address[1]}" for f in fakes)
+    }
+    proc, port = start_proxy(fakes[0].server_address[1], streaming=True, extra_env=extra_env)
+    try:
+        wall, latencies, errors = asyncio.run(fire(port, args.concurrency, args.stream))
+    finally:
+        proc.terminate()
+        proc.wait()
+        for fake in fakes:
+            fake.shutdown()
+
+    latencies.sort()
+    print(f"{args.concurrency} eşzamanlı istek, havuz={args.pool_size}, backend={args.backends} "
+          f"(slot={args.parallel or 'sınırsız'}), tek çağrı ~{single * 1000:.0f} ms")
+    print(f"toplam süre: {wall * 1000:.0f} ms  (seri olsaydı ~{single * args.concurrency * 1000:.0f} ms)")
+    print(f"p50: {latencies[len(latencies) // 2] * 1000:.0f} ms  max: {latencies[-1] * 1000:.0f} ms")
+    print(f"throughput: {args.concurrency / wall:.1f} istek/s")
+    print(f"backend dağılımı: {[f.calls for f in fakes]}")
+    print(f"hata: {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ollama_proxy eşzamanlılık benchmark'ı")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--pool-size", type=int, default=64)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--backends", type=int, default=1)
+    parser.add_argument("--parallel", type=int, default=0, help="backend başına üretim slotu (0 = sınırsız)")
+    parser.add_argument("--stream", action="store_true")
+    run(parser.parse_args())
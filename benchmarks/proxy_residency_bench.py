@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Model residency benchmark'ı
+Sahte Ollama'yı kısa bir varsayılan keep_alive ve yükleme gecikmesi ile çalıştırır
+(gerçek sunucudaki 5 dakikalık OLLAMA_KEEP_ALIVE'ın küçültülmüş hali). İstekler arası
+boşluk bu süreden uzun olduğundan residency kapalıyken her istek soğuk başlar.
+Ortada backend yeniden başlatılır (VRAM boşalır); residency açıkken model talepten önce ısıtılır.
+
+Kullanım:
+    python benchmarks/proxy_residency_bench.py --rounds 6 --gap 3 --load-delay 1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import start_proxy
+
+
+def generate(port: int, prompt: str):
+    body = json.dumps({"model": "gemma3:27b", "prompt": prompt, "stream": False}).encode()
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}/api/generate", data=body,
+            headers={"Content-Type": "application/json"}), timeout=60) as resp:
+        data = json.loads(resp.read())
+    return time.perf_counter() - start, data.get("load_duration", 0) / 1e9
+
+
+def run_mode(args, residency: bool):
+    fake = start_fake_ollama(tokens=5, token_delay=0.01, load_delay=args.load_delay,
+                             default_keep_alive=args.default_keep_alive)
+    proc, port = start_proxy(fake.server_address[1], streaming=True, extra_env={
+        "PROXY_RESIDENCY": "1" if residency else "0",
+        "PROXY_RESIDENCY_INTERVAL": "0.5",
+        "PROXY_HEALTH_INTERVAL": "0.5",
+        "PROXY_RESIDENT_KEEP_ALIVE": "60",
+        "PROXY_OLLAMA_DEFAULT_KEEP_ALIVE": str(args.default_keep_alive)})
+    latencies, cold = [], 0
+    try:
+        for i in range(args.rounds):
+            latency, load = generate(port, f"istek {i}")
+            latencies.append(latency)
+            cold += load >= 0.5
+            if i == args.rounds // 2:
+                # Backend yeniden başladı: tüm modeller VRAM'den düştü
+                with fake.lock:
+                    fake.loaded.clear()
+                    fake.expires.clear()
+            time.sleep(args.gap)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/proxy/status", timeout=5) as resp:
+            status = json.loads(resp.read())
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+    return latencies, cold, fake.load_only, status.get("residency", {})
+
+
+def run(args):
+    print(f"{args.rounds} istek, {args.gap}s arayla; yükleme {args.load_delay}s, "
+          f"Ollama varsayılan keep_alive {args.default_keep_alive}s")
+    for residency in (False, True):
+        latencies, cold, warmups, stats = run_mode(args, residency)
+        line = (f"residency={'on ' if residency else 'off'} ort={sum(latencies) / len(latencies) * 1000:7.1f} ms "
+                f"maks={max(latencies) * 1000:7.1f} ms soğuk={cold}/{len(latencies)} ısıtma/uzatma={warmups}")
+        if residency:
+            line += (f" kurtarılan={stats.get('cold_starts_avoided')} "
+                     f"({stats.get('cold_start_seconds_saved')} s)")
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ollama_proxy model residency benchmark'ı")
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--gap", type=float, default=3.0)
+    parser.add_argument("--load-delay", type=float, default=1.0)
+    parser.add_argument("--default-keep-alive", type=float, default=2.0)
+    run(parser.parse_args())
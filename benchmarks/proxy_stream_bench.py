@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Proxy streaming benchmark'ı
+Sahte bir Ollama'ya karşı ollama_proxy.py'yi buffered ve streaming modda çalıştırır;
+ilk byte süresini (TTFB), toplam süreyi ve proxy'nin tepe RSS değerini ölçer.
+
+Kullanım:
+    python benchmarks/proxy_stream_bench.py --tokens 50 --token-delay 0.05 --payload-mb 40
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid: int):
+    """Linux'ta /proc üzerinden tepe RSS (VmHWM) değeri"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def start_proxy(upstream_port: int, streaming: bool, extra_env=None):
+    port = free_port()
+    env = dict(os.environ,
+               OLLAMA_SERVER=f"http://127.0.0.1:{upstream_port}",
+               PROXY_PORT=str(port),
+               PROXY_STREAMING="1" if streaming else "0")
+    env.update(extra_env or {})
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "ollama_proxy.py")],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Proxy başlatılamadı")
+
+
+def timed_post(port: int, path: str, body: bytes):
+    """İsteği gönder, (ilk byte süresi, toplam süre, yanıt boyutu) döndür"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    start = time.perf_counter()
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    first = resp.read1(1) if hasattr(resp, "read1") else resp.read(1)
+    ttfb = time.perf_counter() - start
+    rest = resp.read()
+    total = time.perf_counter() - start
+    conn.close()
+    return ttfb, total, len(first) + len(rest)
+
+
+def run(args):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay)
+    upstream_port = fake.server_address[1]
+
+    stream_body = json.dumps({"model": "gemma3:27b", "prompt": "merhaba", "stream": True}).encode()
+    image_b64 = "A" * (args.payload_mb * 1024 * 1024)
+    image_body = json.dumps({"model": "qwen2.5vl:32b", "prompt": "ne görüyorsun?",
+                             "images": [image_b64], "stream": False}).encode()
+    del image_b64
+
+    print(f"Upstream: {args.tokens} token x {args.token_delay * 1000:.0f} ms, görsel payload: {args.payload_mb} MB")
+    print(f"{'mod':<10} {'TTFB (ms)':>10} {'toplam (ms)':>12} {'tepe RSS (MB)':>14}")
+    for streaming in (False, True):
+        proc, port = start_proxy(upstream_port, streaming)
+        try:
+            ttfbs, totals = [], []
+            for _ in range(args.repeat):
+                ttfb, total, _ = timed_post(port, "/api/generate", stream_body)
+                ttfbs.append(ttfb)
+                totals.append(total)
+            timed_post(port, "/api/generate", image_body)
+            rss = peak_rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait()
+        rss_str = f"{rss:.1f}" if rss is not None else "n/a"
+        print(f"{'stream' if streaming else 'buffered':<10} {min(ttfbs) * 1000:>10.1f} "
+              f"{min(totals) * 1000:>12.1f} {rss_str:>14}")
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ollama_proxy streaming benchmark")
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--payload-mb", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Soru bankası benchmark'ı
+Aynı ders notundan birden fazla kullanıcı art arda quiz ister. Banka kapalıyken
+(QUIZ_BANK_MAX_PER_BUCKET=0) her quiz canlı üretilir; açıkken doküman önce /bank/prefill ile
+doldurulur, quiz'ler bankadan kurulur ve azalan kovalar arka planda yeniden doldurulur. Quiz başına
+gecikme, soruların kaynağı, canlı üretilen soru, toplam LLM çağrısı (arka plan dahil) ve kullanıcı
+başına tekrar eden soru raporlanır.
+
+Kullanım:
+    python benchmarks/quiz_bank_bench.py --users 4 --quizzes 3 --questions 6
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+QUIZ_APP = os.path.join(ROOT, "services", "text", "quiz-generator", "app.py")
+TYPES = ["multiple_choice", "true_false"]
+TEXT = ("Türkiye Cumhuriyeti 29 Ekim 1923 tarihinde kurulmuştur. Başkent Ankara'dır. "
+        "Cumhuriyetin ilk cumhurbaşkanı Mustafa Kemal Atatürk'tür. ") * 5
+
+
+def make_reply():
+    counter = itertools.count(1)
+
+    def reply(payload):
+        prompt = payload.get("prompt", "")
+        count = int(re.search(r"(\d+) adet", prompt).group(1))
+        questions = [{"question": f"Madde {next(counter):04d} nedir?",  # yakın tekrar filtresine takılmasın
+                      "options": ["A) 1923", "B) 1920", "C) 1938", "D) 1919"],
+                      "correct_answer": "A) 1923", "explanation": "Cumhuriyet 1923'te ilan edildi.",
+                      "difficulty": "medium"} for _ in range(count)]
+        return json.dumps({"questions": questions}, ensure_ascii=False)
+
+    return reply
+
+
+def get_json(port: int, path: str):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+def run(args, bank: bool):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=make_reply(), parallel=4)
+    with tempfile.TemporaryDirectory() as sessions:
+        proc, port = start_service(QUIZ_APP, fake.server_address[1], {
+            "QUIZ_SESSIONS_DIR": sessions, "QUIZ_BANK_MAX_PER_BUCKET": "200" if bank else "0"})
+        rows, prefill = [], None
+        try:
+            if bank:
+                start = time.perf_counter()
+                _, body = post(port, "/bank/prefill", {"text": TEXT, "question_types": TYPES}, with_body=True)
+                while get_json(port, f"/bank/{body['bank_key']}")["refilling"]:
+                    time.sleep(0.1)
+                prefill = time.perf_counter() - start
+            for quiz in range(args.quizzes):
+                for user in range(args.users):
+                    elapsed, body = post(port, "/generate", {
+                        "text": TEXT, "num_questions": args.questions, "question_types": TYPES,
+                        "user_id": f"ogrenci-{user}"}, with_body=True)
+                    rows.append((user, elapsed, body["live_questions"], body["source"],
+                                 [q["question"] for q in body["questions"]]))
+            time.sleep(0.5)
+            total_calls = fake.calls
+        finally:
+            proc.terminate()
+            proc.wait()
+            fake.shutdown()
+    return rows, prefill, total_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soru bankası benchmark'ı")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--quizzes", type=int, default=3, help="kullanıcı başına quiz")
+    parser.add_argument("--questions", type=int, default=6)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for label, bank in (("banka kapalı", False), ("banka açık", True)):
+        rows, prefill, total_calls = run(args, bank)
+        latencies = [row[1] for row in rows]
+        sources = {source: sum(row[3] == source for row in rows) for source in ("bank", "mixed", "live")}
+        repeats = 0
+        for user in range(args.users):
+            questions = [q for row in rows if row[0] == user for q in row[4]]
+            repeats += len(questions) - len(set(questions))
+        print(f"{label}: {len(rows)} quiz, ort {statistics.mean(latencies) * 1000:6.0f}ms, "
+              f"en uzun {max(latencies) * 1000:6.0f}ms, kaynak {sources}, "
+              f"canlı üretilen soru {sum(row[2] for row in rows)}, toplam {total_calls} LLM çağrısı, "
+              f"kullanıcı başına tekrar eden soru {repeats}"
+              + (f", ön doldurma {prefill:.2f}s" if prefill is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Yakın tekrar soru filtresi benchmark'ı
+Sahte model, her çağrıda metnin en belirgin bilgilerini sırayla sorar ve her soru tipi için aynı bilgiyi
+farklı bir cümleyle ifade eder (gerçek modellerde tipler arası en sık görülen tekrar); prompt'taki
+"zaten var" listesinde geçen bilgileri atlar. Üç durum karşılaştırılır: filtre kapalı
+(QUIZ_DUPLICATE_THRESHOLD=1.01), filtre açık ama prompt'a kabul edilen sorular eklenmeden
+(QUIZ_EXCLUDE_PROMPT_LIMIT=0) ve filtre + hedefli yeniden üretim. Quiz başına gecikme, LLM çağrısı,
+modelin ürettiği toplam soru, quiz'deki soru sayısı ve aynı bilgiyi tekrar soran soru sayısı raporlanır.
+Banka kapalıdır (QUIZ_BANK_MAX_PER_BUCKET=0).
+
+Kullanım:
+    python benchmarks/quiz_dedup_bench.py --quizzes 3 --questions 8
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+QUIZ_APP = os.path.join(ROOT, "services", "text", "quiz-generator", "app.py")
+TYPES = ["multiple_choice", "true_false"]
+TEXT = ("Türkiye Cumhuriyeti 29 Ekim 1923 tarihinde kurulmuştur. Başkent Ankara'dır. "
+        "Cumhuriyetin ilk cumhurbaşkanı Mustafa Kemal Atatürk'tür. ") * 5
+
+# Her bilgi için aynı soruyu farklı ifade eden cümleler (soru tipi başına bir tanesi kullanılır)
+FACTS = [
+    ["Türkiye Cumhuriyeti hangi yıl kurulmuştur?", "Türkiye Cumhuriyeti hangi tarihte kuruldu?"],
+    ["Türkiye Cumhuriyeti'nin başkenti neresidir?", "Türkiye'nin başkenti hangi şehirdir?"],
+    ["Cumhuriyetin ilk cumhurbaşkanı kimdir?", "Türkiye Cumhuriyeti'nin ilk cumhurbaşkanı kim olmuştur?"],
+    ["Cumhuriyet hangi ayda ilan edildi?", "Cumhuriyetin ilan edildiği ay hangisidir?"],
+    ["Saltanat hangi yıl kaldırıldı?", "Saltanatın kaldırılması hangi yıl gerçekleşmiştir?"],
+    ["Halifelik hangi yıl kaldırılmıştır?", "Halifeliğin kaldırıldığı yıl hangisidir?"],
+    ["Harf devrimi hangi yıl yapıldı?", "Harf devrimi hangi yılda yapılmıştır?"],
+    ["Kadınlara seçme ve seçilme hakkı hangi yıl verildi?", "Kadınlara seçme seçilme hakkı hangi yıl tanındı?"],
+    ["Soyadı kanunu hangi yıl çıkarıldı?", "Soyadı kanununun çıkarıldığı yıl hangisidir?"],
+    ["Lozan antlaşması hangi yıl imzalandı?", "Lozan antlaşmasının imzalandığı yıl nedir?"],
+    ["TBMM hangi tarihte açıldı?", "Türkiye Büyük Millet Meclisi hangi tarihte açılmıştır?"],
+    ["Medeni kanun hangi yıl kabul edildi?", "Medeni kanunun kabul edildiği yıl hangisidir?"],
+]
+FACT_OF = {question: fact for fact, variants in enumerate(FACTS) for question in variants}
+EXCLUDED = re.compile(r"^- (.+)$", re.MULTILINE)
+
+
+def reply(payload):
+    prompt = payload.get("prompt", "")
+    count = int(re.search(r"(\d+) adet", prompt).group(1))
+    question_type = re.search(r"seviyesinde (\w+) sorusu", prompt).group(1)
+    variant = TYPES.index(question_type) % 2
+    excluded = {FACT_OF.get(q.strip()) for q in EXCLUDED.findall(prompt)}
+    facts = [fact for fact in range(len(FACTS)) if fact not in excluded][:count]
+    questions = [{"question": FACTS[fact][variant], "options": ["A) 1923", "B) 1920", "C) 1938", "D) 1919"],
+                  "correct_answer": "A) 1923", "explanation": "Metinde geçiyor.", "difficulty": "medium"}
+                 for fact in facts]
+    return json.dumps({"questions": questions}, ensure_ascii=False)
+
+
+def run(args, env):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=reply, parallel=4)
+    rows = []
+    with tempfile.TemporaryDirectory() as sessions:
+        proc, port = start_service(QUIZ_APP, fake.server_address[1], dict(
+            env, QUIZ_SESSIONS_DIR=sessions, QUIZ_BANK_MAX_PER_BUCKET="0"))
+        try:
+            for _ in range(args.quizzes):
+                calls = fake.calls
+                elapsed, body = post(port, "/generate", {
+                    "text": TEXT, "num_questions": args.questions, "question_types": TYPES}, with_body=True)
+                facts = [FACT_OF[q["question"]] for q in body["questions"]]
+                rows.append((elapsed, fake.calls - calls, len(facts), len(facts) - len(set(facts)),
+                             body["duplicates_removed"]))
+        finally:
+            proc.terminate()
+            proc.wait()
+            fake.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yakın tekrar soru filtresi benchmark'ı")
+    parser.add_argument("--quizzes", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    cases = (
+        ("filtre kapalı", {"QUIZ_DUPLICATE_THRESHOLD": "1.01"}),
+        ("filtre, dışlama yok", {"QUIZ_EXCLUDE_PROMPT_LIMIT": "0"}),
+        ("filtre + hedefli üretim", {}),
+    )
+    for label, env in cases:
+        rows = run(args, env)
+        print(f"{label:>24}: ort {statistics.mean(r[0] for r in rows) * 1000:6.0f}ms, "
+              f"quiz başına {statistics.mean(r[1] for r in rows):.1f} LLM çağrısı, "
+              f"{statistics.mean(r[2] for r in rows):.1f}/{args.questions} soru, "
+              f"aynı bilgiyi tekrar soran {sum(r[3] for r in rows)}, filtrenin attığı {sum(r[4] for r in rows)}")
+
+
+if __name__ == "__main__":
+    main()
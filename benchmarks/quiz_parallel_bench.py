@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Quiz üretimi eşzamanlılık benchmark'ı
+Dört soru tipli bir quiz'i quiz-generator servisine ürettirir. Sahte Ollama her tip çağrısına istenen
+sayıda soru döner; --short tipindeki ilk çağrı bir soru eksik döner ki açığın tamamlanması da ölçülsün.
+Sıralı (QUIZ_GENERATION_CONCURRENCY=1) ve eşzamanlı üretim için toplam süre, LLM çağrısı ve soru sayısı
+raporlanır.
+
+Kullanım:
+    python benchmarks/quiz_parallel_bench.py --questions 10 --tokens 200 --token-delay 0.02
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT
+from service_concurrency_bench import post, start_service
+
+QUIZ_APP = os.path.join(ROOT, "services", "text", "quiz-generator", "app.py")
+TYPES = ["multiple_choice", "true_false", "fill_blank", "short_answer"]
+TEXT = ("Türkiye Cumhuriyeti 29 Ekim 1923 tarihinde kurulmuştur. Başkent Ankara'dır. "
+        "Cumhuriyetin ilk cumhurbaşkanı Mustafa Kemal Atatürk'tür. ") * 5
+
+
+def make_reply(short_type: str):
+    seen = set()
+    counter = itertools.count(1)  # her soru farklı bir maddeyi sorar (yakın tekrar filtresine takılmasın)
+
+    def reply(payload):
+        prompt = payload.get("prompt", "")
+        count = int(re.search(r"(\d+) adet", prompt).group(1))
+        question_type = re.search(r"seviyesinde (\w+) sorusu", prompt).group(1)
+        if question_type == short_type and question_type not in seen:
+            seen.add(question_type)
+            count -= 1
+        questions = [{"question": f"Madde {next(counter):04d} nedir?",
+                      "options": ["A) 1923", "B) 1920", "C) 1938", "D) 1919"],
+                      "correct_answer": "A) 1923", "explanation": "Cumhuriyet 1923'te ilan edildi.",
+                      "difficulty": "medium"} for _ in range(count)]
+        return json.dumps({"questions": questions}, ensure_ascii=False)
+
+    return reply
+
+
+def run(args, concurrency: int):
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, reply=make_reply(args.short),
+                             parallel=args.parallel)
+    with tempfile.TemporaryDirectory() as sessions:
+        proc, port = start_service(QUIZ_APP, fake.server_address[1],
+                                   {"QUIZ_GENERATION_CONCURRENCY": str(concurrency), "QUIZ_SESSIONS_DIR": sessions})
+        try:
+            elapsed, body = post(port, "/generate", {"text": TEXT, "num_questions": args.questions,
+                                                     "question_types": TYPES}, with_body=True)
+        finally:
+            proc.terminate()
+            proc.wait()
+            fake.shutdown()
+    per_type = {t: sum(q["question_type"] == t for q in body["questions"]) for t in TYPES}
+    return elapsed, fake.calls, body["total_questions"], per_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz üretimi eşzamanlılık benchmark'ı")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--short", default="true_false", help="ilk çağrısı eksik dönen soru tipi")
+    parser.add_argument("--parallel", type=int, default=4, help="sahte Ollama eşzamanlı istek sınırı")
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    for label, concurrency in (("sıralı", 1), ("eşzamanlı", 4)):
+        elapsed, calls, total, per_type = run(args, concurrency)
+        print(f"{label:>9}: {elapsed:6.2f}s, {calls} LLM çağrısı, {total}/{args.questions} soru {per_type}")
+    print(f"(tek çağrı ~{args.tokens * args.token_delay:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
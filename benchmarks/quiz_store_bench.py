@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Quiz oturum deposu benchmark'ı
+Eski yöntem (her cevapta {quiz_id}.json dosyasını okuyup indent=2 ile baştan yazmak) ile
+quiz-generator'ın SQLite (WAL) deposunu karşılaştırır. Çok sayıda quiz oluşturulur, ardından
+eşzamanlı kullanıcılar cevap gönderir. Her soru bir kez cevaplanır (depo tekrar cevapları yok sayar).
+Cevap başına gecikme (ortalama / p99), saniyedeki cevap ve yarım yazılmış dosyayı okuyup hata veren
+cevaplar, sonunda okunamayan (bozulmuş) quiz dosyaları ve kaybolan skor güncellemeleri (başarılı
+dönen ama skora yansımayan doğru cevaplar) raporlanır.
+JSON yöntemi birden fazla worker'ı taklit eden bir iş parçacığı havuzunda çalışır.
+
+Kullanım:
+    python benchmarks/quiz_store_bench.py --quizzes 500 --questions 20 200 --takers 64 --answers 4000
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from proxy_stream_bench import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "services", "text", "quiz-generator"))
+from quiz_store import QuizStore
+
+
+def make_questions(count: int):
+    return [{"question": f"Soru {i}: Türkiye Cumhuriyeti hangi yıl kurulmuştur?",
+             "question_type": "multiple_choice", "options": ["A) 1923", "B) 1920", "C) 1938", "D) 1919"],
+             "correct_answer": "A) 1923", "explanation": "Cumhuriyet 29 Ekim 1923'te ilan edildi.",
+             "difficulty": "medium"} for i in range(count)]
+
+
+def json_answer(directory: str, quiz_id: str, question_index: int, user_answer: str) -> bool:
+    """Eski /answer: tüm dosyayı oku, cevabı ekle, skoru artır, dosyayı baştan yaz"""
+    path = f"{directory}/{quiz_id}.json"
+    with open(path, "r", encoding="utf-8") as f:
+        quiz_data = json.load(f)
+    question = quiz_data["questions"][question_index]
+    correct = user_answer.strip() == question["correct_answer"].strip()
+    quiz_data["answers"].append({"question_index": question_index, "user_answer": user_answer,
+                                 "correct": correct, "timestamp": time.time()})
+    if correct:
+        quiz_data["score"] += 1
+    quiz_data["current_question"] = min(question_index + 1, len(quiz_data["questions"]) - 1)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(quiz_data, f, ensure_ascii=False, indent=2)
+    return correct
+
+
+def json_scores(directory: str, quiz_ids):
+    scores = {}
+    for quiz_id in quiz_ids:
+        try:
+            with open(f"{directory}/{quiz_id}.json", "r", encoding="utf-8") as f:
+                scores[quiz_id] = json.load(f)["score"]
+        except ValueError:
+            pass  # eşzamanlı yazmalar dosyayı bozmuş
+    return scores
+
+
+async def drive(args, answer, plan):
+    """plan: (quiz_id, soru, cevap) listesi; takers eşzamanlı kullanıcı sırayla tüketir"""
+    latencies, errors, queue = [], 0, list(plan)
+    expected = collections.Counter()  # quiz -> başarılı dönen doğru cevap sayısı
+
+    async def taker():
+        nonlocal errors
+        while queue:
+            quiz_id, index, user_answer = queue.pop()
+            start = time.perf_counter()
+            try:
+                await answer(quiz_id, index, user_answer)
+            except ValueError:
+                # Yazılmakta olan (yarım) dosyayı okuyan istek; cevap kaydedilemez
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            expected[quiz_id] += user_answer == "A) 1923"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(taker() for _ in range(args.takers)))
+    return latencies, errors, expected, time.perf_counter() - start
+
+
+def report(label, result, scores, quizzes):
+    latencies, errors, expected, elapsed = result
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    lost = sum(expected[quiz_id] - score for quiz_id, score in scores.items())
+    print(f"   {label:>6}: ort {statistics.mean(latencies) * 1000:7.2f}ms, p99 {p99 * 1000:7.2f}ms, "
+          f"{len(latencies) / elapsed:6.0f} cevap/s, hatalı cevap {errors}, "
+          f"bozuk dosya {quizzes - len(scores)}, kaybolan skor güncellemesi {lost}")
+
+
+async def run(args, questions: int):
+    rng = random.Random(7)
+    quiz_ids = [f"quiz-{i}" for i in range(args.quizzes)]
+    slots = rng.sample(range(args.quizzes * questions), min(args.answers, args.quizzes * questions))
+    plan = [(quiz_ids[slot // questions], slot % questions, rng.choice(["A) 1923", "B) 1920"])) for slot in slots]
+    data = make_questions(questions)
+    loop = asyncio.get_running_loop()
+    print(f"{args.quizzes} quiz x {questions} soru, {args.takers} eşzamanlı kullanıcı, {len(plan)} cevap")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for quiz_id in quiz_ids:
+            with open(f"{directory}/{quiz_id}.json", "w", encoding="utf-8") as f:
+                json.dump({"quiz_id": quiz_id, "questions": data, "total_questions": questions,
+                           "current_question": 0, "score": 0, "answers": []}, f, ensure_ascii=False, indent=2)
+        workers = ThreadPoolExecutor(max_workers=args.workers)
+        result = await drive(args, lambda *a: loop.run_in_executor(workers, json_answer, directory, *a), plan)
+        workers.shutdown()
+        report("JSON", result, json_scores(directory, quiz_ids), len(quiz_ids))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = QuizStore(os.path.join(directory, "quiz.db"), ttl=3600)
+        for quiz_id in quiz_ids:
+            store.create_quiz(quiz_id, data)
+        result = await drive(args, lambda *a: store.run(store.answer, *a), plan)
+        scores = dict(store.conn.execute("SELECT quiz_id, score FROM quizzes").fetchall())
+        store.close()
+        report("SQLite", result, scores, len(quiz_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz oturum deposu benchmark'ı")
+    parser.add_argument("--quizzes", type=int, default=500)
+    parser.add_argument("--questions", type=int, nargs="+", default=[20, 200])
+    parser.add_argument("--takers", type=int, default=64)
+    parser.add_argument("--answers", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=8, help="JSON yöntemi için worker (iş parçacığı) sayısı")
+    args = parser.parse_args()
+    for questions in args.questions:
+        asyncio.run(run(args, questions))
+
+
+if __name__ == "__main__":
+    main()
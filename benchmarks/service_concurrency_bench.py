@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Servis eşzamanlılık benchmark'ı
+Bir FastAPI servisini (varsayılan: table-analyzer) sahte Ollama'ya karşı uvicorn ile çalıştırır,
+N eşzamanlı isteği aynı anda gönderir ve bu sırada /health gecikmesini ölçer.
+Event loop bloklanmıyorsa toplam süre tek istek süresine yakın kalır (N katı değil)
+ve /health yük altında da hızlı cevap verir.
+
+Kullanım:
+    python benchmarks/service_concurrency_bench.py --concurrency 8 --rows 20000 --token-delay 0.05
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ollama import start_fake_ollama
+from proxy_stream_bench import ROOT, free_port
+
+
+def post(port: int, path: str, payload: dict, with_body: bool = False):
+    body = json.dumps(payload).encode()
+    start = time.perf_counter()
+    with urllib.request.urlopen(urllib.request.Request(
+            f"http://127.0.0.1:{port}{path}", data=body,
+            headers={"Content-Type": "application/json"}), timeout=300) as resp:
+        data = resp.read()
+    elapsed = time.perf_counter() - start
+    return (elapsed, json.loads(data)) if with_body else elapsed
+
+
+def get(port: int, path: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def start_service(app_path: str, upstream_port: int, extra_env=None):
+    port = free_port()
+    env = dict(os.environ,
+               OLLAMA_BASE_URL=f"http://127.0.0.1:{upstream_port}",
+               PORT=str(port))
+    env.update(extra_env or {})
+    proc = subprocess.Popen([sys.executable, app_path], env=env, cwd=os.path.dirname(app_path),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            get(port, "/health")
+            return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("servis başlatılamadı")
+
+
+def make_table(rows: int):
+    return [{"bolge": f"B{i % 7}", "urun": f"U{i % 13}", "adet": i % 97, "tutar": (i * 37) % 1000 + 0.5}
+            for i in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servis eşzamanlılık benchmark'ı")
+    parser.add_argument("--app", default=os.path.join(ROOT, "services", "table", "table-analyzer", "app.py"))
+    parser.add_argument("--path", default="/analyze-table")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake = start_fake_ollama(tokens=args.tokens, token_delay=args.token_delay, parallel=args.concurrency)
+    proc, port = start_service(os.path.abspath(args.app), fake.server_address[1])
+    payload = {"table_data": make_table(args.rows), "question": "En yüksek tutar hangi bölgede?"}
+    try:
+        single = post(port, args.path, payload)
+
+        health, done = [], threading.Event()
+
+        def probe():
+            while not done.is_set():
+                health.append(get(port, "/health"))
+                time.sleep(0.05)
+
+        prober = threading.Thread(target=probe, daemon=True)
+        prober.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(lambda _: post(port, args.path, payload), range(args.concurrency)))
+        total = time.perf_counter() - start
+        done.set()
+        prober.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+    health.sort()
+    print(f"Tek istek:           {single:.2f}s")
+    print(f"{args.concurrency} eşzamanlı istek:  toplam {total:.2f}s "
+          f"(seri olsaydı ~{single * args.concurrency:.2f}s), en yavaş {max(latencies):.2f}s")
+    print(f"Yük altında /health: p50 {health[len(health) // 2] * 1000:.0f}ms, "
+          f"max {health[-1] * 1000:.0f}ms ({len(health)} ölçüm)")
+    print(f"Sahte Ollama tepe eşzamanlılık: {fake.peak_active}")
+
+
+if __name__ == "__main__":
+    main()
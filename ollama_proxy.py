@@ -2,54 +2,1176 @@
 """
 Ollama Reverse Proxy
 Container'lardan host.docker.internal:11434 ile erişim sağlar
+
+asyncio (aiohttp) tabanlıdır: upstream bağlantıları sınırlı bir keep-alive
+havuzunda tutulur, uzun süren LLM çağrıları thread açmadan eşzamanlı yürür.
+Birden fazla Ollama sunucusu verilirse her istek en az aktif isteği olan
+sağlıklı sunucuya yönlendirilir (least-outstanding-requests). /api/generate ve
+/api/chat çağrıları, istenen modeli VRAM'de tutan sunucuya gönderilir (model affinity).
+İsteğe bağlı yanıt önbelleği, deterministik çağrıları (düşük sıcaklık) model çalıştırmadan
+bellek/disk katmanından yanıtlar. Aynı anda gelen birebir aynı istekler tek bir
+upstream çağrısında birleştirilir (single-flight). Admission control, GPU'ya giden
+çağrıları sınırlı bir öncelik kuyruğunda tutar; kuyruk doluysa 429 ile geri iter.
+Residency planlayıcısı trafiğe göre modellerin keep_alive süresini yönetir ve talepten önce ısıtır.
 """
-from flask import Flask, request, Response
-import requests
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-app = Flask(__name__)
+import aiohttp
+from aiohttp import web
 
 # Uzak Ollama sunucusu
 # NOT: IP adresini kendi Ollama sunucunuzun adresi ile değiştirin
-OLLAMA_SERVER = "http://172.17.28.121"
+OLLAMA_SERVER = os.getenv("OLLAMA_SERVER", "http://172.17.28.121")
+# Birden fazla sunucu için virgülle ayrılmış liste: "http://10.0.0.1:11434,http://10.0.0.2:11434"
+OLLAMA_SERVERS = [u.strip().rstrip('/') for u in os.getenv("OLLAMA_SERVERS", OLLAMA_SERVER).split(',') if u.strip()]
+PROXY_PORT = int(os.getenv("PROXY_PORT", "11434"))
+
+# Streaming modu: istek ve yanıt gövdeleri belleğe alınmadan parça parça aktarılır
+# ("stream": true çağrılarında NDJSON token akışı istemciye anında ulaşır)
+STREAMING = os.getenv("PROXY_STREAMING", "1").lower() not in ("0", "false", "no")
+
+# Bağlantı havuzu: upstream'e açık tutulacak en fazla kalıcı bağlantı sayısı
+POOL_SIZE = int(os.getenv("PROXY_POOL_SIZE", "32"))
+KEEPALIVE_TIMEOUT = float(os.getenv("PROXY_KEEPALIVE_TIMEOUT", "60"))
+
+# İstek başına zaman aşımları (saniye, 0 = sınırsız)
+CONNECT_TIMEOUT = float(os.getenv("PROXY_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("PROXY_READ_TIMEOUT", "120"))  # iki parça arası bekleme
+TOTAL_TIMEOUT = float(os.getenv("PROXY_TOTAL_TIMEOUT", "0"))
+
+# Sağlık kontrolü: /api/tags periyodik olarak yoklanır, art arda hata veren sunucu devreden çıkarılır
+HEALTH_INTERVAL = float(os.getenv("PROXY_HEALTH_INTERVAL", "10"))
+HEALTH_TIMEOUT = float(os.getenv("PROXY_HEALTH_TIMEOUT", "5"))
+UNHEALTHY_THRESHOLD = int(os.getenv("PROXY_UNHEALTHY_THRESHOLD", "2"))
+
+# Model affinity: /api/ps ile her backend'de yüklü modeller takip edilir.
+# Bir backend üzerinde BACKEND_SLOTS kadar aktif istek varsa doygun sayılır;
+# soğuk (modeli yüklü olmayan) backend'e yalnızca sıcak olanlar doygunsa gidilir.
+MODEL_AFFINITY = os.getenv("PROXY_MODEL_AFFINITY", "1").lower() not in ("0", "false", "no")
+BACKEND_SLOTS = int(os.getenv("PROXY_BACKEND_SLOTS", "4"))
+
+# Modeli gövdeden okunarak yönlendirilen uç noktalar
+MODEL_ROUTED_PATHS = ('api/generate', 'api/chat')
+
+# Yanıt önbelleği (varsayılan kapalı): model, prompt, görseller ve seçeneklerin hash'i ile anahtarlanır.
+# Sadece sıcaklığı CACHE_MAX_TEMPERATURE altında olan (veya seed verilmiş) çağrılar önbelleğe alınır.
+# İstek başına atlamak için: "X-Proxy-Cache: bypass" header'ı
+CACHE_ENABLED = os.getenv("PROXY_CACHE", "0").lower() in ("1", "true", "yes")
+CACHE_DIR = os.getenv("PROXY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".proxy_cache"))
+CACHE_MEMORY_ITEMS = int(os.getenv("PROXY_CACHE_MEMORY_ITEMS", "256"))
+CACHE_DISK_MB = float(os.getenv("PROXY_CACHE_DISK_MB", "512"))
+CACHE_TTL = float(os.getenv("PROXY_CACHE_TTL", "3600"))
+CACHE_TAGS_TTL = float(os.getenv("PROXY_CACHE_TAGS_TTL", "5"))  # /api/tags (servis health check'leri)
+CACHE_MAX_TEMPERATURE = float(os.getenv("PROXY_CACHE_MAX_TEMPERATURE", "0.3"))
+CACHE_HEADER = 'X-Proxy-Cache'
+
+# Çıktıyı etkileyen alanlar; keep_alive gibi alanlar anahtara girmez
+CACHE_KEY_FIELDS = ('model', 'prompt', 'suffix', 'system', 'template', 'context', 'messages',
+                    'images', 'tools', 'options', 'format', 'raw', 'think')
+
+# Single-flight: aynı anda upstream'de olan birebir aynı generate/chat isteklerine
+# ikinci bir çağrı açılmaz, sonraki istemciler ilk çağrının yanıtını paylaşır
+COALESCE = os.getenv("PROXY_COALESCE", "1").lower() not in ("0", "false", "no")
+COALESCE_HEADER = 'X-Proxy-Coalesced'
+
+# Admission control: generate/chat çağrıları toplam PROXY_MAX_CONCURRENT slot ile sınırlanır
+# (0 = backend sayısı x BACKEND_SLOTS), fazlası öncelik sırasıyla kuyrukta bekler.
+# Kuyruk doluysa hemen 429 + Retry-After döner. Çağıran servis X-Service-Name header'ı ile
+# (yoksa istemci IP'si ile) tanınır; X-Priority header'ı sınıfı istek başına ezer.
+ADMISSION = os.getenv("PROXY_ADMISSION", "1").lower() not in ("0", "false", "no")
+MAX_CONCURRENT = int(os.getenv("PROXY_MAX_CONCURRENT", "0")) or len(OLLAMA_SERVERS) * BACKEND_SLOTS
+QUEUE_SIZE = int(os.getenv("PROXY_QUEUE_SIZE", "64"))
+DEFAULT_SERVICE_LIMIT = int(os.getenv("PROXY_DEFAULT_SERVICE_LIMIT", "0"))  # 0 = servis başına sınır yok
+# "quiz-generator=1,info-cards=2"
+SERVICE_LIMITS = os.getenv("PROXY_SERVICE_LIMITS", "")
+SERVICE_PRIORITIES = os.getenv("PROXY_SERVICE_PRIORITIES",
+                               "vqa=interactive,detect=interactive,table-analyzer=interactive,quiz-generator=batch")
+PRIORITY_CLASSES = ('interactive', 'normal', 'batch')
+SERVICE_HEADER = 'X-Service-Name'
+PRIORITY_HEADER = 'X-Priority'
+# Kuyrukta bekleme süresi histogramı (saniye)
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 10, 30, 60)
+
+# Model residency: son trafiğe (ve önceki günlerin aynı saatine) göre her backend'de hangi
+# modellerin VRAM'de kalacağı planlanır. Plandaki modellerin isteklerine uzun keep_alive eklenir,
+# plandaki ama yüklü olmayan modeller talepten önce ısıtılır (boş generate ile yükleme).
+RESIDENCY = os.getenv("PROXY_RESIDENCY", "1").lower() not in ("0", "false", "no")
+RESIDENCY_INTERVAL = float(os.getenv("PROXY_RESIDENCY_INTERVAL", "30"))
+RESIDENCY_HALF_LIFE = float(os.getenv("PROXY_RESIDENCY_HALF_LIFE", "900"))  # trafik skorunun yarılanma süresi
+RESIDENCY_MIN_SCORE = float(os.getenv("PROXY_RESIDENCY_MIN_SCORE", "0.5"))
+RESIDENCY_LOOKAHEAD = float(os.getenv("PROXY_RESIDENCY_LOOKAHEAD", "600"))  # saatlik örüntü için ileriye bakış
+MEMORY_BUDGET_GB = float(os.getenv("PROXY_MEMORY_BUDGET_GB", "0"))  # backend başına, 0 = Ollama'ya bırak
+RESIDENT_KEEP_ALIVE = int(os.getenv("PROXY_RESIDENT_KEEP_ALIVE", "1800"))  # saniye
+# Plan dışı modeller için keep_alive (saniye); boş = eklenmez, Ollama varsayılanı geçerli
+IDLE_KEEP_ALIVE = os.getenv("PROXY_IDLE_KEEP_ALIVE", "")
+# Sunucudaki OLLAMA_KEEP_ALIVE; bu süreden uzun boşluktan sonra sıcak gelen istek "kurtarılmış" sayılır
+OLLAMA_DEFAULT_KEEP_ALIVE = float(os.getenv("PROXY_OLLAMA_DEFAULT_KEEP_ALIVE", "300"))
+# load_duration bu değerin üzerindeyse istek soğuk başlangıç sayılır
+COLD_LOAD_SECONDS = 0.5
+
+# Buffered modda kabul edilen en büyük istek gövdesi
+MAX_BODY_SIZE = 1024 * 1024 * 1024
+
+# Hop-by-hop ve gövde uzunluğuna bağlı header'lar forward edilmez
+EXCLUDED_REQUEST_HEADERS = ['host', 'content-length', 'transfer-encoding', 'connection']
+EXCLUDED_RESPONSE_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+
+class Backend:
+    """Tek bir Ollama sunucusu ve yük dengeleme durumu"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.total_requests = 0
+        self.failures = 0
+        self.healthy = True
+        self.last_check = None
+        self.last_error = None
+        self.loaded_models = set()
+        self.model_sizes: Dict[str, int] = {}  # model -> byte (/api/ps size_vram, yoksa /api/tags size)
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= BACKEND_SLOTS
+
+    def mark_success(self):
+        self.failures = 0
+        if not self.healthy:
+            print(f"✅ Backend tekrar sağlıklı: {self.url}")
+        self.healthy = True
+        self.last_error = None
+
+    def mark_failure(self, error: str, force: bool = False):
+        self.failures += 1
+        self.last_error = error
+        if self.healthy and (force or self.failures >= UNHEALTHY_THRESHOLD):
+            print(f"⚠️ Backend devreden çıkarıldı: {self.url} ({error})")
+            self.healthy = False
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "total_requests": self.total_requests,
+            "consecutive_failures": self.failures,
+            "loaded_models": sorted(self.loaded_models),
+            "last_check": self.last_check,
+            "last_error": self.last_error
+        }
+
+def normalize_model(name: str) -> str:
+    """Ollama gibi etiketsiz model adlarını ':latest' ile tamamla"""
+    return name if ':' in name else f"{name}:latest"
+
+class BackendPool:
+    """Sağlıklı backend'ler arasında least-outstanding-requests ve model affinity seçimi"""
+
+    def __init__(self, urls: List[str]):
+        self.backends = [Backend(url) for url in urls]
+        self._tiebreak = itertools.count()
+        self.stats = {
+            "warm_routes": 0,      # model zaten yüklü backend'e gidenler
+            "cold_routes": 0,      # model yüklemesi/swap gerektirenler
+            "swaps_avoided": 0     # salt LOR seçimi swap'a yol açacakken sıcak backend seçilenler
+        }
+
+    def healthy(self) -> List[Backend]:
+        return [b for b in self.backends if b.healthy]
+
+    def select(self, exclude: Optional[List[Backend]] = None) -> Optional[Backend]:
+        """En az aktif isteği olan sağlıklı backend'i seç (eşitlikte sırayla dağıt)"""
+        exclude = exclude or []
+        healthy = self.healthy()
+        # Hiç sağlıklı backend yoksa hepsini dene (fail-open), aksi halde sadece sağlıklılar
+        candidates = [b for b in (healthy or self.backends) if b not in exclude]
+        if not candidates:
+            return None
+        return self._least_loaded(candidates)
+
+    def _least_loaded(self, candidates: List[Backend], key=None) -> Backend:
+        offset = next(self._tiebreak)
+        n = len(candidates)
+        return min(
+            (candidates[(offset + i) % n] for i in range(n)),
+            key=key or (lambda b: b.in_flight)
+        )
+
+    def select_for_model(self, model: str, exclude: Optional[List[Backend]] = None) -> Optional[Backend]:
+        """Modeli yüklü tutan doygun olmayan backend'i tercih et, yoksa soğuk backend'e düş"""
+        exclude = exclude or []
+        healthy = self.healthy()
+        candidates = [b for b in (healthy or self.backends) if b not in exclude]
+        if not candidates:
+            return None
+
+        lor_choice = min(candidates, key=lambda b: b.in_flight)
+        warm = [b for b in candidates if model in b.loaded_models]
+        warm_free = [b for b in warm if not b.saturated]
+        cold_free = [b for b in candidates if model not in b.loaded_models and not b.saturated]
+
+        if warm_free:
+            chosen = self._least_loaded(warm_free)
+        elif cold_free:
+            # Boş VRAM'i olan (daha az model yüklü) backend'i tercih et, başka modeli tahliye etmeyelim
+            chosen = self._least_loaded(cold_free, key=lambda b: (len(b.loaded_models), b.in_flight))
+        elif warm:
+            # Herkes doygun: swap yerine sıcak backend'de kuyrukta beklemek daha ucuz
+            chosen = self._least_loaded(warm)
+        else:
+            chosen = self._least_loaded(candidates)
+
+        if model in chosen.loaded_models:
+            self.stats["warm_routes"] += 1
+            if model not in lor_choice.loaded_models:
+                self.stats["swaps_avoided"] += 1
+        else:
+            self.stats["cold_routes"] += 1
+            # Ollama modeli şimdi yükleyecek; bir sonraki /api/ps yoklamasını beklemeden işaretle
+            chosen.loaded_models.add(model)
+        return chosen
+
+    async def check(self, session: aiohttp.ClientSession, backend: Backend):
+        """/api/tags ile tek bir backend'in sağlığını kontrol et"""
+        backend.last_check = time.time()
+        try:
+            timeout = aiohttp.ClientTimeout(total=HEALTH_TIMEOUT)
+            async with session.get(f"{backend.url}/api/tags", timeout=timeout) as resp:
+                body = await resp.read()
+                if resp.status == 200:
+                    backend.mark_success()
+                else:
+                    backend.mark_failure(f"HTTP {resp.status}")
+                    return
+            try:
+                for m in json.loads(body).get("models", []):
+                    name = normalize_model(m.get("model") or m.get("name", ""))
+                    backend.model_sizes.setdefault(name, int(m.get("size") or 0))
+            except (ValueError, AttributeError):
+                pass
+            await self.refresh_loaded_models(session, backend, timeout)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            backend.mark_failure(str(e) or type(e).__name__)
+
+    async def refresh_loaded_models(self, session: aiohttp.ClientSession, backend: Backend,
+                                    timeout: aiohttp.ClientTimeout):
+        """/api/ps ile backend'in VRAM'de tuttuğu modelleri güncelle"""
+        async with session.get(f"{backend.url}/api/ps", timeout=timeout) as resp:
+            if resp.status != 200:
+                return
+            data = await resp.json(content_type=None)
+        backend.loaded_models = set()
+        for m in data.get("models", []):
+            name = normalize_model(m.get("model") or m.get("name", ""))
+            backend.loaded_models.add(name)
+            if m.get("size_vram") or m.get("size"):
+                backend.model_sizes[name] = int(m.get("size_vram") or m.get("size"))
+
+    async def check_all(self, session: aiohttp.ClientSession):
+        await asyncio.gather(*(self.check(session, b) for b in self.backends))
+
+    async def health_loop(self, session: aiohttp.ClientSession):
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            await self.check_all(session)
+
+    def to_dict(self):
+        return {
+            "backends": [b.to_dict() for b in self.backends],
+            "routing": dict(self.stats)
+        }
+
+def final_stats(chunks: List[bytes]) -> Optional[Dict[str, Any]]:
+    """Ollama yanıtının son (done: true) satırındaki zamanlama alanlarını çöz"""
+    tail = b''
+    for chunk in reversed(chunks):
+        tail = chunk + tail
+        if b'\n' in tail.rstrip():
+            break
+    try:
+        data = json.loads(tail.rstrip().rsplit(b'\n', 1)[-1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and data.get("done") else None
+
+class ResidencyScheduler:
+    """
+    Model başına talep skoru (üstel azalan istek sayısı + saatlik örüntü) tutar ve
+    bellek bütçesi içinde hangi modelin hangi backend'de yüklü kalacağını planlar.
+    """
+
+    def __init__(self, pool: BackendPool, budget_bytes: int):
+        self.pool = pool
+        self.budget_bytes = budget_bytes
+        self.scores: Dict[str, Tuple[float, float]] = {}   # model -> (skor, son güncelleme)
+        self.hourly: Dict[str, List[float]] = {}            # model -> saat başına istek (günlük yarılanan)
+        self.hourly_day: Dict[str, List[int]] = {}
+        self.plan: Dict[str, List[str]] = {b.url: [] for b in pool.backends}
+        self.load_seconds: Dict[str, float] = {}            # model -> gözlenen yükleme süresi (EWMA)
+        self.last_used: Dict[Tuple[str, str], float] = {}   # (backend, model) -> son istek
+        self.extended: Dict[Tuple[str, str], float] = {}    # (backend, model) -> son uzun keep_alive
+        self.warmed = set()                                 # ısıtılmış, henüz istek gelmemiş (backend, model)
+        self.stats = {
+            "cold_starts": 0,
+            "cold_starts_avoided": 0,
+            "cold_start_seconds_saved": 0.0,
+            "warmups": 0,
+            "unloads": 0
+        }
+
+    def record(self, model: str, now: Optional[float] = None):
+        """Upstream'e giden bir generate/chat isteğini talep olarak kaydet"""
+        now = now or time.time()
+        self.scores[model] = (self.score(model, now) + 1.0, now)
+        t = time.localtime(now)
+        hours = self.hourly.setdefault(model, [0.0] * 24)
+        days = self.hourly_day.setdefault(model, [0] * 24)
+        if days[t.tm_hour] != t.tm_yday:
+            # Aynı saat dilimine yeni bir gün: eski günlerin ağırlığını yarıla
+            hours[t.tm_hour] *= 0.5
+            days[t.tm_hour] = t.tm_yday
+        hours[t.tm_hour] += 1.0
+
+    def score(self, model: str, now: float) -> float:
+        value, updated = self.scores.get(model, (0.0, now))
+        return value * 0.5 ** ((now - updated) / RESIDENCY_HALF_LIFE)
+
+    def demand(self, model: str, now: float) -> float:
+        """Anlık skor ile yakın gelecekteki saatin geçmiş günlerdeki yoğunluğunun büyüğü"""
+        upcoming = time.localtime(now + RESIDENCY_LOOKAHEAD).tm_hour
+        hours = self.hourly.get(model)
+        predicted = 0.0
+        if hours and upcoming != time.localtime(now).tm_hour:
+            predicted = hours[upcoming]
+        return max(self.score(model, now), predicted)
+
+    def size_of(self, backend: Backend, model: str) -> int:
+        if model in backend.model_sizes:
+            return backend.model_sizes[model]
+        return max((b.model_sizes.get(model, 0) for b in self.pool.backends), default=0)
+
+    def replan(self, now: Optional[float] = None):
+        """Talep sırasıyla modelleri bütçeye sığan backend'lere yerleştir"""
+        now = now or time.time()
+        backends = self.pool.healthy() or self.pool.backends
+        plan: Dict[str, List[str]] = {b.url: [] for b in self.pool.backends}
+        used = {b.url: 0 for b in self.pool.backends}
+        demands = {m: self.demand(m, now) for m in set(self.scores) | set(self.hourly)}
+        for model in sorted(demands, key=demands.get, reverse=True):
+            if demands[model] < RESIDENCY_MIN_SCORE:
+                break
+            # Modeli zaten tutan backend'ler korunur, yoksa en boş backend seçilir
+            holders = [b for b in backends if model in b.loaded_models]
+            others = sorted((b for b in backends if b not in holders), key=lambda b: (used[b.url], b.in_flight))
+            for backend in holders or others:
+                size = self.size_of(backend, model)
+                if self.budget_bytes and used[backend.url] + size > self.budget_bytes:
+                    continue
+                plan[backend.url].append(model)
+                used[backend.url] += size
+                if not holders:
+                    break
+        self.plan = plan
+
+    def resident(self, backend: Backend, model: str) -> bool:
+        return model in self.plan.get(backend.url, ())
+
+    def keep_alive_for(self, backend: Backend, model: str) -> Optional[int]:
+        """Bu backend'e giden isteğe eklenecek keep_alive (saniye)"""
+        if self.resident(backend, model):
+            self.extended[(backend.url, model)] = time.time()
+            return RESIDENT_KEEP_ALIVE
+        return int(IDLE_KEEP_ALIVE) if IDLE_KEEP_ALIVE else None
+
+    def observe(self, backend: Backend, model: str, stats: Optional[Dict[str, Any]], warmup: bool = False):
+        """Yanıttaki load_duration ile soğuk başlangıcı ve kurtarılan süreyi hesapla"""
+        if not stats:
+            return
+        now = time.time()
+        key = (backend.url, model)
+        load = (stats.get("load_duration") or 0) / 1e9
+        if load >= COLD_LOAD_SECONDS:
+            previous = self.load_seconds.get(model)
+            self.load_seconds[model] = load if previous is None else 0.7 * previous + 0.3 * load
+            if not warmup:
+                self.stats["cold_starts"] += 1
+        elif not warmup:
+            # Sıcak istek: model ya ısıtma ile ya da Ollama varsayılanından uzun keep_alive ile yüklü kaldı
+            idle = now - self.last_used.get(key, now)
+            if key in self.warmed or idle > OLLAMA_DEFAULT_KEEP_ALIVE:
+                self.stats["cold_starts_avoided"] += 1
+                self.stats["cold_start_seconds_saved"] += self.load_seconds.get(model, 0.0)
+        if warmup:
+            if load >= COLD_LOAD_SECONDS:
+                self.warmed.add(key)
+        else:
+            self.warmed.discard(key)
+            self.last_used[key] = now
+
+    async def warm(self, session: aiohttp.ClientSession, backend: Backend, model: str, keep_alive: int):
+        """Boş generate ile modeli yükle / keep_alive süresini uzat (keep_alive=0 ile boşalt)"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT or None,
+                                            sock_read=READ_TIMEOUT or None)
+            async with session.post(f"{backend.url}/api/generate", timeout=timeout,
+                                    json={"model": model, "keep_alive": keep_alive}) as resp:
+                body = await resp.read()
+            if resp.status != 200:
+                return
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Model ısıtma başarısız ({backend.url}, {model}): {e}")
+            return
+        if keep_alive:
+            self.extended[(backend.url, model)] = time.time()
+            self.observe(backend, model, final_stats([body]), warmup=True)
+        else:
+            self.extended.pop((backend.url, model), None)
+
+    async def tick(self, session: aiohttp.ClientSession):
+        """Planı güncelle; eksik modelleri ısıt, süresi dolmak üzere olanları uzat, bütçeyi aşanları boşalt"""
+        self.replan()
+        now = time.time()
+        jobs = []
+        for backend in self.pool.healthy():
+            planned = self.plan.get(backend.url, [])
+            for model in planned:
+                key = (backend.url, model)
+                if model not in backend.loaded_models:
+                    if backend.saturated:
+                        continue
+                    self.stats["warmups"] += 1
+                    backend.loaded_models.add(model)
+                    jobs.append(self.warm(session, backend, model, RESIDENT_KEEP_ALIVE))
+                elif now - self.extended.get(key, 0) > RESIDENT_KEEP_ALIVE - 2 * RESIDENCY_INTERVAL:
+                    jobs.append(self.warm(session, backend, model, RESIDENT_KEEP_ALIVE))
+            if self.budget_bytes:
+                loaded = sum(self.size_of(backend, m) for m in backend.loaded_models)
+                for model in sorted(backend.loaded_models - set(planned),
+                                    key=lambda m: self.last_used.get((backend.url, m), 0)):
+                    if loaded <= self.budget_bytes:
+                        break
+                    if now - self.last_used.get((backend.url, model), 0) < RESIDENCY_INTERVAL:
+                        continue
+                    loaded -= self.size_of(backend, model)
+                    backend.loaded_models.discard(model)
+                    self.stats["unloads"] += 1
+                    jobs.append(self.warm(session, backend, model, 0))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+    async def loop(self, session: aiohttp.ClientSession):
+        while True:
+            await asyncio.sleep(RESIDENCY_INTERVAL)
+            try:
+                await self.tick(session)
+            except Exception as e:
+                print(f"⚠️ Residency planlama hatası: {e}")
+
+    def to_dict(self):
+        now = time.time()
+        return {
+            "enabled": True,
+            "memory_budget_gb": round(self.budget_bytes / 1024 ** 3, 2),
+            "plan": {url: list(models) for url, models in self.plan.items()},
+            "demand": {m: round(self.demand(m, now), 3) for m in sorted(self.scores)},
+            "load_seconds": {m: round(v, 2) for m, v in self.load_seconds.items()},
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats.items()}
+        }
+
+class CacheEntry(NamedTuple):
+    status: int
+    content_type: str
+    body: bytes
+    expires: float
+
+class ResponseCache:
+    """İçerik adresli iki katmanlı yanıt önbelleği: bellek (LRU) + boyut sınırlı disk"""
+
+    def __init__(self, directory: str, memory_items: int, disk_bytes: int):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.disk_index: "OrderedDict[str, int]" = OrderedDict()  # anahtar -> boyut, LRU sırasıyla
+        self.disk_used = 0
+        self.stats = {"hit_memory": 0, "hit_disk": 0, "miss": 0, "bypass": 0, "store": 0, "eviction": 0}
+
+    def load_index(self):
+        """Disk katmanındaki mevcut girdileri erişim zamanı sırasıyla indeksle"""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin'):
+                st = os.stat(os.path.join(self.directory, name))
+                files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(files):
+            self.disk_index[key] = size
+            self.disk_used += size
+
+    @staticmethod
+    def key_for(path: str, payload: Optional[Dict[str, Any]]) -> str:
+        material = {f: payload[f] for f in CACHE_KEY_FIELDS if f in payload} if payload else {}
+        if material.get('model'):
+            material['model'] = normalize_model(material['model'])
+        material['path'] = path
+        if payload is not None:
+            material['stream'] = payload.get('stream', True)
+        # Büyük base64 görseller JSON'a tekrar serileştirilmeden doğrudan hash'e beslenir
+        images = material.pop('images', None) or []
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode())
+        for image in images:
+            hasher.update(b'\0')
+            hasher.update(str(image).encode())
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta['status'], meta['content_type'], body, meta['expires'])
+
+    def _write_disk(self, key: str, entry: CacheEntry):
+        meta = {"status": entry.status, "content_type": entry.content_type, "expires": entry.expires}
+        tmp = self._path(key) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(meta).encode() + b'\n')
+            f.write(entry.body)
+        os.replace(tmp, self._path(key))
+
+    def _remove_disk(self, key: str):
+        size = self.disk_index.pop(key, None)
+        if size is not None:
+            self.disk_used -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is not None:
+            if entry.expires > now:
+                self.memory.move_to_end(key)
+                self.stats["hit_memory"] += 1
+                return entry
+            del self.memory[key]
 
-@app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE'])
-@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
-def proxy(path):
+        if key in self.disk_index:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None and entry.expires > now:
+                self.disk_index.move_to_end(key)
+                self._remember(key, entry)
+                self.stats["hit_disk"] += 1
+                return entry
+            self._remove_disk(key)
+
+        self.stats["miss"] += 1
+        return None
+
+    def _remember(self, key: str, entry: CacheEntry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    async def put(self, key: str, entry: CacheEntry):
+        self._remember(key, entry)
+        self.stats["store"] += 1
+
+        size = len(entry.body)
+        if not self.disk_bytes or size > self.disk_bytes // 4:
+            return
+        try:
+            await asyncio.to_thread(self._write_disk, key, entry)
+        except OSError as e:
+            print(f"⚠️ Önbellek diske yazılamadı: {e}")
+            return
+        # Aynı anahtar yeniden yazıldıysa eski boyutu düş (dosya zaten değiştirildi)
+        self.disk_used -= self.disk_index.pop(key, 0)
+        self.disk_index[key] = size
+        self.disk_used += size
+        # Boyut sınırı aşıldıysa en uzun süredir kullanılmayan girdileri sil
+        while self.disk_used > self.disk_bytes and self.disk_index:
+            oldest = next(iter(self.disk_index))
+            self._remove_disk(oldest)
+            self.stats["eviction"] += 1
+
+    def to_dict(self):
+        return {
+            "enabled": True,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk_index),
+            "disk_bytes": self.disk_used,
+            **self.stats
+        }
+
+def parse_service_map(spec: str) -> Dict[str, str]:
+    """"a=1,b=2" biçimindeki ortam değişkenini sözlüğe çevir"""
+    result = {}
+    for item in spec.split(','):
+        name, sep, value = item.partition('=')
+        if sep and name.strip():
+            result[name.strip()] = value.strip()
+    return result
+
+class QueueFull(Exception):
+    """Admission kuyruğu dolu; istemci retry_after saniye sonra tekrar denemeli"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"admission queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class Waiter(NamedTuple):
+    priority: int
+    seq: int
+    caller: str
+    future: asyncio.Future
+    enqueued: float
+
+class AdmissionController:
+    """
+    Global ve çağıran başına eşzamanlılık sınırı. Slot alamayan istekler
+    (öncelik, geliş sırası) ile sıralı sınırlı bir kuyrukta bekler; bir slot
+    boşaldığında kotası müsait olan ilk bekleyen çalıştırılır.
+    """
+
+    def __init__(self, max_concurrent: int, queue_size: int, limits: Dict[str, int],
+                 default_limit: int, priorities: Dict[str, int]):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.limits = limits
+        self.default_limit = default_limit
+        self.priorities = priorities
+        self.active = 0
+        self.active_by_caller: Dict[str, int] = {}
+        self.queue: List[Waiter] = []
+        self._seq = itertools.count()
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0}
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.wait_sum = 0.0
+        self.wait_count = 0
+        # Ortalama slot tutma süresi (EWMA); Retry-After tahmini için
+        self.service_time = 5.0
+
+    def identify(self, request: web.Request) -> Tuple[str, int]:
+        """İsteğin çağıranını ve öncelik sınıfını belirle"""
+        caller = request.headers.get(SERVICE_HEADER) or request.remote or 'unknown'
+        requested = request.headers.get(PRIORITY_HEADER, '').lower()
+        if requested in PRIORITY_CLASSES:
+            return caller, PRIORITY_CLASSES.index(requested)
+        return caller, self.priorities.get(caller, PRIORITY_CLASSES.index('normal'))
+
+    def limit_for(self, caller: str) -> int:
+        return self.limits.get(caller, self.default_limit)
+
+    def _eligible(self, caller: str) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        limit = self.limit_for(caller)
+        return not limit or self.active_by_caller.get(caller, 0) < limit
+
+    def _grant(self, caller: str, waited: float):
+        self.active += 1
+        self.active_by_caller[caller] = self.active_by_caller.get(caller, 0) + 1
+        self.stats["admitted"] += 1
+        self.wait_sum += waited
+        self.wait_count += 1
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if waited <= bound:
+                self.wait_buckets[i] += 1
+
+    def _dispatch(self):
+        """Boşalan slotları öncelik sırasıyla, kotası müsait bekleyenlere dağıt"""
+        for waiter in list(self.queue):
+            if self.active >= self.max_concurrent:
+                break
+            if waiter.future.done() or not self._eligible(waiter.caller):
+                continue
+            self.queue.remove(waiter)
+            self._grant(waiter.caller, time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    def retry_after(self) -> int:
+        """Kuyruğun erimesi için tahmini süre (saniye, 1-60 arası)"""
+        estimate = self.service_time * (len(self.queue) + 1) / max(self.max_concurrent, 1)
+        return int(min(max(math.ceil(estimate), 1), 60))
+
+    async def acquire(self, caller: str, priority: int):
+        """Slot al; gerekirse kuyrukta bekle, kuyruk doluysa QueueFull fırlat"""
+        if self._eligible(caller):
+            self._grant(caller, 0.0)
+            return
+        if len(self.queue) >= self.queue_size:
+            self.stats["rejected"] += 1
+            if not self.queue or self.queue[-1].priority <= priority:
+                raise QueueFull(self.retry_after())
+            # Daha düşük öncelikli son bekleyen yerini yeni isteğe bırakır
+            evicted = self.queue.pop()
+            evicted.future.set_exception(QueueFull(self.retry_after()))
+
+        waiter = Waiter(priority, next(self._seq), caller,
+                        asyncio.get_running_loop().create_future(), time.monotonic())
+        # (priority, seq) tekil olduğundan tuple karşılaştırması future'a hiç ulaşmaz
+        bisect.insort(self.queue, waiter)
+        self.stats["queued"] += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # İstemci beklerken ayrıldı: slot verildiyse geri bırak, verilmediyse kuyruktan çık
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(caller)
+            elif waiter in self.queue:
+                self.queue.remove(waiter)
+            raise
+
+    def release(self, caller: str, held: Optional[float] = None):
+        self.active -= 1
+        self.active_by_caller[caller] -= 1
+        if not self.active_by_caller[caller]:
+            del self.active_by_caller[caller]
+        if held is not None:
+            self.service_time = 0.8 * self.service_time + 0.2 * held
+        self._dispatch()
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_CLASSES}
+        for waiter in self.queue:
+            depth[PRIORITY_CLASSES[waiter.priority]] += 1
+        return depth
+
+    def to_dict(self):
+        return {
+            "enabled": True,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "active_by_caller": dict(self.active_by_caller),
+            "queue_depth": self.queue_depth(),
+            "avg_wait_seconds": round(self.wait_sum / self.wait_count, 3) if self.wait_count else 0.0,
+            "service_time_seconds": round(self.service_time, 2),
+            **self.stats
+        }
+
+def create_admission() -> Optional[AdmissionController]:
+    if not ADMISSION:
+        return None
+    limits = {name: int(value) for name, value in parse_service_map(SERVICE_LIMITS).items()}
+    priorities = {name: PRIORITY_CLASSES.index(value.lower())
+                  for name, value in parse_service_map(SERVICE_PRIORITIES).items()
+                  if value.lower() in PRIORITY_CLASSES}
+    return AdmissionController(MAX_CONCURRENT, QUEUE_SIZE, limits, DEFAULT_SERVICE_LIMIT, priorities)
+
+def cache_ttl_for(request: web.Request, path: str, payload: Optional[Dict[str, Any]]) -> float:
+    """İstek önbelleğe uygunsa TTL'ini, değilse 0 döndür"""
+    if request.method == 'GET' and path == 'api/tags':
+        return CACHE_TAGS_TTL
+    if payload is None or request.method != 'POST':
+        return 0
+    options = payload.get('options') or {}
+    temperature = options.get('temperature')
+    # Ollama varsayılan sıcaklığı (0.8) deterministik değildir; seed verilmişse çıktı tekrarlanabilir
+    if options.get('seed') is not None or (temperature is not None and temperature <= CACHE_MAX_TEMPERATURE):
+        return CACHE_TTL
+    return 0
+
+def build_timeout() -> aiohttp.ClientTimeout:
+    """Konfigürasyondan upstream zaman aşımını oluştur"""
+    return aiohttp.ClientTimeout(
+        total=TOTAL_TIMEOUT or None,
+        sock_connect=CONNECT_TIMEOUT or None,
+        sock_read=READ_TIMEOUT or None
+    )
+
+async def create_session(app: web.Application):
+    """Uygulama ömrü boyunca paylaşılan bağlantı havuzunu aç"""
+    connector = aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    app['client_session'] = aiohttp.ClientSession(
+        connector=connector,
+        timeout=build_timeout(),
+        auto_decompress=True
+    )
+
+    # İlk sağlık kontrolünü bekle, sonra periyodik kontrolü arka planda başlat
+    pool: BackendPool = app['backends']
+    await pool.check_all(app['client_session'])
+    app['health_task'] = asyncio.create_task(pool.health_loop(app['client_session']))
+    app['residency_task'] = None
+    if app['residency']:
+        app['residency_task'] = asyncio.create_task(app['residency'].loop(app['client_session']))
+
+async def close_session(app: web.Application):
+    app['health_task'].cancel()
+    if app['residency_task']:
+        app['residency_task'].cancel()
+    await app['client_session'].close()
+
+async def read_payload(request: web.Request) -> Tuple[Optional[bytes], Optional[Dict[str, Any]]]:
+    """generate/chat gövdesini oku ve JSON olarak çöz (yönlendirme ve önbellek için gerekli)"""
+    if request.method != 'POST' or not request.match_info['path'].startswith(MODEL_ROUTED_PATHS):
+        return None, None
+    body = await request.read()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body, None
+    return body, payload if isinstance(payload, dict) else None
+
+def with_keep_alive(body: bytes, keep_alive: int) -> bytes:
+    """JSON nesnesinin sonuna keep_alive alanını ekle (büyük gövdeyi yeniden serileştirmeden)"""
+    return body.rstrip()[:-1] + b',"keep_alive":%d}' % keep_alive
+
+async def open_upstream(app: web.Application, method: str, path: str, headers: dict, data,
+                        model: Optional[str] = None, payload: Optional[Dict[str, Any]] = None):
+    """Seçilen backend'e isteği aç; bağlanılamazsa (gövde henüz gönderilmeden) sıradakini dene"""
+    pool: BackendPool = app['backends']
+    session: aiohttp.ClientSession = app['client_session']
+    residency: Optional[ResidencyScheduler] = app['residency']
+    # İstemci keep_alive vermediyse karar residency planına bırakılır
+    manage_keep_alive = bool(residency and model and payload and 'keep_alive' not in payload
+                             and isinstance(data, bytes))
+    if residency and model:
+        residency.record(model)
+    tried = []
+    while True:
+        if model and MODEL_AFFINITY:
+            backend = pool.select_for_model(model, exclude=tried)
+        else:
+            backend = pool.select(exclude=tried)
+        if backend is None:
+            raise aiohttp.ClientConnectionError("no reachable Ollama backend")
+        tried.append(backend)
+        backend.in_flight += 1
+        backend.total_requests += 1
+        body = data
+        if manage_keep_alive:
+            keep_alive = residency.keep_alive_for(backend, model)
+            if keep_alive is not None:
+                body = with_keep_alive(data, keep_alive)
+        try:
+            upstream = await session.request(
+                method,
+                f"{backend.url}/{path}",
+                headers=headers,
+                data=body,
+                allow_redirects=False
+            )
+            return backend, upstream
+        except aiohttp.ClientConnectorError as e:
+            backend.in_flight -= 1
+            backend.mark_failure(str(e), force=True)
+        except BaseException:
+            backend.in_flight -= 1
+            raise
+
+class Flight:
+    """
+    Tek bir upstream çağrısı. Yanıt parçaları biriktirilir ve bağlı tüm istemcilere
+    (aynı isteği gönderen takipçiler dahil) baştan itibaren dağıtılır.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[str, str]] = []
+        self.content_type = 'application/json'
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.error: Optional[str] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._cond = asyncio.Condition()
+
+    async def _notify(self):
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def wait_for(self, predicate):
+        async with self._cond:
+            await self._cond.wait_for(predicate)
+
+    async def run(self, app: web.Application, method: str, path: str, headers: dict, data,
+                  model: Optional[str], cache_key: Optional[str], cache_ttl: float,
+                  admit: Optional[Tuple[str, int]] = None, payload: Optional[Dict[str, Any]] = None):
+        """Upstream yanıtını oku ve parçaları yayınla (istemcilerden bağımsız task olarak çalışır)"""
+        backend = upstream = None
+        admission: Optional[AdmissionController] = app['admission']
+        admitted_at = None
+        try:
+            if admit and admission:
+                await admission.acquire(*admit)
+                admitted_at = time.monotonic()
+            backend, upstream = await open_upstream(app, method, path, headers, data, model, payload)
+            self.status = upstream.status
+            self.content_type = upstream.content_type
+            self.headers = [(k, v) for k, v in upstream.headers.items()
+                            if k.lower() not in EXCLUDED_RESPONSE_HEADERS]
+            await self._notify()
+            # iter_any: upstream'den gelen her parça beklemeden iletilir
+            async for chunk in upstream.content.iter_any():
+                self.chunks.append(chunk)
+                await self._notify()
+            self.done = True
+        except QueueFull as e:
+            # Backpressure: upstream'e hiç gitmeden hızlıca reddet
+            self.status = 429
+            self.headers = [('Content-Type', 'application/json'), ('Retry-After', str(e.retry_after))]
+            self.chunks.append(json.dumps({"error": str(e)}).encode())
+            self.done = True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.error = str(e) or type(e).__name__
+            self.done = True
+            if upstream is not None:
+                upstream.close()
+        finally:
+            if upstream is not None:
+                upstream.release()
+            if backend is not None:
+                backend.in_flight -= 1
+            if admitted_at is not None:
+                admission.release(admit[0], time.monotonic() - admitted_at)
+            flights: Dict[str, Flight] = app['flights']
+            if self.key and flights.get(self.key) is self:
+                del flights[self.key]
+            self.done = True
+            await self._notify()
+
+        residency: Optional[ResidencyScheduler] = app['residency']
+        if residency and model and backend is not None and self.error is None and self.status == 200:
+            residency.observe(backend, model, final_stats(self.chunks))
+
+        # Yalnızca eksiksiz ve başarılı yanıtlar önbelleğe alınır
+        cache: Optional[ResponseCache] = app['cache']
+        if cache_key and cache and self.error is None and self.status == 200:
+            await cache.put(cache_key, CacheEntry(self.status, self.content_type, b''.join(self.chunks),
+                                                  time.time() + cache_ttl))
+
+    async def respond(self, request: web.Request, extra_headers: List[Tuple[str, str]]) -> web.StreamResponse:
+        """Uçuştaki yanıtı bu istemciye aktar"""
+        await self.wait_for(lambda: self.status is not None or self.done)
+        if self.status is None:
+            return web.json_response({"error": self.error or "upstream closed"}, status=502)
+
+        headers = self.headers + extra_headers
+        if not STREAMING:
+            await self.wait_for(lambda: self.done)
+            if self.error:
+                return web.json_response({"error": self.error}, status=502)
+            return web.Response(body=b''.join(self.chunks), status=self.status, headers=headers)
+
+        response = web.StreamResponse(status=self.status, headers=headers)
+        await response.prepare(request)
+        sent = 0
+        while True:
+            await self.wait_for(lambda: len(self.chunks) > sent or self.done)
+            while sent < len(self.chunks):
+                await response.write(self.chunks[sent])
+                sent += 1
+            if self.done and sent == len(self.chunks):
+                break
+        if self.error:
+            # Header'lar gönderildi, yalnızca bağlantıyı kapatabiliriz
+            raise ConnectionResetError(self.error)
+        await response.write_eof()
+        return response
+
+async def proxy_status(request: web.Request) -> web.Response:
+    """Backend'lerin sağlık ve yük durumu"""
+    status = request.app['backends'].to_dict()
+    cache: Optional[ResponseCache] = request.app['cache']
+    status["cache"] = cache.to_dict() if cache else {"enabled": False}
+    status["coalescing"] = {
+        "enabled": COALESCE,
+        "in_flight": len(request.app['flights']),
+        **request.app['coalesce_stats']
+    }
+    admission: Optional[AdmissionController] = request.app['admission']
+    status["admission"] = admission.to_dict() if admission else {"enabled": False}
+    residency: Optional[ResidencyScheduler] = request.app['residency']
+    status["residency"] = residency.to_dict() if residency else {"enabled": False}
+    return web.json_response(status)
+
+async def proxy_metrics(request: web.Request) -> web.Response:
+    """Prometheus metin formatında sayaçlar"""
+    pool: BackendPool = request.app['backends']
+    lines = []
+    for b in pool.backends:
+        label = f'backend="{b.url}"'
+        lines.append(f"ollama_proxy_backend_healthy{{{label}}} {int(b.healthy)}")
+        lines.append(f"ollama_proxy_backend_in_flight{{{label}}} {b.in_flight}")
+        lines.append(f"ollama_proxy_backend_requests_total{{{label}}} {b.total_requests}")
+        lines.append(f"ollama_proxy_backend_loaded_models{{{label}}} {len(b.loaded_models)}")
+    for name, value in pool.stats.items():
+        lines.append(f"ollama_proxy_routing_{name}_total {value}")
+
+    lines.append(f"ollama_proxy_coalesce_leaders_total {request.app['coalesce_stats']['leaders']}")
+    lines.append(f"ollama_proxy_coalesce_followers_total {request.app['coalesce_stats']['followers']}")
+
+    admission: Optional[AdmissionController] = request.app['admission']
+    if admission:
+        lines.append(f"ollama_proxy_admission_limit {admission.max_concurrent}")
+        lines.append(f"ollama_proxy_admission_active {admission.active}")
+        for caller, count in sorted(admission.active_by_caller.items()):
+            lines.append(f'ollama_proxy_admission_caller_active{{caller="{caller}"}} {count}')
+        for name, depth in admission.queue_depth().items():
+            lines.append(f'ollama_proxy_queue_depth{{priority="{name}"}} {depth}')
+        for name in ("admitted", "queued", "rejected"):
+            lines.append(f'ollama_proxy_admission_requests_total{{result="{name}"}} {admission.stats[name]}')
+        for bound, count in zip(WAIT_BUCKETS, admission.wait_buckets):
+            lines.append(f'ollama_proxy_queue_wait_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f'ollama_proxy_queue_wait_seconds_bucket{{le="+Inf"}} {admission.wait_count}')
+        lines.append(f"ollama_proxy_queue_wait_seconds_sum {admission.wait_sum:.6f}")
+        lines.append(f"ollama_proxy_queue_wait_seconds_count {admission.wait_count}")
+
+    residency: Optional[ResidencyScheduler] = request.app['residency']
+    if residency:
+        for name in ("cold_starts", "cold_starts_avoided", "warmups", "unloads"):
+            lines.append(f"ollama_proxy_residency_{name}_total {residency.stats[name]}")
+        lines.append(f"ollama_proxy_residency_cold_start_seconds_saved_total "
+                     f"{residency.stats['cold_start_seconds_saved']:.3f}")
+        for url, models in residency.plan.items():
+            for model in models:
+                lines.append(f'ollama_proxy_residency_planned{{backend="{url}",model="{model}"}} 1')
+
+    cache: Optional[ResponseCache] = request.app['cache']
+    if cache:
+        for name in ("hit_memory", "hit_disk", "miss", "bypass"):
+            lines.append(f'ollama_proxy_cache_requests_total{{result="{name}"}} {cache.stats[name]}')
+        lines.append(f"ollama_proxy_cache_stores_total {cache.stats['store']}")
+        lines.append(f"ollama_proxy_cache_evictions_total {cache.stats['eviction']}")
+        lines.append(f'ollama_proxy_cache_entries{{tier="memory"}} {len(cache.memory)}')
+        lines.append(f'ollama_proxy_cache_entries{{tier="disk"}} {len(cache.disk_index)}')
+        lines.append(f"ollama_proxy_cache_disk_bytes {cache.disk_used}")
+    return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
+async def proxy(request: web.Request) -> web.StreamResponse:
     """Tüm istekleri Ollama sunucusuna forward et"""
-    url = f"{OLLAMA_SERVER}/{path}"
-    
+    path = request.match_info['path']
+
     # Query parametrelerini ekle
     if request.query_string:
-        url += f"?{request.query_string.decode()}"
-    
-    try:
-        # İsteği forward et
-        resp = requests.request(
-            method=request.method,
-            url=url,
-            headers={k: v for k, v in request.headers if k.lower() != 'host'},
-            data=request.get_data(),
-            cookies=request.cookies,
-            allow_redirects=False,
-            timeout=120
+        path += f"?{request.query_string}"
+
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in EXCLUDED_REQUEST_HEADERS}
+
+    # Gövde: generate/chat'te model için okunur, diğerlerinde streaming modda
+    # StreamReader doğrudan upstream'e aktarılır
+    data, payload = await read_payload(request)
+    model = normalize_model(payload["model"]) if payload and payload.get("model") else None
+    if data is None and request.body_exists:
+        data = request.content if STREAMING else await request.read()
+
+    extra_headers = []
+    request_key = None
+    if payload is not None and (COALESCE or request.app['cache']):
+        request_key = ResponseCache.key_for(path, payload)
+
+    # Önbellek: uygun isteklerde önce bellek/disk katmanına bak
+    cache: Optional[ResponseCache] = request.app['cache']
+    cache_key, cache_ttl = None, 0
+    if cache:
+        cache_ttl = cache_ttl_for(request, path, payload)
+        if cache_ttl and request.headers.get(CACHE_HEADER, '').lower() == 'bypass':
+            cache.stats["bypass"] += 1
+            cache_ttl = 0
+            extra_headers.append((CACHE_HEADER, 'BYPASS'))
+        if cache_ttl:
+            cache_key = request_key or ResponseCache.key_for(path, None)
+            entry = await cache.get(cache_key)
+            if entry is not None:
+                return web.Response(body=entry.body, status=entry.status,
+                                    headers={'Content-Type': entry.content_type, CACHE_HEADER: 'HIT'})
+            extra_headers.append((CACHE_HEADER, 'MISS'))
+
+    # Single-flight: aynı istek zaten upstream'deyse ona bağlan, yeni çağrı açma
+    flights: Dict[str, Flight] = request.app['flights']
+    coalesce_key = request_key if COALESCE and request_key else None
+    stats = request.app['coalesce_stats']
+    flight = flights.get(coalesce_key) if coalesce_key else None
+    if flight is not None:
+        stats["followers"] += 1
+        extra_headers.append((COALESCE_HEADER, 'follower'))
+    else:
+        flight = Flight(coalesce_key)
+        if coalesce_key:
+            flights[coalesce_key] = flight
+            stats["leaders"] += 1
+        # Yalnızca GPU'ya giden generate/chat çağrıları admission kuyruğundan geçer;
+        # önbellekten ve birleştirilmiş uçuşlardan yanıtlananlar slot tüketmez
+        admission: Optional[AdmissionController] = request.app['admission']
+        admit = admission.identify(request) if admission and payload is not None else None
+        flight.task = asyncio.create_task(
+            flight.run(request.app, request.method, path, headers, data, model, cache_key, cache_ttl, admit, payload)
         )
-        
-        # Response'u döndür
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        headers = [(k, v) for k, v in resp.raw.headers.items() if k.lower() not in excluded_headers]
-        
-        return Response(resp.content, resp.status_code, headers)
-    except Exception as e:
-        return {"error": str(e)}, 502
+
+    flight.subscribers += 1
+    try:
+        return await flight.respond(request, extra_headers)
+    finally:
+        flight.subscribers -= 1
+        # Bekleyen kimse kalmadıysa üretimi boşuna sürdürme
+        if flight.subscribers == 0 and not flight.done:
+            flight.task.cancel()
+            if coalesce_key and flights.get(coalesce_key) is flight:
+                del flights[coalesce_key]
+
+def create_app() -> web.Application:
+    app = web.Application(client_max_size=MAX_BODY_SIZE)
+    app['backends'] = BackendPool(OLLAMA_SERVERS)
+    app['cache'] = None
+    app['flights'] = {}
+    app['coalesce_stats'] = {"leaders": 0, "followers": 0}
+    app['admission'] = create_admission()
+    app['residency'] = None
+    if RESIDENCY:
+        app['residency'] = ResidencyScheduler(app['backends'], int(MEMORY_BUDGET_GB * 1024 ** 3))
+    if CACHE_ENABLED:
+        app['cache'] = ResponseCache(CACHE_DIR, CACHE_MEMORY_ITEMS, int(CACHE_DISK_MB * 1024 * 1024))
+        app['cache'].load_index()
+    app.on_startup.append(create_session)
+    app.on_cleanup.append(close_session)
+    app.router.add_get('/proxy/status', proxy_status)
+    app.router.add_get('/proxy/metrics', proxy_metrics)
+    app.router.add_route('*', '/{path:.*}', proxy)
+    return app
 
 if __name__ == '__main__':
     print("=" * 60)
     print("Ollama Reverse Proxy Starting...")
     print("=" * 60)
-    print(f"Forwarding: localhost:11434 -> {OLLAMA_SERVER}")
+    print(f"Forwarding: localhost:{PROXY_PORT} -> {', '.join(OLLAMA_SERVERS)}")
+    print(f"Streaming mode: {'on' if STREAMING else 'off'}")
+    print(f"Connection pool: {POOL_SIZE} (keep-alive {KEEPALIVE_TIMEOUT:.0f}s)")
+    print(f"Timeouts: connect={CONNECT_TIMEOUT:.0f}s read={READ_TIMEOUT:.0f}s total={TOTAL_TIMEOUT:.0f}s")
+    print(f"Health check: /api/tags + /api/ps every {HEALTH_INTERVAL:.0f}s, status: /proxy/status")
+    if MODEL_AFFINITY:
+        print(f"Model affinity: {BACKEND_SLOTS} slots per backend before cold fallback")
+    print(f"Request coalescing: {'on' if COALESCE else 'off'}")
+    if RESIDENCY:
+        budget = f"{MEMORY_BUDGET_GB:.0f} GB budget" if MEMORY_BUDGET_GB else "no memory budget"
+        print(f"Model residency: keep_alive {RESIDENT_KEEP_ALIVE}s for planned models, {budget}, replan every {RESIDENCY_INTERVAL:.0f}s")
+    if ADMISSION:
+        print(f"Admission control: {MAX_CONCURRENT} concurrent, queue {QUEUE_SIZE}")
+    if CACHE_ENABLED:
+        print(f"Response cache: {CACHE_MEMORY_ITEMS} items in memory, {CACHE_DISK_MB:.0f} MB on disk ({CACHE_DIR}), TTL {CACHE_TTL:.0f}s")
     print("Container'lar http://host.docker.internal:11434 ile erişebilir")
     print("=" * 60)
-    app.run(host='0.0.0.0', port=11434, debug=False)
-
-
-
+    # handler_cancellation: istemci koptuğunda handler iptal edilir, kuyruktaki yeri boşalır
+    web.run_app(create_app(), host='0.0.0.0', port=PROXY_PORT, print=None, handler_cancellation=True)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Ortak CPU iş havuzu
+Servislerin CPU yoğun ya da bloklayan senkron adımları (DataFrame işleme, grafik çizimi, dosya
+okuma/yazma) event loop'u bloklamasın diye bir iş parçacığı havuzunda çalıştırılır.
+
+Docker imajlarında bu dosya app.py ile aynı dizine kopyalanır.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "4"))
+
+
+class CpuPool:
+    def __init__(self, name: str, workers: int = CPU_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, func, *args, **kwargs):
+        """Senkron işi worker havuzunda çalıştır; bu sırada event loop diğer istekleri işler"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Ortak Ollama İstemcisi
+Tüm servislerin Ollama (veya ollama_proxy) çağrıları için tek istemci.
+
+- Servis ömrü boyunca açık kalan, bağlantı havuzlu HTTP oturumu (httpx)
+- Tek yerden yönetilen zaman aşımları (OLLAMA_CONNECT_TIMEOUT / OLLAMA_READ_TIMEOUT)
+- Geçici hatalarda (bağlantı hatası, 429/502/503/504) jitter'lı üstel geri çekilme ile yeniden deneme;
+  proxy'nin döndürdüğü Retry-After dikkate alınır
+- Streaming (NDJSON) desteği
+- Her çağrı için yapılandırılmış zamanlama bilgisi (prompt_eval_duration, eval_count, ...)
+
+FastAPI servisleri AsyncOllamaClient, Flask servisleri OllamaClient kullanır.
+Docker imajlarında bu dosya app.py ile aynı dizine kopyalanır.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "10"))
+# İki parça arası en uzun bekleme; stream=False çağrılarda tüm üretim süresini kapsamalı
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "180"))
+MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("OLLAMA_RETRY_MAX_DELAY", "30"))
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+
+# Yeniden denemeye değer HTTP durumları (429: proxy admission kuyruğu dolu)
+RETRY_STATUSES = (429, 502, 503, 504)
+# Ollama'nın son yanıt satırında döndürdüğü zamanlama alanları (süreler nanosaniye)
+TIMING_FIELDS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                 "eval_count", "eval_duration")
+
+
+class OllamaError(Exception):
+    """Ollama çağrısı yeniden denemelere rağmen başarısız oldu"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class OllamaResult:
+    """Tek bir generate/chat çağrısının sonucu ve zamanlama bilgisi"""
+    text: str
+    model: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, Any] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        """Yanıt metnindeki ilk JSON nesnesini/dizisini çöz"""
+        return extract_json(self.text)
+
+
+def extract_json(text: str) -> Any:
+    """LLM çıktısındaki JSON'u (kod bloğu veya açıklama içinde olsa bile) çöz; bulunamazsa ValueError"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    for opener, closer in (("{", "}"), ("[", "]")):
+        start, end = text.find(opener), text.rfind(closer)
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                continue
+    raise ValueError("LLM yanıtında JSON bulunamadı")
+
+
+def decode_response(raw: Any) -> Dict[str, Any]:
+    """Ollama yanıt gövdesini ya da NDJSON satırını çöz; bozuk/kesik gövde ya da nesne olmayan JSON OllamaError"""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise OllamaError(f"Ollama yanıtı çözülemedi: {e}")
+    if not isinstance(data, dict):
+        raise OllamaError(f"Ollama yanıtı JSON nesnesi değil: {type(data).__name__}")
+    return data
+
+
+def build_timings(data: Dict[str, Any], wall_time: float, attempts: int) -> Dict[str, Any]:
+    timings = {name: data[name] for name in TIMING_FIELDS if name in data}
+    timings["wall_time"] = round(wall_time, 3)
+    timings["attempts"] = attempts
+    if data.get("eval_count") and data.get("eval_duration"):
+        timings["tokens_per_second"] = round(data["eval_count"] / (data["eval_duration"] / 1e9), 2)
+    return timings
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full jitter üstel geri çekilme; sunucu Retry-After verdiyse ondan kısa beklenmez"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BACKOFF * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, min(float(retry_after), RETRY_MAX_DELAY))
+        except ValueError:
+            pass
+    return delay
+
+
+class _OllamaBase:
+    """Sync ve async istemcilerin ortak yapılandırması ve istatistikleri"""
+
+    def __init__(self, service_name: str, base_url: Optional[str] = None, model: Optional[str] = None,
+                 read_timeout: Optional[float] = None, max_retries: Optional[int] = None):
+        self.service_name = service_name
+        self.base_url = (base_url or OLLAMA_BASE_URL).rstrip("/")
+        self.model = model or MODEL_NAME
+        self.timeout = httpx.Timeout(connect=CONNECT_TIMEOUT, read=read_timeout or READ_TIMEOUT,
+                                     write=None, pool=None)
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+        self.headers = {"X-Service-Name": service_name}
+        self.recent = deque(maxlen=100)
+        self.totals = {"calls": 0, "errors": 0, "retries": 0}
+
+    def _payload(self, prompt: Optional[str], messages: Optional[List[Dict[str, Any]]], model: Optional[str],
+                 stream: bool, options: Optional[Dict[str, Any]], **extra) -> Dict[str, Any]:
+        payload = {"model": model or self.model, "stream": stream}
+        if messages is not None:
+            payload["messages"] = messages
+        else:
+            payload["prompt"] = prompt
+        if options:
+            payload["options"] = options
+        payload.update({k: v for k, v in extra.items() if v is not None})
+        return payload
+
+    def _result(self, path: str, data: Dict[str, Any], text: str, started: float, attempts: int) -> OllamaResult:
+        timings = build_timings(data, time.perf_counter() - started, attempts)
+        self.totals["calls"] += 1
+        self.recent.append({"endpoint": path, "model": data.get("model"), **timings})
+        return OllamaResult(text=text, model=data.get("model", ""), data=data, timings=timings)
+
+    def stats(self) -> Dict[str, Any]:
+        """Son çağrıların özet zamanlama istatistikleri (health uç noktaları için)"""
+        recent = list(self.recent)
+        summary = dict(self.totals)
+        if recent:
+            summary["recent_calls"] = len(recent)
+            summary["avg_wall_time"] = round(sum(r["wall_time"] for r in recent) / len(recent), 3)
+            for name in ("prompt_eval_duration", "eval_duration", "load_duration"):
+                values = [r[name] for r in recent if name in r]
+                if values:
+                    summary[f"avg_{name}_ms"] = round(sum(values) / len(values) / 1e6, 1)
+            for name in ("prompt_eval_count", "eval_count"):
+                values = [r[name] for r in recent if name in r]
+                if values:
+                    summary[f"avg_{name}"] = round(sum(values) / len(values), 1)
+        return summary
+
+    @staticmethod
+    def _text(path: str, data: Dict[str, Any]) -> str:
+        if path == "api/chat":
+            return (data.get("message") or {}).get("content", "")
+        return data.get("response", "")
+
+    @staticmethod
+    def _error_for(response: httpx.Response) -> OllamaError:
+        return OllamaError(f"Ollama HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+
+
+class AsyncOllamaClient(_OllamaBase):
+    """asyncio uygulamaları (FastAPI) için havuzlu Ollama istemcisi"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Oturum ilk kullanımda, çalışan event loop içinde açılır
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout,
+                                             limits=self.limits, headers=self.headers)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> OllamaResult:
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = await self.client.post(path, json=payload)
+                if response.status_code == 200:
+                    data = decode_response(response.content)
+                    return self._result(path, data, self._text(path, data), started, attempt + 1)
+                error = self._error_for(response)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except OllamaError as e:
+                # Gövde çözülemedi: üretim yapılmış olabilir, tekrar denemek yükü artırır
+                error = e
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+                error = OllamaError(f"Ollama bağlantı hatası: {e}")
+            except httpx.HTTPError as e:
+                # Okuma zaman aşımı vb.: model hâlâ çalışıyor olabilir, tekrar denemek yükü artırır
+                error = OllamaError(f"Ollama çağrı hatası: {type(e).__name__}: {e}")
+                break
+            if attempt < self.max_retries:
+                self.totals["retries"] += 1
+                await asyncio.sleep(retry_delay(attempt, retry_after))
+        self.totals["errors"] += 1
+        raise error
+
+    async def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                       **extra) -> OllamaResult:
+        """/api/generate (stream=False); extra: images, format, system, keep_alive ..."""
+        return await self._post("api/generate", self._payload(prompt, None, model, False, options, **extra))
+
+    async def chat(self, messages: List[Dict[str, Any]], model: Optional[str] = None,
+                   options: Optional[Dict[str, Any]] = None, **extra) -> OllamaResult:
+        return await self._post("api/chat", self._payload(None, messages, model, False, options, **extra))
+
+    async def stream(self, prompt: Optional[str] = None, messages: Optional[List[Dict[str, Any]]] = None,
+                     model: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                     **extra) -> AsyncIterator[Dict[str, Any]]:
+        """
+        NDJSON parçalarını geldikçe döndür. Son parça ("done": true) "timings" alanını içerir.
+        Yeniden deneme yalnızca ilk parça gelmeden önce yapılır.
+        """
+        path = "api/chat" if messages is not None else "api/generate"
+        payload = self._payload(prompt, messages, model, True, options, **extra)
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self.client.stream("POST", path, json=payload) as response:
+                    if response.status_code == 200:
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = decode_response(line)
+                            if chunk.get("done"):
+                                chunk["timings"] = self._result(path, chunk, "", started, attempt + 1).timings
+                            yield chunk
+                        return
+                    await response.aread()
+                    error = self._error_for(response)
+                    if response.status_code not in RETRY_STATUSES:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+            except OllamaError as e:
+                error = e
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                error = OllamaError(f"Ollama bağlantı hatası: {e}")
+            except httpx.HTTPError as e:
+                error = OllamaError(f"Ollama çağrı hatası: {type(e).__name__}: {e}")
+                break
+            if attempt < self.max_retries:
+                self.totals["retries"] += 1
+                await asyncio.sleep(retry_delay(attempt, retry_after))
+        self.totals["errors"] += 1
+        raise error
+
+    async def tags(self) -> List[Dict[str, Any]]:
+        """Sunucudaki modeller; health kontrolleri için kısa zaman aşımıyla, yeniden denemesiz"""
+        try:
+            response = await self.client.get("api/tags", timeout=5)
+            response.raise_for_status()
+            return decode_response(response.content).get("models", [])
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Ollama erişilemiyor: {e}")
+
+    async def is_healthy(self) -> bool:
+        try:
+            await self.tags()
+            return True
+        except OllamaError:
+            return False
+
+
+class OllamaClient(_OllamaBase):
+    """Senkron uygulamalar (Flask) için havuzlu Ollama istemcisi; thread-safe"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = httpx.Client(base_url=self.base_url, timeout=self.timeout,
+                                   limits=self.limits, headers=self.headers)
+
+    def close(self):
+        self.client.close()
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> OllamaResult:
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.client.post(path, json=payload)
+                if response.status_code == 200:
+                    data = decode_response(response.content)
+                    return self._result(path, data, self._text(path, data), started, attempt + 1)
+                error = self._error_for(response)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except OllamaError as e:
+                # Gövde çözülemedi: üretim yapılmış olabilir, tekrar denemek yükü artırır
+                error = e
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError) as e:
+                error = OllamaError(f"Ollama bağlantı hatası: {e}")
+            except httpx.HTTPError as e:
+                error = OllamaError(f"Ollama çağrı hatası: {type(e).__name__}: {e}")
+                break
+            if attempt < self.max_retries:
+                self.totals["retries"] += 1
+                time.sleep(retry_delay(attempt, retry_after))
+        self.totals["errors"] += 1
+        raise error
+
+    def generate(self, prompt: str, model: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                 **extra) -> OllamaResult:
+        return self._post("api/generate", self._payload(prompt, None, model, False, options, **extra))
+
+    def chat(self, messages: List[Dict[str, Any]], model: Optional[str] = None,
+             options: Optional[Dict[str, Any]] = None, **extra) -> OllamaResult:
+        return self._post("api/chat", self._payload(None, messages, model, False, options, **extra))
+
+    def stream(self, prompt: Optional[str] = None, messages: Optional[List[Dict[str, Any]]] = None,
+               model: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+               **extra) -> Iterator[Dict[str, Any]]:
+        path = "api/chat" if messages is not None else "api/generate"
+        payload = self._payload(prompt, messages, model, True, options, **extra)
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with self.client.stream("POST", path, json=payload) as response:
+                    if response.status_code == 200:
+                        for line in response.iter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = decode_response(line)
+                            if chunk.get("done"):
+                                chunk["timings"] = self._result(path, chunk, "", started, attempt + 1).timings
+                            yield chunk
+                        return
+                    response.read()
+                    error = self._error_for(response)
+                    if response.status_code not in RETRY_STATUSES:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+            except OllamaError as e:
+                error = e
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                error = OllamaError(f"Ollama bağlantı hatası: {e}")
+            except httpx.HTTPError as e:
+                error = OllamaError(f"Ollama çağrı hatası: {type(e).__name__}: {e}")
+                break
+            if attempt < self.max_retries:
+                self.totals["retries"] += 1
+                time.sleep(retry_delay(attempt, retry_after))
+        self.totals["errors"] += 1
+        raise error
+
+    def tags(self) -> List[Dict[str, Any]]:
+        try:
+            response = self.client.get("api/tags", timeout=5)
+            response.raise_for_status()
+            return decode_response(response.content).get("models", [])
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Ollama erişilemiyor: {e}")
+
+    def is_healthy(self) -> bool:
+        try:
+            self.tags()
+            return True
+        except OllamaError:
+            return False
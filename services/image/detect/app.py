@@ -1,13 +1,17 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import os
+import sys
 import uuid
 from PIL import Image
 import io
 import json
-import requests
 import base64
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from ollama_client import OllamaClient, OllamaError
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
@@ -15,6 +19,7 @@ CORS(app)  # Enable CORS for all routes
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.5"))
+ollama = OllamaClient("detect", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -22,7 +27,8 @@ def health():
         "status": "healthy",
         "model": MODEL_NAME,
         "ollama_url": OLLAMA_BASE_URL,
-        "confidence_threshold": CONFIDENCE_THRESHOLD
+        "confidence_threshold": CONFIDENCE_THRESHOLD,
+        "llm_stats": ollama.stats()
     })
 
 @app.route('/detect', methods=['POST'])
@@ -76,21 +82,13 @@ JSON formatı:
 Sadece JSON döndür:"""
         
         # Ollama API'ye istek gönder
-        payload = {
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "images": [img_str],
-            "stream": False
-        }
-        
-        response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload, timeout=120)
-        
-        if response.status_code != 200:
-            return jsonify({"error": f"Ollama API error: {response.text}"}), 500
+        try:
+            result = ollama.generate(prompt, images=[img_str])
+        except OllamaError as e:
+            return jsonify({"error": f"Ollama API error: {e}"}), 500
         
         # LLaVA yanıtını parse et
-        result = response.json()
-        llava_response = result.get('response', '')
+        llava_response = result.text
         
         # JSON yanıtını parse etmeye çalış
         try:
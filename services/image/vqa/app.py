@@ -1,7 +1,7 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import requests
 import os
+import sys
 import base64
 from PIL import Image
 import io
@@ -9,12 +9,17 @@ import uuid
 import json
 from datetime import datetime
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from ollama_client import OllamaClient, OllamaError
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
 # Ollama konfigürasyonu
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "qwen2.5vl:32b")
+ollama = OllamaClient("vqa", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
 
 # Session yönetimi için dosya tabanlı yaklaşım
 SESSIONS_DIR = "/app/sessions"
@@ -64,19 +69,20 @@ def update_session(session_id, question, answer):
 def health():
     try:
         # Ollama servisinin çalışıp çalışmadığını kontrol et
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags")
-        if response.status_code == 200:
-            return jsonify({
-                "status": "healthy", 
-                "ollama": "connected",
-                "model": MODEL_NAME
-            })
-        else:
-            return jsonify({
-                "status": "unhealthy", 
-                "ollama": "disconnected",
-                "model": MODEL_NAME
-            }), 503
+        ollama.tags()
+        return jsonify({
+            "status": "healthy", 
+            "ollama": "connected",
+            "model": MODEL_NAME,
+            "llm_stats": ollama.stats()
+        })
+    except OllamaError as e:
+        return jsonify({
+            "status": "unhealthy", 
+            "ollama": "disconnected",
+            "model": MODEL_NAME,
+            "error": str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             "status": "unhealthy", 
@@ -163,32 +169,25 @@ Lütfen:
 - Görselde gördüğün detayları kullan"""
         
         # Ollama API'ye istek gönder
-        payload = {
+        try:
+            result = ollama.generate(optimized_prompt, images=[image_base64])
+        except OllamaError as e:
+            return jsonify({"error": f"Ollama API error: {e.status_code or e}"}), 500
+
+        answer = result.text or 'No answer received'
+
+        # Session'a soru-cevap ekle
+        update_session(session_id, question, answer)
+
+        return jsonify({
+            "session_id": session_id,
+            "question": question,
+            "answer": answer,
             "model": MODEL_NAME,
-            "prompt": optimized_prompt,
-            "images": [image_base64],
-            "stream": False
-        }
-        
-        response = requests.post(f"{OLLAMA_BASE_URL}/api/generate", json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            answer = result.get('response', 'No answer received')
-            
-            # Session'a soru-cevap ekle
-            update_session(session_id, question, answer)
-            
-            return jsonify({
-                "session_id": session_id,
-                "question": question,
-                "answer": answer,
-                "model": MODEL_NAME,
-                "has_image": True
-            })
-        else:
-            return jsonify({"error": f"Ollama API error: {response.status_code}"}), 500
-            
+            "has_image": True
+        })
+
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
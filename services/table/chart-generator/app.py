@@ -5,8 +5,10 @@ Tablolardan otomatik grafik üretimi (JSON, CSV, Excel desteği)
 """
 
 import os
+import sys
 import json
 import uuid
+import asyncio
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -18,11 +20,15 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import requests
 import time
 import io
 import base64
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from cpu_pool import CpuPool
+from ollama_client import AsyncOllamaClient
+
 # FastAPI uygulaması
 app = FastAPI(
     title="Chart Generator Service",
@@ -48,6 +54,17 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
 PORT = int(os.getenv("PORT", 8009))
 
+ollama = AsyncOllamaClient("chart-generator", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
+
+# CPU yoğun adımlar (DataFrame, plotly/kaleido) event loop'u bloklamasın diye bu havuzda çalışır
+cpu_pool = CpuPool("chart-cpu")
+run_cpu = cpu_pool.run
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+    cpu_pool.shutdown()
+
 # Pydantic modelleri
 class ChartRequest(BaseModel):
     table_data: List[Dict[str, Any]]
@@ -76,76 +93,74 @@ class ChartResponse(BaseModel):
     charts: List[Chart]
     metadata: Dict[str, Any]
 
-# Ollama çağrı fonksiyonu
-def call_ollama_for_analysis(table_data: List[Dict], max_charts: int) -> List[ChartConfig]:
-    """Ollama LLM'den tablo analizi ve grafik önerileri al"""
-    try:
-        # DataFrame'e çevir ve analiz et
-        df = pd.DataFrame(table_data)
-        
-        # String'leri mümkünse sayısal'a çevir
-        for col in df.columns:
-            try:
-                # Eğer kolon sayısal'a çevrilebiliyorsa, çevir
-                df[col] = pd.to_numeric(df[col])
-            except (ValueError, TypeError):
-                # Çevrilemezse, olduğu gibi bırak
-                pass
-        
-        # Null değerleri olan satırları filtrele
-        initial_rows = len(df)
-        df_clean = df.dropna()
-        dropped_rows = initial_rows - len(df_clean)
-        
-        if dropped_rows > 0:
-            print(f"ℹ️ {dropped_rows} satır null değer içerdiği için filtrelendi")
-        
-        # Temizlenmiş veriyi kullan
-        df = df_clean
-        
-        # Kolon tiplerini belirle
-        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-        
-        # Kategorik kolonlarda unique değer sayısı az olanları bul (gerçek kategorik)
-        true_categorical = []
-        for col in categorical_cols:
-            unique_count = df[col].nunique()
-            if unique_count <= 20:  # 20'den az unique değer varsa kategorik
-                true_categorical.append(f"{col} ({unique_count} kategori)")
-        
-        # Sayısal kolonlar için istatistikler ve korelasyon
-        numeric_stats = []
-        for col in numeric_cols:
-            min_val = df[col].min()
-            max_val = df[col].max()
-            mean_val = df[col].mean()
-            numeric_stats.append(f"{col} (ort:{mean_val:.1f}, min:{min_val:.1f}, max:{max_val:.1f})")
-        
-        # Korelasyon analizi (en yüksek korelasyonları bul)
-        correlations = []
-        if len(numeric_cols) >= 2:
-            corr_matrix = df[numeric_cols].corr()
-            for i in range(len(numeric_cols)):
-                for j in range(i+1, len(numeric_cols)):
-                    corr_val = abs(corr_matrix.iloc[i, j])
-                    if corr_val > 0.3:  # %30'dan fazla korelasyon
-                        correlations.append(f"{numeric_cols[i]}-{numeric_cols[j]} (r={corr_val:.2f})")
-        
-        # Dinamik grafik sayısı belirleme
-        suggested_chart_count = min(
-            max_charts,
-            len(true_categorical) + len(numeric_cols) + len(correlations),
-            10  # Maksimum 10 grafik
-        )
-        suggested_chart_count = max(suggested_chart_count, 3)  # En az 3 grafik
-        
-        # Sadece ilk 3 satırı örnek olarak göster
-        sample_str = json.dumps(table_data[:3], ensure_ascii=False, indent=2)
-        
-        corr_info = f"\n- Yüksek Korelasyonlar: {', '.join(correlations)}" if correlations else ""
-        
-        prompt = f"""
+def build_analysis_prompt(table_data: List[Dict], max_charts: int) -> str:
+    """Tablo istatistiklerini çıkar ve grafik önerisi prompt'unu oluştur (CPU yoğun)"""
+    # DataFrame'e çevir ve analiz et
+    df = pd.DataFrame(table_data)
+    
+    # String'leri mümkünse sayısal'a çevir
+    for col in df.columns:
+        try:
+            # Eğer kolon sayısal'a çevrilebiliyorsa, çevir
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            # Çevrilemezse, olduğu gibi bırak
+            pass
+    
+    # Null değerleri olan satırları filtrele
+    initial_rows = len(df)
+    df_clean = df.dropna()
+    dropped_rows = initial_rows - len(df_clean)
+    
+    if dropped_rows > 0:
+        print(f"ℹ️ {dropped_rows} satır null değer içerdiği için filtrelendi")
+    
+    # Temizlenmiş veriyi kullan
+    df = df_clean
+    
+    # Kolon tiplerini belirle
+    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+    
+    # Kategorik kolonlarda unique değer sayısı az olanları bul (gerçek kategorik)
+    true_categorical = []
+    for col in categorical_cols:
+        unique_count = df[col].nunique()
+        if unique_count <= 20:  # 20'den az unique değer varsa kategorik
+            true_categorical.append(f"{col} ({unique_count} kategori)")
+    
+    # Sayısal kolonlar için istatistikler ve korelasyon
+    numeric_stats = []
+    for col in numeric_cols:
+        min_val = df[col].min()
+        max_val = df[col].max()
+        mean_val = df[col].mean()
+        numeric_stats.append(f"{col} (ort:{mean_val:.1f}, min:{min_val:.1f}, max:{max_val:.1f})")
+    
+    # Korelasyon analizi (en yüksek korelasyonları bul)
+    correlations = []
+    if len(numeric_cols) >= 2:
+        corr_matrix = df[numeric_cols].corr()
+        for i in range(len(numeric_cols)):
+            for j in range(i+1, len(numeric_cols)):
+                corr_val = abs(corr_matrix.iloc[i, j])
+                if corr_val > 0.3:  # %30'dan fazla korelasyon
+                    correlations.append(f"{numeric_cols[i]}-{numeric_cols[j]} (r={corr_val:.2f})")
+    
+    # Dinamik grafik sayısı belirleme
+    suggested_chart_count = min(
+        max_charts,
+        len(true_categorical) + len(numeric_cols) + len(correlations),
+        10  # Maksimum 10 grafik
+    )
+    suggested_chart_count = max(suggested_chart_count, 3)  # En az 3 grafik
+    
+    # Sadece ilk 3 satırı örnek olarak göster
+    sample_str = json.dumps(table_data[:3], ensure_ascii=False, indent=2)
+    
+    corr_info = f"\n- Yüksek Korelasyonlar: {', '.join(correlations)}" if correlations else ""
+    
+    prompt = f"""
         Bu tabloyu analiz et ve {suggested_chart_count} farklı grafik türü öner.
         
         VERİ BİLGİLERİ ({len(df)} satır, null değerler temizlendi):
@@ -179,25 +194,12 @@ def call_ollama_for_analysis(table_data: List[Dict], max_charts: int) -> List[Ch
             ]
         }}
         """
-        
-        url = f"{OLLAMA_BASE_URL}/api/generate"
-        payload = {
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.3,
-                "top_p": 0.9,
-                "max_tokens": 1500
-            }
-        }
-        
-        response = requests.post(url, json=payload, timeout=120)
-        response.raise_for_status()
-        
-        result = response.json()
-        llm_response = result.get("response", "")
-        
+    
+    return prompt
+
+def parse_chart_configs(llm_response: str, table_data: List[Dict], max_charts: int) -> List[ChartConfig]:
+    """LLM'in grafik önerilerini tablo sütunlarına göre doğrula (CPU yoğun)"""
+    try:
         # JSON parse et
         if "```json" in llm_response:
             json_start = llm_response.find("```json") + 7
@@ -315,6 +317,25 @@ def call_ollama_for_analysis(table_data: List[Dict], max_charts: int) -> List[Ch
         # Fallback: Basit grafikler oluştur
         return create_fallback_charts(table_data, max_charts)
 
+# Ollama çağrı fonksiyonu
+async def call_ollama_for_analysis(table_data: List[Dict], max_charts: int) -> List[ChartConfig]:
+    """Ollama LLM'den tablo analizi ve grafik önerileri al"""
+    try:
+        prompt = await run_cpu(build_analysis_prompt, table_data, max_charts)
+
+        result = await ollama.generate(prompt, options={
+            "temperature": 0.3,
+            "top_p": 0.9,
+            "max_tokens": 1500
+        })
+        llm_response = result.text
+    except Exception as e:
+        print(f"❌ LLM analiz hatası: {e}")
+        # Fallback: Basit grafikler oluştur
+        return await run_cpu(create_fallback_charts, table_data, max_charts)
+
+    return await run_cpu(parse_chart_configs, llm_response, table_data, max_charts)
+
 def create_fallback_charts(table_data: List[Dict], max_charts: int) -> List[ChartConfig]:
     """LLM başarısız olursa basit grafikler oluştur"""
     if not table_data:
@@ -486,17 +507,14 @@ def parse_excel_file(file_content: bytes, sheet_name: str = None) -> List[Dict]:
 @app.get("/health")
 async def health_check():
     """Sağlık kontrolü"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        ollama_status = "healthy" if response.status_code == 200 else "unhealthy"
-    except:
-        ollama_status = "unhealthy"
-    
+    ollama_status = "healthy" if await ollama.is_healthy() else "unhealthy"
+
     return {
         "status": "healthy",
         "service": "chart-generator",
         "ollama_status": ollama_status,
-        "model": MODEL_NAME
+        "model": MODEL_NAME,
+        "llm_stats": ollama.stats()
     }
 
 @app.post("/generate-charts", response_model=ChartResponse)
@@ -511,14 +529,15 @@ async def generate_charts(request: ChartRequest):
         start_time = time.time()
         
         # LLM ile analiz
-        chart_configs = call_ollama_for_analysis(request.table_data, request.max_charts)
+        chart_configs = await call_ollama_for_analysis(request.table_data, request.max_charts)
         
-        # Grafikleri oluştur
-        charts = []
-        for i, config in enumerate(chart_configs, 1):
-            chart = generate_chart(config, request.table_data, request.output_format)
+        # Grafikleri worker havuzunda paralel oluştur
+        charts = await asyncio.gather(*(
+            run_cpu(generate_chart, config, request.table_data, request.output_format)
+            for config in chart_configs
+        ))
+        for i, chart in enumerate(charts, 1):
             chart.id = i
-            charts.append(chart)
         
         processing_time = time.time() - start_time
         
@@ -552,7 +571,7 @@ async def upload_csv_and_generate(
             raise HTTPException(status_code=400, detail="Sadece CSV dosyaları desteklenir")
         
         file_content = await file.read()
-        table_data = parse_csv_file(file_content)
+        table_data = await run_cpu(parse_csv_file, file_content)
         
         # JSON endpoint'ini çağır
         request = ChartRequest(
@@ -582,7 +601,7 @@ async def upload_excel_and_generate(
             raise HTTPException(status_code=400, detail="Sadece Excel dosyaları desteklenir")
         
         file_content = await file.read()
-        table_data = parse_excel_file(file_content, sheet_name)
+        table_data = await run_cpu(parse_excel_file, file_content, sheet_name)
         
         # JSON endpoint'ini çağır
         request = ChartRequest(
@@ -5,18 +5,24 @@ Tablolardan metin yorumlaması üretimi (JSON, CSV, Excel desteği)
 """
 
 import os
+import sys
 import json
+import asyncio
 import pandas as pd
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import requests
 import time
 import io
 import uuid
 from datetime import datetime
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from cpu_pool import CpuPool
+from ollama_client import AsyncOllamaClient
+
 # FastAPI uygulaması
 app = FastAPI(
     title="Table Analyzer Service",
@@ -38,6 +44,18 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
 PORT = int(os.getenv("PORT", 8010))
 
+ollama = AsyncOllamaClient("table-analyzer", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
+
+# CPU yoğun adımlar (DataFrame, büyük tabloların JSON'a çevrilmesi, session dosyaları)
+# event loop'u bloklamasın diye bu havuzda çalışır
+cpu_pool = CpuPool("table-cpu")
+run_cpu = cpu_pool.run
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+    cpu_pool.shutdown()
+
 # Session yönetimi için dosya tabanlı yaklaşım
 SESSIONS_DIR = "/app/sessions"
 
@@ -159,11 +177,11 @@ TURKISH_VOCABULARY = {
     }
 }
 
-def call_ollama_for_analysis(table_data: List[Dict], language: str, question: str = "", conversation_history: List[Dict] = None):
+async def call_ollama_for_analysis(table_data: List[Dict], language: str, question: str = "", conversation_history: List[Dict] = None):
     """Ollama LLM'den tablo analizi al - Sohbet geçmişi ile"""
     try:
         # Tabloyu string'e çevir
-        table_str = json.dumps(table_data, ensure_ascii=False, indent=2)
+        table_str = await run_cpu(json.dumps, table_data, ensure_ascii=False, indent=2)
         
         # Eğer question varsa, basit soru-cevap yap (sohbet geçmişi ile)
         if question:
@@ -203,23 +221,12 @@ def call_ollama_for_analysis(table_data: List[Dict], language: str, question: st
             # Detaylı analiz prompt'u oluştur
             prompt = create_detailed_analysis_prompt(table_str, language)
         
-        url = f"{OLLAMA_BASE_URL}/api/generate"
-        payload = {
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "max_tokens": 2000
-            }
-        }
-        
-        response = requests.post(url, json=payload, timeout=120)
-        response.raise_for_status()
-        
-        result = response.json()
-        llm_response = result.get("response", "")
+        result = await ollama.generate(prompt, options={
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "max_tokens": 2000
+        })
+        llm_response = result.text
         
         # Eğer question varsa, direkt cevabı dön
         if question:
@@ -254,7 +261,7 @@ def call_ollama_for_analysis(table_data: List[Dict], language: str, question: st
     except Exception as e:
         print(f"❌ LLM analiz hatası: {e}")
         # Fallback analiz
-        return create_fallback_analysis(table_data)
+        return await run_cpu(create_fallback_analysis, table_data)
 
 def create_detailed_analysis_prompt(table_str: str, language: str) -> str:
     """Detaylı analiz için prompt oluştur - Ufuk açıcı bilgilerle"""
@@ -335,17 +342,14 @@ def parse_excel_file(file_content: bytes, sheet_name: str = None) -> List[Dict]:
 @app.get("/health")
 async def health_check():
     """Sağlık kontrolü"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        ollama_status = "healthy" if response.status_code == 200 else "unhealthy"
-    except:
-        ollama_status = "unhealthy"
-    
+    ollama_status = "healthy" if await ollama.is_healthy() else "unhealthy"
+
     return {
         "status": "healthy",
         "service": "table-analyzer",
         "ollama_status": ollama_status,
-        "model": MODEL_NAME
+        "model": MODEL_NAME,
+        "llm_stats": ollama.stats()
     }
 
 @app.post("/analyze-table", response_model=TableAnalysisResponse)
@@ -360,7 +364,7 @@ async def analyze_table(request: TableAnalysisRequest):
         start_time = time.time()
         
         # LLM ile analiz (question varsa soru-cevap, yoksa detaylı analiz)
-        result = call_ollama_for_analysis(
+        result = await call_ollama_for_analysis(
             request.table_data, 
             request.language,
             request.question
@@ -414,7 +418,7 @@ async def upload_csv_and_analyze(
             raise HTTPException(status_code=400, detail="Sadece CSV dosyaları desteklenir")
         
         file_content = await file.read()
-        table_data = parse_csv_file(file_content)
+        table_data = await run_cpu(parse_csv_file, file_content)
         
         # JSON endpoint'ini çağır
         request = TableAnalysisRequest(
@@ -444,7 +448,7 @@ async def upload_excel_and_analyze(
             raise HTTPException(status_code=400, detail="Sadece Excel dosyaları desteklenir")
         
         file_content = await file.read()
-        table_data = parse_excel_file(file_content, sheet_name)
+        table_data = await run_cpu(parse_excel_file, file_content, sheet_name)
         
         # JSON endpoint'ini çağır
         request = TableAnalysisRequest(
@@ -477,7 +481,7 @@ async def create_session_endpoint(request: SessionCreateRequest):
         }
         
         # Session oluştur
-        session_id = create_session(request.table_data, table_info)
+        session_id = await run_cpu(create_session, request.table_data, table_info)
         
         return SessionResponse(
             success=True,
@@ -501,7 +505,7 @@ async def ask_question(request: SessionQuestionRequest):
             raise HTTPException(status_code=400, detail="Session ID ve soru gerekli")
         
         # Session'ı al
-        session_data = get_session(request.session_id)
+        session_data = await run_cpu(get_session, request.session_id)
         if not session_data:
             raise HTTPException(status_code=404, detail="Session bulunamadı")
         
@@ -514,11 +518,11 @@ async def ask_question(request: SessionQuestionRequest):
         
         # LLM'den cevap al (sohbet geçmişi ile)
         start_time = time.time()
-        answer = call_ollama_for_analysis(table_data, "turkish", request.question, conversation_history)
+        answer = await call_ollama_for_analysis(table_data, "turkish", request.question, conversation_history)
         processing_time = time.time() - start_time
         
         # Session'a soru-cevap ekle
-        update_session(request.session_id, request.question, answer)
+        await run_cpu(update_session, request.session_id, request.question, answer)
         
         return SessionQuestionResponse(
             success=True,
@@ -544,7 +548,7 @@ async def session_status(session_id: str):
         if not session_id:
             raise HTTPException(status_code=400, detail="Session ID gerekli")
         
-        session_data = get_session(session_id)
+        session_data = await run_cpu(get_session, session_id)
         if not session_data:
             return {
                 "success": False,
@@ -573,7 +577,7 @@ async def session_history(session_id: str):
         if not session_id:
             raise HTTPException(status_code=400, detail="Session ID gerekli")
         
-        session_data = get_session(session_id)
+        session_data = await run_cpu(get_session, session_id)
         if not session_data:
             raise HTTPException(status_code=404, detail="Session bulunamadı")
         
@@ -5,15 +5,26 @@ Kullanıcının girdiği metinleri analiz ederek bilgi kartları üretir.
 """
 
 import os
+import re
+import sys
+import math
+import asyncio
 import json
 import uuid
-from typing import List, Dict, Any
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import requests
 import time
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from ollama_client import AsyncOllamaClient, OllamaError
+
 # FastAPI uygulaması
 app = FastAPI(
     title="Bilgi Kartları Servisi",
@@ -35,6 +46,20 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
 PORT = int(os.getenv("PORT", 8008))
 
+# Uzun metinler bölümlere ayrılır, her bölüm için aday kartlar eşzamanlı üretilir (map-reduce)
+SECTION_CHARS = int(os.getenv("CARD_SECTION_CHARS", "6000"))
+SECTION_CONCURRENCY = int(os.getenv("CARD_SECTION_CONCURRENCY", "4"))
+# Kelime kümesi Jaccard benzerliği bu eşiği aşan kartlar tekrar sayılır
+DUPLICATE_THRESHOLD = float(os.getenv("CARD_DUPLICATE_THRESHOLD", "0.6"))
+# Üretilen kartlar metin + model özetiyle saklanır; toplam kart sayısı bu sınırı aşınca en eskisi atılır (0: kapalı)
+CARD_CACHE_MAX_CARDS = int(os.getenv("CARD_CACHE_MAX_CARDS", "20000"))
+
+ollama = AsyncOllamaClient("info-cards", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+
 # Pydantic modelleri
 class CardRequest(BaseModel):
     text: str
@@ -51,40 +76,99 @@ class CardResponse(BaseModel):
     cards: List[Card]
     metadata: Dict[str, Any]
 
+class CardCache:
+    """Normalize edilmiş metin özeti + model -> üretilmiş kartlar (LRU, kapasite toplam kart sayısıyla sınırlı).
+    N kart isteyen, en az N kartı saklanmış metin için LLM'e gitmez; daha azı varsa yalnızca eksikler üretilir"""
+
+    WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, max_cards: int):
+        self.max_cards = max_cards
+        self.entries: "OrderedDict[str, Tuple[Card, ...]]" = OrderedDict()
+        self.cards = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def key(cls, text: str, model: str) -> str:
+        normalized = cls.WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+        return hashlib.blake2b(f"{model}\x00{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, key: str, num_cards: int) -> Tuple[List[Card], str]:
+        """(saklanan kartların ilk num_cards tanesi, "hit" | "partial" | "miss")"""
+        cards = self.entries.get(key)
+        if not cards:
+            self.misses += 1
+            return [], "miss"
+        self.entries.move_to_end(key)
+        if len(cards) >= num_cards:
+            self.hits += 1
+            return list(cards[:num_cards]), "hit"
+        self.partial_hits += 1
+        return list(cards), "partial"
+
+    def put(self, key: str, cards: List[Card]):
+        if self.max_cards <= 0 or not cards:
+            return
+        previous = self.entries.get(key, ())
+        if len(previous) >= len(cards):
+            return
+        self.entries[key] = tuple(cards)
+        self.entries.move_to_end(key)
+        self.cards += len(cards) - len(previous)
+        while self.cards > self.max_cards:
+            _, evicted = self.entries.popitem(last=False)
+            self.cards -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "cards": self.cards,
+            "max_cards": self.max_cards,
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+card_cache = CardCache(CARD_CACHE_MAX_CARDS)
+
+CARD_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_tokens": 2000
+}
+
 # Ollama çağrı fonksiyonu
-def call_ollama_for_cards(prompt: str) -> str:
+async def call_ollama_for_cards(prompt: str) -> str:
     """Ollama LLM'den kart üretimi için çağrı yap"""
     try:
-        url = f"{OLLAMA_BASE_URL}/api/generate"
-        payload = {
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "max_tokens": 2000
-            }
-        }
-        
-        response = requests.post(url, json=payload, timeout=120)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result.get("response", "")
-        
-    except Exception as e:
+        result = await ollama.generate(prompt, options=CARD_OPTIONS)
+        return result.text
+
+    except OllamaError as e:
         print(f"❌ Ollama çağrı hatası: {e}")
         raise HTTPException(status_code=500, detail=f"LLM çağrı hatası: {str(e)}")
 
-def generate_cards_content(text: str, num_cards: int) -> List[Card]:
-    """Metinden bilgi kartları üret"""
-    
-    prompt = f"""
+def build_cards_prompt(text: str, num_cards: int, exclude: Optional[List[Card]] = None) -> str:
+    """Kart üretim prompt'u; exclude verilirse bu kartların tekrarlanmaması istenir"""
+    existing = ""
+    if exclude:
+        titles = "\n".join(f"    - {card.title}" for card in exclude)
+        existing = f"""
+    Aşağıdaki kartlar zaten üretildi; bunları tekrarlama, metnin farklı bilgilerini seç:
+{titles}
+    """
+    return f"""
     Verilen metni analiz et ve {num_cards} adet bilgi kartı oluştur.
     
     Metin: {text}
-    
+    {existing}
     Her kart için:
     1. Bir başlık/soru oluştur (title) - Kısa ve öz, 1 cümle
     2. Kısa açıklama/cevap yaz (content) - MAKSIMUM 2-3 KISA CÜMLE (50-60 kelime)
@@ -105,11 +189,157 @@ def generate_cards_content(text: str, num_cards: int) -> List[Card]:
     
     Sadece JSON döndür, başka açıklama ekleme.
     """
-    
+
+def card_from_data(card_data: Dict[str, Any], card_id: int) -> Card:
+    return Card(
+        id=card_id,
+        title=card_data.get("title", f"Kart {card_id}"),
+        content=card_data.get("content", ""),
+        type=card_data.get("type", "definition")
+    )
+
+async def generate_cards_content(text: str, num_cards: int) -> Tuple[List[Card], float, Dict[str, Any]]:
+    """Metinden bilgi kartları üret; (kartlar, süre, ek metadata) döner. Önbellekte yeterli kart varsa
+    LLM çağrılmaz, eksik varsa yalnızca eksik kartlar üretilir"""
     start_time = time.time()
-    response = call_ollama_for_cards(prompt)
-    processing_time = time.time() - start_time
-    
+    key = CardCache.key(text, MODEL_NAME)
+    cached, status = card_cache.lookup(key, num_cards)
+    info: Dict[str, Any] = {"cache": status, "cached_cards": len(cached)}
+    if status == "hit":
+        print(f"♻️ {num_cards} kart önbellekten döndü")
+        return cached, time.time() - start_time, info
+
+    cards, generated_info = await generate_new_cards(text, num_cards - len(cached), cached)
+    info.update(generated_info)
+    cards = [card.copy(update={"id": i}) for i, card in enumerate(cached + cards, 1)]
+    if len(cards) > len(cached):
+        card_cache.put(key, cards)
+    return cards or fallback_cards(num_cards), time.time() - start_time, info
+
+async def generate_new_cards(text: str, num_cards: int,
+                             exclude: List[Card]) -> Tuple[List[Card], Dict[str, Any]]:
+    """num_cards yeni kart üret; exclude'daki kartlar prompt'ta listelenir ve tekrarları elenir.
+    Yanıt ayrıştırılamazsa boş liste döner (yer tutucu kartlar önbelleğe girmesin diye)"""
+    sections = split_into_sections(text)
+    if len(sections) > 1:
+        return await generate_cards_map_reduce(sections, num_cards, exclude)
+
+    if not exclude:
+        response = await call_ollama_for_cards(build_cards_prompt(text, num_cards))
+        return parse_cards_response(response, num_cards, fallback=False), {}
+
+    # Tekrar elemesine pay bırakmak için birkaç fazla kart istenir
+    requested = min(20, num_cards + 2)
+    response = await call_ollama_for_cards(build_cards_prompt(text, requested, exclude))
+    deduplicator = CardDeduplicator(exclude)
+    cards = [card for card in parse_cards_response(response, requested, fallback=False) if deduplicator.accept(card)]
+    return cards[:num_cards], {"duplicates_removed": deduplicator.duplicates}
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+")
+WORD = re.compile(r"\w+")
+
+def split_into_sections(text: str, size: int = SECTION_CHARS) -> List[str]:
+    """Metni paragraf sınırlarında en fazla size karakterlik bölümlere ayır (uzun paragraflar cümlelerden bölünür)"""
+    if len(text) <= size:
+        return [text]
+    pieces = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= size:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCE_BREAK.split(paragraph):
+            pieces.extend(sentence[i:i + size] for i in range(0, len(sentence), size))
+
+    sections, current = [], ""
+    for piece in filter(None, pieces):
+        if current and len(current) + len(piece) + 2 > size:
+            sections.append(current)
+            current = piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        sections.append(current)
+    return sections
+
+class CardDeduplicator:
+    """Boş/yer tutucu kartları ve kabul edilmiş bir karta kelime kümesi olarak fazla benzeyenleri eler"""
+
+    def __init__(self, seen: Optional[List[Card]] = None, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.accepted: List[set] = [self.terms(card) for card in seen or []]
+        self.duplicates = 0
+
+    @staticmethod
+    def terms(card: Card) -> set:
+        return set(WORD.findall(f"{card.title} {card.content}".lower()))
+
+    def accept(self, card: Card) -> bool:
+        if not card.title.strip() or not card.content.strip():
+            return False
+        terms = self.terms(card)
+        for other in self.accepted:
+            if len(terms & other) / (len(terms | other) or 1) >= self.threshold:
+                self.duplicates += 1
+                return False
+        self.accepted.append(terms)
+        return True
+
+def cards_per_section(num_cards: int, sections: int) -> int:
+    """Tekrar elemesine pay bırakarak bölüm başına istenecek aday kart sayısı"""
+    return min(20, max(2, math.ceil(num_cards * 1.5 / sections)))
+
+async def generate_section_cards(sections: List[str], num_cards: int, exclude: Optional[List[Card]] = None):
+    """Bölümler için aday kartları SECTION_CONCURRENCY sınırıyla eşzamanlı üret; (bölüm no, kartlar) tamamlandıkça döner"""
+    semaphore = asyncio.Semaphore(SECTION_CONCURRENCY)
+    per_section = cards_per_section(num_cards, len(sections))
+
+    async def generate(index: int, section: str) -> Tuple[int, List[Card]]:
+        async with semaphore:
+            response = await call_ollama_for_cards(build_cards_prompt(section, per_section, exclude))
+        return index, parse_cards_response(response, per_section, fallback=False)
+
+    tasks = [asyncio.ensure_future(generate(i, section)) for i, section in enumerate(sections)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                yield await finished
+            except HTTPException as e:
+                print(f"⚠️ Bölüm kartları üretilemedi: {e.detail}")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def generate_cards_map_reduce(sections: List[str], num_cards: int,
+                                    exclude: Optional[List[Card]] = None) -> Tuple[List[Card], Dict[str, Any]]:
+    """Bölüm adaylarını topla, tekrarları (exclude dahil) ele ve bölümler arasında sırayla (her bölümün en
+    önemli kartı önce) num_cards kart seç; kartlar metindeki sırayla döner"""
+    by_section: Dict[int, List[Card]] = {}
+    async for index, cards in generate_section_cards(sections, num_cards, exclude):
+        by_section[index] = cards
+    if not by_section:
+        raise HTTPException(status_code=500, detail="LLM çağrı hatası: hiçbir bölüm için kart üretilemedi")
+
+    deduplicator, chosen = CardDeduplicator(exclude), []
+    ranked = sorted(((rank, index, card) for index, cards in by_section.items() for rank, card in enumerate(cards)),
+                    key=lambda item: item[:2])
+    for rank, index, card in ranked:
+        if len(chosen) < num_cards and deduplicator.accept(card):
+            chosen.append((index, rank, card))
+    chosen.sort(key=lambda item: item[:2])
+    cards = [card.copy(update={"id": i}) for i, (_, _, card) in enumerate(chosen, 1)]
+    print(f"🧩 {len(sections)} bölüm, {sum(map(len, by_section.values()))} aday, "
+          f"{deduplicator.duplicates} tekrar elendi, {len(cards)} kart seçildi")
+    return cards, {
+        "sections": len(sections),
+        "failed_sections": len(sections) - len(by_section),
+        "candidates": sum(map(len, by_section.values())),
+        "duplicates_removed": deduplicator.duplicates,
+    }
+
+def parse_cards_response(response: str, num_cards: int, fallback: bool = True) -> List[Card]:
+    """LLM yanıtının tamamından kartları çıkar; JSON bozuksa yer tutucu kartlar döner (fallback=False ise boş liste)"""
     try:
         # JSON parse et
         if "```json" in response:
@@ -123,66 +353,264 @@ def generate_cards_content(text: str, num_cards: int) -> List[Card]:
         cards_data = data.get("cards", [])
         
         # Card objelerine dönüştür
-        cards = []
-        for i, card_data in enumerate(cards_data[:num_cards], 1):
-            card = Card(
-                id=i,
-                title=card_data.get("title", f"Kart {i}"),
-                content=card_data.get("content", ""),
-                type=card_data.get("type", "definition")
-            )
-            cards.append(card)
-        
-        return cards, processing_time
+        return [card_from_data(card_data, i) for i, card_data in enumerate(cards_data[:num_cards], 1)]
         
     except json.JSONDecodeError as e:
         print(f"❌ JSON parse hatası: {e}")
         print(f"LLM Response: {response}")
-        
-        # Fallback: Basit kartlar oluştur
+        if not fallback:
+            return []
+        return fallback_cards(num_cards)
+
+def fallback_cards(num_cards: int) -> List[Card]:
+    """LLM yanıtı ayrıştırılamadığında dönen yer tutucu kartlar (önbelleğe alınmaz)"""
+    cards = []
+    for i in range(1, min(num_cards + 1, 6)):
+        card = Card(
+            id=i,
+            title=f"Bilgi Kartı {i}",
+            content=f"Metin analizi tamamlandı.",
+            type="definition"
+        )
+        cards.append(card)
+    
+    return cards
+
+class CardStreamParser:
+    """LLM token akışındaki "cards" dizisini artımlı ayrıştırır; her kart nesnesi kapandığı anda döner"""
+
+    CARDS_ARRAY = re.compile(r'"cards"\s*:\s*\[')
+
+    def __init__(self):
+        self.text = ""
+        self.pos = 0
+        self.in_array = False
+        self.finished = False
+        self.depth = 0
+        self.start = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.text += chunk
         cards = []
-        for i in range(1, min(num_cards + 1, 6)):
-            card = Card(
-                id=i,
-                title=f"Bilgi Kartı {i}",
-                content=f"Metin analizi tamamlandı.",
-                type="definition"
-            )
+        if self.finished:
+            return cards
+        if not self.in_array:
+            match = self.CARDS_ARRAY.search(self.text, self.pos)
+            if match is None:
+                # Anahtar iki parça arasında bölünmüş olabilir
+                self.pos = max(self.pos, len(self.text) - 16)
+                return cards
+            self.in_array, self.pos = True, match.end()
+
+        text = self.text
+        for i in range(self.pos, len(text)):
+            ch = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.start = i
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        card = json.loads(text[self.start:i + 1])
+                    except json.JSONDecodeError:
+                        print(f"⚠️ Ayrıştırılamayan kart atlandı: {text[self.start:i + 1][:80]}")
+                        continue
+                    if isinstance(card, dict):
+                        cards.append(card)
+            elif ch == "]" and self.depth == 0:
+                self.finished = True
+                break
+        self.pos = len(text)
+        return cards
+
+async def stream_cards(text: str, num_cards: int):
+    """Kartları LLM akışından ayrıştırıldıkça NDJSON satırı olarak yay; sonda özet satırı gelir"""
+    key = CardCache.key(text, MODEL_NAME)
+    cached, status = card_cache.lookup(key, num_cards)
+    if cached:
+        async for line in stream_cached_cards(text, num_cards, key, cached, status):
+            yield line
+        return
+
+    sections = split_into_sections(text)
+    if len(sections) > 1:
+        async for line in stream_cards_map_reduce(sections, num_cards, len(text), key):
+            yield line
+        return
+
+    start_time = time.time()
+    parser = CardStreamParser()
+    cards: List[Card] = []
+    first_card_time: Optional[float] = None
+    chunks = ollama.stream(build_cards_prompt(text, num_cards), options=CARD_OPTIONS)
+    try:
+        async for chunk in chunks:
+            for card_data in parser.feed(chunk.get("response", "")):
+                if len(cards) == num_cards:
+                    break
+                card = card_from_data(card_data, len(cards) + 1)
+                cards.append(card)
+                if first_card_time is None:
+                    first_card_time = time.time() - start_time
+                yield json.dumps({"type": "card", "card": card.dict()}, ensure_ascii=False) + "\n"
+            # İstenen sayıya ulaşıldıysa ya da dizi kapandıysa kalan üretim beklenmez (bağlantı kapanır)
+            if len(cards) == num_cards or parser.finished:
+                break
+    except OllamaError as e:
+        print(f"❌ Ollama çağrı hatası: {e}")
+        yield json.dumps({"type": "error", "detail": f"LLM çağrı hatası: {str(e)}"}, ensure_ascii=False) + "\n"
+        return
+    finally:
+        await chunks.aclose()
+
+    if not cards:
+        # Akışta hiç kart çıkmadıysa tüm yanıt eski yolla ayrıştırılır
+        for card in parse_cards_response(parser.text, num_cards, fallback=False):
             cards.append(card)
-        
-        return cards, processing_time
+            yield json.dumps({"type": "card", "card": card.dict()}, ensure_ascii=False) + "\n"
+    card_cache.put(key, cards)
+    if not cards:
+        for card in fallback_cards(num_cards):
+            cards.append(card)
+            yield json.dumps({"type": "card", "card": card.dict()}, ensure_ascii=False) + "\n"
+
+    processing_time = time.time() - start_time
+    print(f"✅ {len(cards)} kart akışla üretildi: ilk kart {first_card_time or processing_time:.2f}s, "
+          f"toplam {processing_time:.2f}s")
+    yield json.dumps({"type": "done", "metadata": {
+        "total_cards": len(cards),
+        "processing_time": round(processing_time, 2),
+        "time_to_first_card": round(first_card_time or processing_time, 2),
+        "text_length": len(text),
+        "model": MODEL_NAME,
+        "cache": "miss"
+    }}, ensure_ascii=False) + "\n"
+
+async def stream_cached_cards(text: str, num_cards: int, key: str, cached: List[Card], status: str):
+    """Önbellekteki kartları hemen yay; önbellek yetmiyorsa eksik kartları üretip ardından gönder"""
+    start_time = time.time()
+    for card in cached:
+        yield json.dumps({"type": "card", "card": card.dict()}, ensure_ascii=False) + "\n"
+    first_card_time = time.time() - start_time
+
+    cards, info = list(cached), {}
+    if status == "partial":
+        try:
+            new_cards, info = await generate_new_cards(text, num_cards - len(cached), cached)
+        except HTTPException as e:
+            yield json.dumps({"type": "error", "detail": e.detail}, ensure_ascii=False) + "\n"
+            return
+        for card in new_cards:
+            card = card.copy(update={"id": len(cards) + 1})
+            cards.append(card)
+            yield json.dumps({"type": "card", "card": card.dict()}, ensure_ascii=False) + "\n"
+        card_cache.put(key, cards)
+
+    processing_time = time.time() - start_time
+    yield json.dumps({"type": "done", "metadata": {
+        "total_cards": len(cards),
+        "processing_time": round(processing_time, 2),
+        "time_to_first_card": round(first_card_time, 2),
+        "text_length": len(text),
+        "model": MODEL_NAME,
+        "cache": status,
+        "cached_cards": len(cached),
+        **info
+    }}, ensure_ascii=False) + "\n"
+
+async def stream_cards_map_reduce(sections: List[str], num_cards: int, text_length: int, key: str):
+    """Uzun metinde biten her bölümün en önemli kartlarını (bölüm başına pay kadar) hemen yay;
+    tüm bölümler bitince eksik kalan sayı diğer adaylardan sırayla tamamlanır"""
+    start_time = time.time()
+    quota = math.ceil(num_cards / len(sections))
+    deduplicator, leftovers, candidates = CardDeduplicator(), [], 0
+    sent: List[Card] = []
+    first_card_time: Optional[float] = None
+    try:
+        async for index, cards in generate_section_cards(sections, num_cards):
+            candidates += len(cards)
+            taken = 0
+            for rank, card in enumerate(cards):
+                if taken == quota or len(sent) == num_cards:
+                    leftovers.append((rank, index, card))
+                elif deduplicator.accept(card):
+                    taken += 1
+                    sent.append(card.copy(update={"id": len(sent) + 1}))
+                    if first_card_time is None:
+                        first_card_time = time.time() - start_time
+                    yield json.dumps({"type": "card", "card": sent[-1].dict()}, ensure_ascii=False) + "\n"
+    except HTTPException as e:
+        yield json.dumps({"type": "error", "detail": e.detail}, ensure_ascii=False) + "\n"
+        return
+    if not candidates:
+        yield json.dumps({"type": "error", "detail": "LLM çağrı hatası: hiçbir bölüm için kart üretilemedi"},
+                         ensure_ascii=False) + "\n"
+        return
+
+    for rank, index, card in sorted(leftovers, key=lambda item: item[:2]):
+        if len(sent) < num_cards and deduplicator.accept(card):
+            sent.append(card.copy(update={"id": len(sent) + 1}))
+            yield json.dumps({"type": "card", "card": sent[-1].dict()}, ensure_ascii=False) + "\n"
+    card_cache.put(key, sent)
+
+    processing_time = time.time() - start_time
+    yield json.dumps({"type": "done", "metadata": {
+        "total_cards": len(sent),
+        "processing_time": round(processing_time, 2),
+        "time_to_first_card": round(first_card_time or processing_time, 2),
+        "text_length": text_length,
+        "model": MODEL_NAME,
+        "cache": "miss",
+        "sections": len(sections),
+        "candidates": candidates,
+        "duplicates_removed": deduplicator.duplicates
+    }}, ensure_ascii=False) + "\n"
 
 # API Endpoints
 @app.get("/health")
 async def health_check():
     """Sağlık kontrolü"""
-    try:
-        # Ollama bağlantısını test et
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        ollama_status = "healthy" if response.status_code == 200 else "unhealthy"
-    except:
-        ollama_status = "unhealthy"
-    
+    # Ollama bağlantısını test et
+    ollama_status = "healthy" if await ollama.is_healthy() else "unhealthy"
+
     return {
         "status": "healthy",
         "service": "info-cards",
         "ollama_status": ollama_status,
-        "model": MODEL_NAME
+        "model": MODEL_NAME,
+        "llm_stats": ollama.stats(),
+        "card_cache": card_cache.stats()
     }
 
+def validate_card_request(request: CardRequest):
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Metin boş olamaz")
+
+    if request.num_cards < 1 or request.num_cards > 20:
+        raise HTTPException(status_code=400, detail="Kart sayısı 1-20 arasında olmalı")
+
 @app.post("/generate-cards", response_model=CardResponse)
 async def generate_cards(request: CardRequest):
     """Bilgi kartları üret"""
     try:
-        if not request.text.strip():
-            raise HTTPException(status_code=400, detail="Metin boş olamaz")
-        
-        if request.num_cards < 1 or request.num_cards > 20:
-            raise HTTPException(status_code=400, detail="Kart sayısı 1-20 arasında olmalı")
+        validate_card_request(request)
         
         print(f"🎯 Bilgi kartları üretiliyor: {request.num_cards} adet")
         
-        cards, processing_time = generate_cards_content(request.text, request.num_cards)
+        cards, processing_time, info = await generate_cards_content(request.text, request.num_cards)
         
         return CardResponse(
             success=True,
@@ -191,7 +619,8 @@ async def generate_cards(request: CardRequest):
                 "total_cards": len(cards),
                 "processing_time": round(processing_time, 2),
                 "text_length": len(request.text),
-                "model": MODEL_NAME
+                "model": MODEL_NAME,
+                **info
             }
         )
         
@@ -201,6 +630,13 @@ async def generate_cards(request: CardRequest):
         print(f"❌ Kart üretim hatası: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate-cards/stream")
+async def generate_cards_stream(request: CardRequest):
+    """Bilgi kartlarını üretildikçe NDJSON olarak akıt ({"type": "card"} satırları, sonda {"type": "done"})"""
+    validate_card_request(request)
+    print(f"🎯 Bilgi kartları akışla üretiliyor: {request.num_cards} adet")
+    return StreamingResponse(stream_cards(request.text, request.num_cards), media_type="application/x-ndjson")
+
 @app.get("/")
 async def root():
     """Ana sayfa"""
@@ -209,6 +645,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "generate_cards": "POST /generate-cards",
+            "generate_cards_stream": "POST /generate-cards/stream",
             "health": "GET /health"
         }
     }
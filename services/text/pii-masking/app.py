@@ -1,14 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Any, Tuple
 import uvicorn
-import requests
+import asyncio
+import bisect
+import collections
+import functools
 import json
 import hashlib
 import uuid
 import re
 import os
+import sys
+import zipfile
+
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from cpu_pool import CpuPool
+from ollama_client import AsyncOllamaClient, OllamaError
+from pii_rules import STRUCTURED_TYPES, detect as detect_structured_pii, redact as redact_structured_pii
+from pii_masker import AhoCorasick, apply_spans, on_word_boundary, resolve_overlaps
+from pii_cache import SentenceCache, project as project_cached_entities
+from pii_files import (StreamSink, close_and_drain, copy_chunk, distribute, iter_docx_members, iter_text_segments,
+                       iter_xml_segments, next_segment_group, open_docx, write_text)
+from pii_session import MaskingSession, SessionStore, plan_update
 
 app = FastAPI(title="PII Masking Service (LLM-based)", version="2.0.0")
 
@@ -23,6 +40,27 @@ app.add_middleware(
 
 # Ollama configuration
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+ollama = AsyncOllamaClient("pii-masking", base_url=OLLAMA_BASE_URL)
+
+# Yapısal PII (TCKN, IBAN, kart, e-posta, telefon, IP/MAC, IMEI, plaka) kural motoruyla bulunur
+RULES_ENABLED = os.getenv("PII_RULES", "1") == "1"
+
+# Uzun metinler cümle/paragraf sınırlarında, örtüşen parçalara bölünüp eşzamanlı taranır
+CHUNK_CHARS = int(os.getenv("PII_CHUNK_CHARS", "2000"))
+CHUNK_OVERLAP = int(os.getenv("PII_CHUNK_OVERLAP", "200"))
+CHUNK_CONCURRENCY = int(os.getenv("PII_CHUNK_CONCURRENCY", "4"))
+# /mask/batch: kısa metinler tek prompt'ta paketlenir, paketler sınırlı eşzamanlılıkla taranır
+BATCH_PACK_CHARS = int(os.getenv("PII_BATCH_PACK_CHARS", str(CHUNK_CHARS)))
+BATCH_CONCURRENCY = int(os.getenv("PII_BATCH_CONCURRENCY", str(CHUNK_CONCURRENCY)))
+PACK_SEPARATOR = "\n\n---\n\n"
+# Tekrarlayan cümlelerin (antet, imza, dipnot) LLM sonuçları önbellekte tutulur (0 = kapalı)
+SENTENCE_CACHE_SIZE = int(os.getenv("PII_SENTENCE_CACHE_SIZE", "20000"))
+sentence_cache = SentenceCache(SENTENCE_CACHE_SIZE)
+# /mask/file: paragraflar ~CHUNK_CHARS'lık gruplar hâlinde taranır, aynı anda en fazla bu kadar grup işlenir
+FILE_PIPELINE_DEPTH = int(os.getenv("PII_FILE_PIPELINE_DEPTH", str(CHUNK_CONCURRENCY)))
+# Düzenlenen belgeler için sürümlü oturumlar (bellekte, LRU + dokunulmadan geçen süre sınırı)
+sessions = SessionStore(int(os.getenv("PII_SESSION_MAX", "1000")), float(os.getenv("PII_SESSION_TTL", "3600")))
+SENTENCE_END = re.compile(r"\n\s*\n|(?<=[.!?…])[\"'”)]*\s+|\n")
 
 class TextRequest(BaseModel):
     text: str
@@ -30,6 +68,12 @@ class TextRequest(BaseModel):
     entities: List[str] = []  # Specific entities to mask
     model: str = "gemma3:27b"  # LLM model to use
 
+class BatchRequest(BaseModel):
+    texts: List[str]
+    masking_type: str = "replace"  # replace, hash, encrypt
+    entities: List[str] = []  # Specific entities to mask
+    model: str = "gemma3:27b"  # LLM model to use
+
 class MaskingResponse(BaseModel):
     original_text: str
     masked_text: str
@@ -37,163 +81,198 @@ class MaskingResponse(BaseModel):
     masked_entities: List[Dict[str, Any]]  # Maskelenmiş bilgiler
     status: str
     model_used: str
+    llm_usage: Dict[str, Any] = {}  # LLM çağrı sayısı, prompt_eval_count/duration toplamları
+
+class SessionUpdate(BaseModel):
+    text: str
+
+class SessionResponse(MaskingResponse):
+    session_id: str
+    version: int
+    total_sentences: int
+    changed_sentences: int  # Bu sürümde eklenen/değişen/silinen cümle sayısı
+    reanalyzed_chars: int  # Tespitin yeniden çalıştığı karakter sayısı
+
+# /mask/file'da yükleme okuma, zip açma/sıkıştırma, XML taraması ve maskeleme event loop'u bloklamasın diye
+# bu havuzda çalışır
+cpu_pool = CpuPool("pii-cpu")
+run_cpu = cpu_pool.run
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+    cpu_pool.shutdown()
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "pii-masking-llm"}
+    return {"status": "healthy", "service": "pii-masking-llm", "llm_stats": ollama.stats(),
+            "sentence_cache": sentence_cache.stats()}
+
+# PII türleri (grup, [(tür, açıklama)]); prompt yalnızca sorulan türlerle kurulur
+PII_TAXONOMY = [
+    ("Kimlik & Nüfus", [
+        ("PERSON", 'Ad/Soyad: "Mehmet Ali Öz"'),
+        ("BIRTH_DATE", 'Doğum tarihi/yılı: "12.03.1990", "1990"'),
+        ("BIRTH_PLACE", 'Doğum yeri: "Ankara/Çankaya"'),
+        ("ID_NUMBER", 'T.C. Kimlik No: "11 haneli TC"'),
+        ("MOTHER_MAIDEN_NAME", "Anne kızlık soyadı (varsa)"),
+        ("SIGNATURE", "Islak/elektronik imza (metinle ifade edilmişse)"),
+    ]),
+    ("İletişim & Adres", [
+        ("ADDRESS", 'Açık adres / posta: "İnönü Mah. ... No:12/5"'),
+        ("ZIP_CODE", 'Posta Kodu: "34000"'),
+        ("PHONE", 'Telefon/GSM: "+90 5xx xxx xx xx"'),
+        ("EMAIL", 'E-posta: "ad.soyad@..."'),
+        ("SOCIAL_HANDLE", "Sosyal hesap adı/kullanıcı adı (varsa)"),
+    ]),
+    ("Finans & Kimlik Doğrulama", [
+        ("CREDIT_CARD", "Kredi kartı numarası/PAN"),
+        ("IBAN", "TR ile başlayan IBAN"),
+        ("BANK_ACCOUNT", "Banka hesap numarası (IBAN dışı)"),
+        ("TAX_NUMBER", "Vergi no"),
+        ("SSN", "Sosyal güvenlik numarası (SGK no eşleniği/SSN)"),
+        ("FINANCIAL_DOC", "Fatura, dekont, ekstre gibi belge numaraları"),
+    ]),
+    ("Resmi Belge & Numaralar", [
+        ("PASSPORT", "Pasaport no"),
+        ("DRIVER_LICENSE", "Sürücü belgesi no"),
+        ("LICENSE_PLATE", "Araç plakası"),
+        ("STUDENT_EMPLOYEE_ID", "Öğrenci/çalışan/müşteri numaraları (kurumsal ID)"),
+        ("OTHER_ID", "Diğer kimlikleyiciler (bilet no, başvuru no vb.)"),
+    ]),
+    ("Biyometrik, Görsel-İşitsel", [
+        ("BIOMETRIC", "Parmak izi, yüz tanıma, iris, ses tanıma, DNA, biyometrik şablonlar"),
+        ("PHOTO", "Fotoğraf, görsel tanımlama, kimlik fotoğrafı, profil resmi"),
+        ("VIDEO", "Görüntü kayıtları, kamera kayıtları, video tanımlama"),
+        ("AUDIO", "Ses kayıtları, ses tanıma, telefon kayıtları"),
+    ]),
+    ("Sağlık & Özel Nitelikli", [
+        ("HEALTH", "Sağlık verisi/rapor, hastalık öyküsü, engellilik bilgisi, astım, alerji, operasyon, muayene"),
+        ("GENETIC", "Genetik veriler, kalıtsal hastalıklar"),
+        ("SEX_LIFE", "Cinsel hayat/cinsel yönelim, cinsel tercihler"),
+        ("CRIMINAL_CONVICTION", "Ceza mahkûmiyeti ve güvenlik tedbirleri, suç geçmişi"),
+    ]),
+    ("İnanç, Görüş, Aidiyet (Özel Nitelikli)", [
+        ("RACE_ETHNICITY", "Irk/etnik köken"),
+        ("RELIGION_SECT", "Din/mezhep/diğer inançlar"),
+        ("POLITICAL_OPINION", "Siyasi düşünce"),
+        ("PHILOSOPHICAL_BELIEF", "Felsefi inanç"),
+        ("UNION_ASSOC_MEMBERSHIP", "Dernek/vakıf/sendika üyeliği"),
+        ("CLOTHING", "Kılık ve kıyafet (inanç/aidiyeti ifşa eden)"),
+    ]),
+    ("Konum & Ağ", [
+        ("IP_ADDRESS", "IP"),
+        ("MAC_ADDRESS", "MAC"),
+        ("IMEI", "IMEI"),
+        ("GPS_COORDINATES", "Enlem/boylam"),
+        ("DEVICE_ID", "Cihaz/advertising ID (IDFA/GAID vb.)"),
+    ]),
+    ("Demografi & Tercihler", [
+        ("GENDER", "Cinsiyet, kadın/erkek, cinsiyet kimliği"),
+        ("MARITAL_STATUS", "Medeni hâl, evli/bekar/boşanmış, eş durumu, çocuk durumu"),
+        ("HOBBIES_PREFERENCES", "Hobiler/tercihler, spor, sanat, müzik, fotoğrafçılık, yüzme"),
+        ("AFFILIATIONS", "Grup üyelikleri, sendika, dernek, vakıf, kulüp, topluluk"),
+        ("FAMILY", "Aile birey bilgileri, eş, çocuk, anne, baba, kardeş"),
+    ]),
+    ("Belgeler & İçerikler", [
+        ("CV_RESUME", "Özgeçmiş, CV, resume, başvuru belgesi"),
+        ("OFFICIAL_DOC", "Nüfus cüzdanı fotokopileri, kimlik belgeleri"),
+        ("REPORT", "Müşteri şikâyet/performans/mülakat değerlendirme raporları, değerlendirme"),
+        ("LETTER", "Mektup/davet yazıları, yazışmalar, bildirimler"),
+    ]),
+]
+
+# Modelin sık kaçırdığı türler için anahtar kelimeler (ilgili tür sorulduysa prompt'a eklenir)
+PII_FOCUS = [
+    (("PERSON",), "İsimler (PERSON)"),
+    (("GENDER",), 'Cinsiyet (GENDER): "kadın", "erkek", "kadın olarak"'),
+    (("MARITAL_STATUS",), 'Medeni hal / aile durumu (MARITAL_STATUS): "evli", "bekar", "eşi", "çocuk"'),
+    (("HEALTH",), 'Sağlık (HEALTH): "astım", "hastalık", "sağlık", "muayene"'),
+    (("BIOMETRIC",), 'Biyometrik (BIOMETRIC): "parmak izi", "fotoğraf", "ses", "video"'),
+    (("AFFILIATIONS",), 'Sosyal üyelikler (AFFILIATIONS): "sendika", "dernek", "vakıf", "üye"'),
+    (("HOBBIES_PREFERENCES",), 'Hobiler (HOBBIES_PREFERENCES): "yüzme", "fotoğrafçılık", "spor"'),
+    (("CV_RESUME", "REPORT"), 'Belgeler (CV_RESUME, REPORT): "özgeçmiş", "rapor", "değerlendirme"'),
+]
+
+# Kural motoru açıkken yapısal türler LLM'e sorulmaz
+LLM_TYPES = tuple(t for _, items in PII_TAXONOMY for t, _ in items if not (RULES_ENABLED and t in STRUCTURED_TYPES))
 
-def call_llm_for_pii_detection(text: str, model: str = "gemma3:27b") -> List[Dict[str, Any]]:
-    """Use LLM to detect PII entities in text"""
+def llm_types_for(requested: List[str]) -> Tuple[str, ...]:
+    """LLM'e sorulacak türler: istenenlerden kurallarla bulunamayanlar (istek bilinen bir tür içermiyorsa tümü)"""
+    selected = tuple(t for t in LLM_TYPES if t in requested)
+    return selected or LLM_TYPES
+
+@functools.lru_cache(maxsize=64)
+def pii_prompt_prefix(types: Tuple[str, ...]) -> str:
+    """Metinden önceki sabit talimat bloğu; aynı tür kümesi için byte'ı byte'ına aynı olduğundan
+    Ollama önceki çağrıların KV önbelleğini yeniden kullanır"""
+    lines = [
+        "Aşağıdaki metinde kişisel bilgileri (PII) tespit et ve JSON formatında döndür. Her tespit ettiğin bilgiyi şu formatta belirt:",
+        "",
+        '{"entities": [{"type": "PERSON", "value": "İsim Soyisim", "confidence": 0.95}, {"type": "HEALTH", "value": "astım", "confidence": 0.9}]}',
+        "",
+        "GÖREV: Metindeki aşağıdaki türlerden TÜM kişisel bilgileri bul ve listele, diğer türleri raporlama.",
+        "",
+        "Tespit edilecek PII türleri:",
+    ]
+    for group, items in PII_TAXONOMY:
+        selected = [(t, description) for t, description in items if t in types]
+        if selected:
+            lines.append(f"{group}:")
+            lines.extend(f"- {t} — {description}" for t, description in selected)
+
+    focus = [hint for hint_types, hint in PII_FOCUS if any(t in types for t in hint_types)]
+    if focus:
+        lines += ["", "ÖNEMLİ: Metni dikkatli oku ve şu bilgileri bul:"]
+        lines.extend(f"{i}. {hint}" for i, hint in enumerate(focus, 1))
+    if "GENDER" in types:
+        lines += ["", 'ÖRNEK: "kadın olarak beyanlıdır" → GENDER: "kadın"']
+    if RULES_ENABLED:
+        lines += ["", "Metindeki [EMAIL], [PHONE], [ID_NUMBER] gibi köşeli parantezli etiketler zaten maskelenmiştir, bunları raporlama."]
+    lines += ["", "Sadece JSON formatında yanıt ver, başka açıklama ekleme.", "", "Metin: "]
+    return "\n".join(lines)
+
+def build_pii_prompt(text: str, types: Tuple[str, ...]) -> str:
+    """Sabit önek + değişken metin (metin sonda, böylece önek çağrılar arasında paylaşılır)"""
+    return pii_prompt_prefix(types) + text
+
+async def call_llm_for_pii_detection(text: str, model: str = "gemma3:27b",
+                                     types: Tuple[str, ...] = LLM_TYPES) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Use LLM to detect PII entities in text; returns (entities, timings)"""
     try:
-        prompt = f"""Aşağıdaki metinde kişisel bilgileri (PII) tespit et ve JSON formatında döndür. Her tespit ettiğin bilgiyi şu formatta belirt:
-
-{{
-  "entities": [
-    {{"type": "PERSON", "value": "İsim Soyisim", "start": 0, "end": 10, "confidence": 0.95}},
-    {{"type": "EMAIL", "value": "email@example.com", "start": 15, "end": 30, "confidence": 0.95}}
-  ]
-}}
-
-GÖREV: Metindeki TÜM kişisel bilgileri bul ve listele. Sadece isim değil, şunları da bul:
-- Cinsiyet: "kadın", "erkek", "kadın olarak"
-- Medeni hal: "evli", "bekar", "eşi", "çocuk"
-- Sağlık: "astım", "hastalık", "sağlık", "muayene"
-- Biyometrik: "parmak izi", "fotoğraf", "ses", "video"
-- Sosyal: "sendika", "dernek", "vakıf", "üye"
-- Hobiler: "yüzme", "fotoğrafçılık", "spor"
-- Belgeler: "özgeçmiş", "rapor", "değerlendirme"
-
-Tespit edilecek PII türleri:
-Kimlik & Nüfus:
-- PERSON — Ad/Soyad: "Mehmet Ali Öz"
-- BIRTH_DATE — Doğum tarihi/yılı: “12.03.1990”, “1990”
-- BIRTH_PLACE — Doğum yeri: “Ankara/Çankaya”
-- ID_NUMBER — T.C. Kimlik No: “11 haneli TC”
-- MOTHER_MAIDEN_NAME — Anne kızlık soyadı (varsa)
-- SIGNATURE — Islak/elektronik imza (metinle ifade edilmişse)
-İletişim & Adres:
-- ADDRESS — Açık adres / posta: “İnönü Mah. ... No:12/5”
-- ZIP_CODE — Posta Kodu: “34000”
-- PHONE — Telefon/GSM: “+90 5xx xxx xx xx”
-- EMAIL — E-posta: “ad.soyad@...”
-- SOCIAL_HANDLE — Sosyal hesap adı/kullanıcı adı (varsa)
-Finans & Kimlik Doğrulama:
-- CREDIT_CARD — Kredi kartı numarası/PAN
-- IBAN — TR ile başlayan IBAN
-- BANK_ACCOUNT — Banka hesap numarası (IBAN dışı)
-- TAX_NUMBER — Vergi no
-- SSN — Sosyal güvenlik numarası (SGK no eşleniği/SSN)
-- FINANCIAL_DOC — Fatura, dekont, ekstre gibi belge numaraları
-Resmi Belge & Numaralar:
-- PASSPORT — Pasaport no
-- DRIVER_LICENSE — Sürücü belgesi no
-- LICENSE_PLATE — Araç plakası
-- STUDENT_EMPLOYEE_ID — Öğrenci/çalışan/müşteri numaraları (kurumsal ID)
-- OTHER_ID — Diğer kimlikleyiciler (bilet no, başvuru no vb.)
-Biyometrik, Görsel-İşitsel:
-- BIOMETRIC — Parmak izi, yüz/iris verisi, biyometrik şablonlar
-- PHOTO — Fotoğraf (kişiyi tanımlayan görsel)
-- VIDEO — Görüntü kayıtları
-- AUDIO — Ses kayıtları
-Sağlık & Özel Nitelikli:
-- HEALTH — Sağlık verisi/rapor, hastalık öyküsü, engellilik bilgisi, astım, alerji, operasyon, muayene
-- GENETIC — Genetik veriler, kalıtsal hastalıklar
-- SEX_LIFE — Cinsel hayat/cinsel yönelim, cinsel tercihler
-- CRIMINAL_CONVICTION — Ceza mahkûmiyeti ve güvenlik tedbirleri, suç geçmişi
-- BIOMETRIC — Parmak izi, yüz tanıma, iris, ses tanıma, DNA, biyometrik şablonlar
-- PHOTO — Fotoğraf, görsel tanımlama, kimlik fotoğrafı, profil resmi
-- VIDEO — Görüntü kayıtları, kamera kayıtları, video tanımlama
-- AUDIO — Ses kayıtları, ses tanıma, telefon kayıtları
-İnanç, Görüş, Aidiyet (Özel Nitelikli):
-- RACE_ETHNICITY — Irk/etnik köken
-- RELIGION_SECT — Din/mezhep/diğer inançlar
-- POLITICAL_OPINION — Siyasi düşünce
-- PHILOSOPHICAL_BELIEF — Felsefi inanç
-- UNION_ASSOC_MEMBERSHIP — Dernek/vakıf/sendika üyeliği
-- CLOTHING — Kılık ve kıyafet (inanç/aidiyeti ifşa eden)
-Konum & Ağ:
-- IP_ADDRESS — IP
-- MAC_ADDRESS — MAC
-- IMEI — IMEI
-- GPS_COORDINATES — Enlem/boylam
-- DEVICE_ID — Cihaz/advertising ID (IDFA/GAID vb.)
-Demografi & Tercihler:
-- GENDER — Cinsiyet, kadın/erkek, cinsiyet kimliği
-- MARITAL_STATUS — Medeni hâl, evli/bekar/boşanmış, eş durumu, çocuk durumu
-- HOBBIES_PREFERENCES — Hobiler/tercihler, spor, sanat, müzik, fotoğrafçılık, yüzme
-- AFFILIATIONS — Grup üyelikleri, sendika, dernek, vakıf, kulüp, topluluk
-- FAMILY — Aile birey bilgileri, eş, çocuk, anne, baba, kardeş
-Belgeler & İçerikler:
-- CV_RESUME — Özgeçmiş, CV, resume, başvuru belgesi
-- OFFICIAL_DOC — Nüfus cüzdanı fotokopileri, kimlik belgeleri
-- REPORT — Müşteri şikâyet/performans/mülakat değerlendirme raporları, değerlendirme
-- LETTER — Mektup/davet yazıları, yazışmalar, bildirimler
-
-
-
-Metin: {text}
-
-ÖNEMLİ: Metni dikkatli oku ve şu bilgileri bul:
-1. İsimler (PERSON)
-2. Cinsiyet bilgileri (GENDER): "kadın", "erkek"
-3. Aile durumu (MARITAL_STATUS): "evli", "eşi", "çocuk"
-4. Sağlık bilgileri (HEALTH): "astım", "hastalık", "sağlık"
-5. Biyometrik veriler (BIOMETRIC): "parmak izi", "fotoğraf", "ses", "video"
-6. Sosyal üyelikler (AFFILIATIONS): "sendika", "dernek", "vakıf"
-7. Hobiler (HOBBIES_PREFERENCES): "yüzme", "fotoğrafçılık"
-8. Belgeler (CV_RESUME, REPORT): "özgeçmiş", "rapor"
-
-ÖRNEK: "kadın olarak beyanlıdır" → GENDER: "kadın"
-
-Sadece JSON formatında yanıt ver, başka açıklama ekleme:"""
-
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "top_p": 0.9
-                }
-            },
-            timeout=30
-        )
-        
-        print(f"🔍 HTTP Status: {response.status_code}")
-        if response.status_code == 200:
-            result = response.json()
-            llm_response = result.get("response", "")
-            
-            # Debug: Print raw LLM response
-            print(f"🔍 Raw LLM Response: {llm_response}")
-            print(f"🔍 Response length: {len(llm_response)}")
-            
-            # Extract JSON from LLM response
-            try:
-                # Find JSON in the response
-                json_start = llm_response.find('{')
-                json_end = llm_response.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = llm_response[json_start:json_end]
-                    parsed = json.loads(json_str)
-                    return parsed.get("entities", [])
-            except (json.JSONDecodeError, KeyError):
-                pass
-            
-            # Fallback: parse the response manually
-            return parse_llm_response_manually(llm_response, text)
-        else:
-            print(f"❌ LLM API error: {response.status_code}")
-            print(f"❌ Response text: {response.text}")
-            return []
-            
-    except Exception as e:
-        print(f"❌ Error calling LLM: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        prompt = build_pii_prompt(text, types)
+
+        result = await ollama.generate(prompt, model=model, options={
+            "temperature": 0.1,
+            "top_p": 0.9
+        })
+        llm_response = result.text
+
+        # Yanıtın kendisi loglanmaz (tespit edilen PII'yi düz metin olarak içerir); yalnızca boyut ve süreler
+        print(f"🔍 Response length: {len(llm_response)}, timings: {result.timings}")
+
+        # Extract JSON from LLM response
+        try:
+            # Find JSON in the response
+            json_start = llm_response.find('{')
+            json_end = llm_response.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                json_str = llm_response[json_start:json_end]
+                parsed = json.loads(json_str)
+                entities = parsed.get("entities", [])
+                # Beklenmeyen şekiller (liste, "entities": "..." vb.) sessizce "PII yok" sayılmasın
+                if not isinstance(entities, list) or not all(isinstance(e, dict) for e in entities):
+                    raise TypeError(f"entities bir nesne listesi değil: {type(entities).__name__}")
+                return entities, result.timings
+        except (json.JSONDecodeError, KeyError, AttributeError, TypeError) as e:
+            print(f"⚠️ LLM yanıtı JSON olarak okunamadı, satır satır ayrıştırılıyor: {e}")
+
+        # Fallback: parse the response manually
+        return parse_llm_response_manually(llm_response, text), result.timings
+
+    except OllamaError as e:
+        print(f"❌ LLM API error: {e}")
+        raise
 
 def parse_llm_response_manually(response: str, original_text: str) -> List[Dict[str, Any]]:
     """Manually parse LLM response when JSON parsing fails"""
@@ -225,89 +304,287 @@ def parse_llm_response_manually(response: str, original_text: str) -> List[Dict[
     
     return entities
 
-def mask_text(text: str, entities: List[Dict[str, Any]], masking_type: str) -> tuple[str, List[Dict[str, Any]]]:
-    """Mask detected entities in text and return masked text with masked entities info"""
-    masked_text = text
-    masked_entities = []
-    
-    # LLM'nin pozisyonları yanlış olabilir, bu yüzden metinde değeri arayıp gerçek pozisyonu buluyoruz
-    validated_entities = []
+def split_into_chunks(text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+    """Metni en fazla size karakterlik (start, end) aralıklarına böl; parçalar cümle sonunda biter,
+    sonraki parça son ~overlap karakteri kapsayan cümle başından (cümle yoksa kelime başından) başlar"""
+    if len(text) <= size:
+        return [(0, len(text))]
+
+    cuts = [m.end() for m in SENTENCE_END.finditer(text)]
+    chunks = []
+    start = 0
+    while start + size < len(text):
+        limit = start + size
+        # Sınır içindeki son cümle sonu (parçayı yarıdan fazla küçültmüyorsa); yoksa son boşluk, o da yoksa sert kesim
+        i = bisect.bisect_right(cuts, limit) - 1
+        if i >= 0 and cuts[i] > start + size // 2:
+            end = cuts[i]
+        else:
+            space = text.rfind(" ", start + size // 2, limit)
+            end = space + 1 if space != -1 else limit
+        chunks.append((start, end))
+
+        # Örtüşme penceresindeki ilk cümle başı; yoksa ilk kelime başı
+        back = max(end - overlap, start + 1)
+        j = bisect.bisect_left(cuts, back)
+        if j < len(cuts) and cuts[j] < end:
+            start = cuts[j]
+        else:
+            space = text.find(" ", back, end - 1)
+            start = space + 1 if space != -1 else back
+    chunks.append((start, len(text)))
+    return chunks
+
+def split_into_sentences(text: str) -> List[Tuple[int, int]]:
+    """Metni baştaki/sondaki boşluklardan arındırılmış, boş olmayan cümle/satır aralıklarına böl"""
+    sentences, last = [], 0
+    for cut in [m.end() for m in SENTENCE_END.finditer(text)] + [len(text)]:
+        start, end = last, cut
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            sentences.append((start, end))
+        last = cut
+    return sentences
+
+def locate_entities(entities: List[Dict[str, Any]], text: str, start: int, end: int) -> List[Dict[str, Any]]:
+    """Parça içinde bulunan varlıkları orijinal metindeki konumlarına taşı (metinde geçmeyenler atılır)"""
+    located = []
+    chunk = text[start:end]
     for entity in entities:
         value = entity.get('value', '')
         if not value:
             continue
-            
-        # Metinde değeri bul
-        actual_start = text.find(value)
-        if actual_start != -1:
-            validated_entities.append({
-                'type': entity['type'],
-                'value': value,
-                'start': actual_start,
-                'end': actual_start + len(value),
-                'confidence': entity.get('confidence', 0.9)
-            })
-    
-    # Sort entities by start position in reverse order to avoid index shifting
-    entities_sorted = sorted(validated_entities, key=lambda x: x['start'], reverse=True)
-
-    for entity in entities_sorted:
-        if masking_type == "replace":
-            if entity['type'] == "EMAIL":
-                replacement = "[EMAIL_MASKED]"
-            elif entity['type'] == "PHONE":
-                replacement = "[PHONE_MASKED]"
-            elif entity['type'] == "ID_NUMBER":
-                replacement = "[ID_MASKED]"
-            elif entity['type'] == "PERSON":
-                replacement = "[NAME_MASKED]"
-            elif entity['type'] == "BIRTH_DATE":
-                replacement = "[BIRTH_DATE_MASKED]"
-            elif entity['type'] == "BIRTH_PLACE":
-                replacement = "[BIRTH_PLACE_MASKED]"
-            elif entity['type'] == "ADDRESS":
-                replacement = "[ADDRESS_MASKED]"
-            elif entity['type'] == "IBAN":
-                replacement = "[IBAN_MASKED]"
-            elif entity['type'] == "CREDIT_CARD":
-                replacement = "[CARD_MASKED]"
-            elif entity['type'] == "IP_ADDRESS":
-                replacement = "[IP_MASKED]"
-            elif entity['type'] == "MAC_ADDRESS":
-                replacement = "[MAC_MASKED]"
-            elif entity['type'] == "IMEI":
-                replacement = "[IMEI_MASKED]"
-            elif entity['type'] == "LICENSE_PLATE":
-                replacement = "[PLATE_MASKED]"
-            elif entity['type'] == "PASSPORT":
-                replacement = "[PASSPORT_MASKED]"
-            elif entity['type'] == "DRIVER_LICENSE":
-                replacement = "[LICENSE_MASKED]"
-            elif entity['type'] == "TAX_NUMBER":
-                replacement = "[TAX_MASKED]"
-            elif entity['type'] == "GPS_COORDINATES":
-                replacement = "[GPS_MASKED]"
-            else:
-                replacement = "[MASKED]"
-        elif masking_type == "hash":
-            replacement = hashlib.md5(entity['value'].encode()).hexdigest()[:8]
-        elif masking_type == "encrypt":
-            replacement = f"ENC_{uuid.uuid4().hex[:8]}"
+        # LLM'in verdiği konuma en yakın geçişi al
+        hint = entity.get('start') if isinstance(entity.get('start'), int) else 0
+        positions = [m.start() for m in re.finditer(re.escape(value), chunk)]
+        if not positions:
+            continue
+        local = min(positions, key=lambda p: abs(p - hint))
+        located.append(dict(entity, start=start + local, end=start + local + len(value)))
+    return located
+
+def merge_chunk_entities(entities: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """Örtüşen parçalardan gelen aynı türdeki çakışan varlıkları birleştir (sınırda bölünen isim vb.);
+    birebir tekrarlar atılır, içerilen farklı değerler (ör. "Ahmet Yılmaz" içinde "Ahmet") ayrı kalır
+    çünkü metindeki diğer geçişleri de maskelenecektir"""
+    merged, last_by_type = [], {}
+    for entity in sorted(entities, key=lambda e: (e['start'], -e['end'])):
+        previous = last_by_type.get(entity['type'])
+        if previous is None or entity['start'] >= previous['end']:
+            merged.append(entity)
+            last_by_type[entity['type']] = entity
+            continue
+        if entity['end'] <= previous['end']:
+            if (entity['start'], entity['end']) != (previous['start'], previous['end']):
+                merged.append(entity)
+            continue
+        previous['end'] = entity['end']
+        previous['value'] = text[previous['start']:previous['end']]
+        previous['confidence'] = max(previous.get('confidence', 0.9), entity.get('confidence', 0.9))
+    return merged
+
+def new_llm_usage(calls: int) -> Dict[str, Any]:
+    """İstek başına prompt maliyeti (prompt sıkıştırmanın ve KV önbelleğinin etkisini ölçmek için)"""
+    return {"calls": calls, "failed_chunks": 0, "prompt_eval_count": 0, "prompt_eval_duration_ms": 0.0,
+            "eval_count": 0, "eval_duration_ms": 0.0}
+
+def add_llm_timings(usage: Dict[str, Any], timings: Dict[str, Any]):
+    for name in ("prompt_eval_count", "eval_count"):
+        usage[name] += timings.get(name, 0)
+    for name in ("prompt_eval_duration", "eval_duration"):
+        usage[f"{name}_ms"] += round(timings.get(name, 0) / 1e6, 1)
+
+async def detect_pii_in_chunks(text: str, rule_entities: List[Dict[str, Any]], model: str,
+                               types: Tuple[str, ...] = LLM_TYPES) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Parçaları CHUNK_CONCURRENCY sınırıyla eşzamanlı LLM'e gönder; (varlıklar, LLM kullanım özeti) döndür"""
+    chunks = split_into_chunks(text)
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def detect_chunk(start: int, end: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        # Parçaya düşen kural sonuçları (sınırda kesilenler dahil) LLM'e etiket olarak gider
+        local_rules = [dict(e, start=max(e['start'], start) - start, end=min(e['end'], end) - start)
+                       for e in rule_entities if e['start'] < end and e['end'] > start]
+        async with semaphore:
+            found, timings = await call_llm_for_pii_detection(
+                redact_structured_pii(text[start:end], local_rules), model, types)
+        return locate_entities(found, text, start, end), timings
+
+    results = await asyncio.gather(*(detect_chunk(start, end) for start, end in chunks), return_exceptions=True)
+    entities = []
+    usage = new_llm_usage(len(chunks))
+    for (start, end), result in zip(chunks, results):
+        if isinstance(result, Exception):
+            print(f"❌ Parça {start}-{end} tespit edilemedi: {result}")
+            usage["failed_chunks"] += 1
+            continue
+        found, timings = result
+        entities.extend(found)
+        add_llm_timings(usage, timings)
+    if len(chunks) > 1:
+        print(f"🧩 {len(chunks)} parça tarandı ({usage['failed_chunks']} başarısız)")
+    print(f"📏 {len(types)} PII türü, prompt_eval_count={usage['prompt_eval_count']}, "
+          f"prompt_eval_duration={usage['prompt_eval_duration_ms']:.1f}ms")
+    return merge_chunk_entities(entities, text), usage
+
+async def detect_pii_with_cache(text: str, rule_entities: List[Dict[str, Any]], model: str,
+                                types: Tuple[str, ...] = LLM_TYPES) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Önbellekte olan cümlelerin sonuçlarını doğrudan konumlarına taşı; yalnızca yeni cümleleri
+    (sırasıyla, satır satır birleştirilmiş olarak) parçalı LLM taramasına gönder"""
+    if SENTENCE_CACHE_SIZE <= 0:
+        return await detect_pii_in_chunks(text, rule_entities, model, types)
+
+    sentences = split_into_sentences(text)
+    entities, novel = [], {}  # önbellek anahtarı -> (etiketli cümle, bu cümlenin geçtiği aralıklar)
+    for start, end in sentences:
+        local_rules = [dict(e, start=max(e['start'], start) - start, end=min(e['end'], end) - start)
+                       for e in rule_entities if e['start'] < end and e['end'] > start]
+        redacted = redact_structured_pii(text[start:end], local_rules)
+        key = SentenceCache.key(redacted, model, types)
+        if key in novel:
+            novel[key][1].append((start, end))
+            continue
+        cached = sentence_cache.get(key)
+        if cached is None:
+            novel[key] = (redacted, [(start, end)])
         else:
-            replacement = "[MASKED]"
+            entities.extend(project_cached_entities(cached, text, start, end))
+
+    usage = new_llm_usage(0)
+    if novel:
+        # Yeni cümleler tek bir metinde birleştirilir (metinde art arda gelenler aradaki boşlukla, böylece
+        # "Av. Kerem Kaya" gibi bölünen ifadeler bütün kalır); bulunan varlıklar cümlelerine bölünüp önbelleğe yazılır
+        offsets, parts, pieces, position, previous_end = [], [], [], 0, None
+        for redacted, spans in novel.values():
+            start, end = spans[0]
+            if previous_end is not None:
+                gap = text[previous_end:start]
+                gap = gap if gap and gap.isspace() else "\n"
+                pieces.append(gap)
+                position += len(gap)
+            offsets.append(position)
+            parts.append(redacted)
+            pieces.append(redacted)
+            position += len(redacted)
+            previous_end = end
+        found, usage = await detect_pii_in_chunks("".join(pieces), [], model, types)
+        per_sentence = [[] for _ in parts]
+        for entity in found:
+            # Cümle sınırını aşan varlık (ör. "Av." sonrası bölünen isim) başladığı cümleye yazılır
+            i = bisect.bisect_right(offsets, entity['start']) - 1
+            per_sentence[i].append(dict(entity, start=entity['start'] - offsets[i], end=entity['end'] - offsets[i]))
+        for (key, (_, spans)), sentence_entities in zip(novel.items(), per_sentence):
+            # Başarısız parça varsa hangi cümlenin eksik tarandığı bilinmez, hiçbiri önbelleğe yazılmaz
+            if not usage["failed_chunks"]:
+                sentence_cache.put(key, sentence_entities)
+            for start, end in spans:
+                entities.extend(project_cached_entities(sentence_entities, text, start, end))
+
+    usage["sentences"] = len(sentences)
+    usage["cached_sentences"] = len(sentences) - sum(len(spans) for _, spans in novel.values())
+    print(f"🗂️ {len(sentences)} cümle, {usage['cached_sentences']} önbellekten, {len(novel)} yeni cümle LLM'e gitti")
+    return merge_chunk_entities(entities, text), usage
 
-        # Store masked entity info
+def pack_texts(texts: List[str], budget: int = BATCH_PACK_CHARS) -> List[List[int]]:
+    """Ardışık kısa metinleri toplamı budget'ı aşmayacak paketlere grupla (uzun metin tek başına kalır)"""
+    packs, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        cost = len(text) + len(PACK_SEPARATOR)
+        if current and size + cost > budget:
+            packs.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += cost
+    if current:
+        packs.append(current)
+    return packs
+
+async def detect_pii_in_pack(texts: List[str], rule_entities: List[List[Dict[str, Any]]], model: str,
+                             types: Tuple[str, ...]) -> Tuple[List[List[Dict[str, Any]]], Dict[str, Any]]:
+    """Birden çok kısa metni tek LLM çağrısında tara; bulunan değerler geçtikleri metinlere dağıtılır"""
+    if len(texts) == 1:
+        entities, usage = await detect_pii_with_cache(texts[0], rule_entities[0], model, types)
+        return [entities], usage
+
+    packed = PACK_SEPARATOR.join(redact_structured_pii(text, rules) for text, rules in zip(texts, rule_entities))
+    usage = new_llm_usage(1)
+    try:
+        found, timings = await call_llm_for_pii_detection(packed, model, types)
+    except Exception as e:
+        print(f"❌ Paket tespit edilemedi: {e}")
+        usage["failed_chunks"] = 1
+        return [[] for _ in texts], usage
+    add_llm_timings(usage, timings)
+    return [merge_chunk_entities(locate_entities(found, text, 0, len(text)), text) for text in texts], usage
+
+# replace maskelemede türe göre etiketler
+REPLACEMENTS = {
+    "EMAIL": "[EMAIL_MASKED]",
+    "PHONE": "[PHONE_MASKED]",
+    "ID_NUMBER": "[ID_MASKED]",
+    "PERSON": "[NAME_MASKED]",
+    "BIRTH_DATE": "[BIRTH_DATE_MASKED]",
+    "BIRTH_PLACE": "[BIRTH_PLACE_MASKED]",
+    "ADDRESS": "[ADDRESS_MASKED]",
+    "IBAN": "[IBAN_MASKED]",
+    "CREDIT_CARD": "[CARD_MASKED]",
+    "IP_ADDRESS": "[IP_MASKED]",
+    "MAC_ADDRESS": "[MAC_MASKED]",
+    "IMEI": "[IMEI_MASKED]",
+    "LICENSE_PLATE": "[PLATE_MASKED]",
+    "PASSPORT": "[PASSPORT_MASKED]",
+    "DRIVER_LICENSE": "[LICENSE_MASKED]",
+    "TAX_NUMBER": "[TAX_MASKED]",
+    "GPS_COORDINATES": "[GPS_MASKED]",
+}
+
+def replacement_for(entity: Dict[str, Any], masking_type: str) -> str:
+    if masking_type == "replace":
+        return REPLACEMENTS.get(entity['type'], "[MASKED]")
+    elif masking_type == "hash":
+        return hashlib.md5(entity['value'].encode()).hexdigest()[:8]
+    elif masking_type == "encrypt":
+        return f"ENC_{uuid.uuid4().hex[:8]}"
+    return "[MASKED]"
+
+def mask_text(text: str, entities: List[Dict[str, Any]], masking_type: str) -> tuple[str, List[Dict[str, Any]]]:
+    """Mask every occurrence of the detected values in a single pass and return masked text with masked entities info"""
+    # Aynı değer birden fazla türle geldiyse ilk gelen geçerlidir (kural sonuçları önce gelir)
+    by_value: Dict[str, Dict[str, Any]] = {}
+    for entity in entities:
+        value = entity.get('value', '')
+        if value and value not in by_value:
+            by_value[value] = entity
+    values = list(by_value)
+    index_of = {value: i for i, value in enumerate(values)}
+
+    # Konumu doğru verilen tespitler her durumda, değerin diğer geçişleri kelime sınırındaysa maskelenir
+    spans = []
+    for entity in entities:
+        value, start = entity.get('value', ''), entity.get('start')
+        if value and isinstance(start, int) and text[start:start + len(value)] == value:
+            spans.append((start, start + len(value), index_of[value]))
+    spans.extend(span for span in AhoCorasick(values).find_all(text) if on_word_boundary(text, span[0], span[1]))
+    spans = resolve_overlaps(spans)
+
+    # Aynı değer her geçişte aynı maskeyle değişir
+    replacements = [replacement_for(by_value[value], masking_type) for value in values]
+    masked_text = apply_spans(text, spans, replacements.__getitem__)
+
+    masked_entities = []
+    for start, end, index in spans:
+        entity = by_value[values[index]]
         masked_entities.append({
             "type": entity['type'],
-            "original_value": entity['value'],
-            "masked_value": replacement,
-            "start": entity['start'],
-            "end": entity['end'],
-            "confidence": entity['confidence']
+            "original_value": text[start:end],  # çakışan değerler birleştiyse birleşik aralık
+            "masked_value": replacements[index],
+            "start": start,
+            "end": end,
+            "confidence": entity.get('confidence', 0.9)
         })
 
-        masked_text = masked_text[:entity['start']] + replacement + masked_text[entity['end']:]
-
     return masked_text, masked_entities
 
 @app.post("/mask", response_model=MaskingResponse)
@@ -316,26 +593,311 @@ async def mask_pii(request: TextRequest):
     Mask PII (Personally Identifiable Information) in text using LLM
     """
     try:
-        # Detect PII entities using LLM
-        detected_entities = call_llm_for_pii_detection(request.text, request.model)
-
-        # Filter entities if specific types requested
-        if request.entities:
-            detected_entities = [e for e in detected_entities if e['type'] in request.entities]
-
-        # Mask the text
-        masked_text, masked_entities = mask_text(request.text, detected_entities, request.masking_type)
-
-        return MaskingResponse(
-            original_text=request.text,
-            masked_text=masked_text,
-            detected_entities=detected_entities,
-            masked_entities=masked_entities,
-            status="success",
-            model_used=request.model
-        )
+        # Yapısal PII'ı kurallarla tek geçişte bul
+        rule_entities = detect_structured_pii(request.text) if RULES_ENABLED else []
+        if not needs_llm(request.entities):
+            return build_masking_response(request.text, rule_entities, request.masking_type, request.entities)
+
+        # LLM bulunmuş değerleri değil [TÜR] etiketlerini görür, yalnızca anlamsal kategoriler ona kalır;
+        # uzun metinler parçalara bölünür, sonuçlar orijinal metindeki konumlarına taşınır
+        llm_entities, llm_usage = await detect_pii_with_cache(
+            request.text, rule_entities, request.model, llm_types_for(request.entities))
+        return build_masking_response(request.text, rule_entities + llm_entities, request.masking_type,
+                                      request.entities, request.model, llm_usage)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/mask/batch")
+async def mask_batch(request: Request):
+    """
+    Mask many texts in one call. Body is either a JSON BatchRequest or NDJSON (Content-Type:
+    application/x-ndjson, one JSON string or {"text": ..., "id": ...} object per line, options as
+    query parameters). Results are streamed back as NDJSON in input order.
+    """
+    ids: List[Any] = []
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        texts = []
+        for line in (await request.body()).decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise HTTPException(status_code=400, detail=f"Geçersiz NDJSON satırı {len(texts) + 1}: {e}")
+            texts.append(item if isinstance(item, str) else str(item.get("text", "")))
+            ids.append(None if isinstance(item, str) else item.get("id"))
+        params = request.query_params
+        batch = BatchRequest(texts=texts, masking_type=params.get("masking_type", "replace"),
+                             entities=params.getlist("entities"), model=params.get("model", "gemma3:27b"))
+    else:
+        try:
+            batch = BatchRequest(**await request.json())
+        except (json.JSONDecodeError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    if not batch.texts:
+        raise HTTPException(status_code=400, detail="Metin listesi boş olamaz")
+
+    return StreamingResponse(stream_batch_results(batch, ids), media_type="application/x-ndjson")
+
+async def stream_batch_results(batch: BatchRequest, ids: List[Any]):
+    """Paketleri BATCH_CONCURRENCY sınırıyla arka planda tara, sonuçları giriş sırasıyla NDJSON olarak yay"""
+    rule_entities = [detect_structured_pii(text) if RULES_ENABLED else [] for text in batch.texts]
+    packs = pack_texts(batch.texts) if needs_llm(batch.entities) else []
+    types = llm_types_for(batch.entities)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_pack(indexes: List[int]):
+        async with semaphore:
+            return await detect_pii_in_pack([batch.texts[i] for i in indexes],
+                                            [rule_entities[i] for i in indexes], batch.model, types)
+
+    tasks = [asyncio.ensure_future(run_pack(indexes)) for indexes in packs]
+    print(f"📦 Toplu maskeleme: {len(batch.texts)} metin, {len(packs)} LLM paketi")
+    try:
+        pack_of = {i: (n, position) for n, indexes in enumerate(packs) for position, i in enumerate(indexes)}
+        reported = set()
+        for i, text in enumerate(batch.texts):
+            line = {"index": i}
+            if ids and ids[i] is not None:
+                line["id"] = ids[i]
+            try:
+                if i in pack_of:
+                    n, position = pack_of[i]
+                    llm_entities, usage = await tasks[n]
+                    # Paketin maliyeti paylaşılır: metin satırında yalnızca paket numarası ve başarısızlık,
+                    # çağrı özeti paketin ilk satırında bir kez (pack_usage) raporlanır ki toplanınca şişmesin
+                    result = build_masking_response(text, rule_entities[i] + llm_entities[position],
+                                                    batch.masking_type, batch.entities, batch.model,
+                                                    {"pack": n, "failed_chunks": usage["failed_chunks"]})
+                    if n not in reported:
+                        reported.add(n)
+                        line["pack_usage"] = dict(usage, pack=n, texts_in_call=len(packs[n]))
+                else:
+                    result = build_masking_response(text, rule_entities[i], batch.masking_type, batch.entities)
+                line.update(result.dict(exclude={"original_text"}))
+            except Exception as e:
+                line.update({"status": "error", "error": str(e)})
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        # İstemci bağlantıyı kestiyse bekleyen paketler iptal edilir
+        for task in tasks:
+            task.cancel()
+
+@app.post("/mask/file")
+async def mask_file(
+    file: UploadFile = File(...),
+    masking_type: str = Form("replace"),
+    entities: str = Form(""),  # Virgülle ayrılmış türler (boş = tümü)
+    model: str = Form("gemma3:27b")
+):
+    """
+    Mask a .txt or .docx upload paragraph by paragraph and stream the masked file back
+    (same format, paragraph structure and run formatting preserved)
+    """
+    entity_types = [t.strip() for t in entities.split(",") if t.strip()]
+    name = os.path.basename(file.filename or "document")
+    extension = os.path.splitext(name)[1].lower()
+    headers = {"Content-Disposition": f'attachment; filename="masked_{name}"'}
+
+    if extension == ".txt":
+        segments = iter_text_segments(file.file, max_chars=CHUNK_CHARS)
+        async def stream_text():
+            async for piece in mask_segments(segments, masking_type, entity_types, model):
+                yield await run_cpu(str.encode, piece, "utf-8")
+        return StreamingResponse(stream_text(), media_type="text/plain; charset=utf-8", headers=headers)
+
+    if extension == ".docx":
+        # Zip merkezi dizini dosya sonundadır; yükleme diskte tutulduğundan yalnızca okunan üye belleğe gelir
+        try:
+            source = await run_cpu(open_docx, file.file)
+        except (zipfile.BadZipFile, KeyError):
+            raise HTTPException(status_code=400, detail="Geçerli bir .docx dosyası değil")
+        return StreamingResponse(
+            stream_masked_docx(source, masking_type, entity_types, model),
+            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            headers=headers)
+
+    raise HTTPException(status_code=400, detail="Sadece .txt ve .docx dosyaları desteklenir")
+
+async def stream_masked_docx(source: zipfile.ZipFile, masking_type: str, entities: List[str], model: str):
+    """Zip üyelerini sırayla yeni bir zip akışına yaz; metin parçaları paragraf paragraf maskelenir.
+    Okuma, açma/sıkıştırma ve kapatma worker havuzunda, her seferinde tek adım olarak çalışır"""
+    sink = StreamSink()
+    target = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED)
+    try:
+        for info, has_text in iter_docx_members(source):
+            member = zipfile.ZipInfo(info.filename, info.date_time)
+            member.compress_type = zipfile.ZIP_DEFLATED
+            src = await run_cpu(source.open, info)
+            try:
+                dst = await run_cpu(target.open, member, "w", force_zip64=True)
+                if has_text:
+                    async for piece in mask_segments(iter_xml_segments(src), masking_type, entities, model):
+                        yield await run_cpu(write_text, dst, sink, piece)
+                else:
+                    while (data := await run_cpu(copy_chunk, src, dst, sink)) is not None:
+                        yield data
+                yield await run_cpu(close_and_drain, dst, sink)
+            finally:
+                await run_cpu(src.close)
+        yield await run_cpu(close_and_drain, target, sink)
+    finally:
+        await run_cpu(source.close)
+
+async def mask_segments(segments, masking_type: str, entities: List[str], model: str):
+    """Paragrafları ~CHUNK_CHARS'lık gruplar hâlinde maskele; FILE_PIPELINE_DEPTH grup eşzamanlı taranırken
+    çıktı giriş sırasıyla üretilir (okuma, LLM taraması ve yazma birbirini beklemez)"""
+    pending = collections.deque()
+    stats = {"paragraphs": 0, "masked": 0, "failed_chunks": 0}
+    done = False
+    try:
+        while not done:
+            # Dosya okuma ve XML/metin taraması worker'da: bir sonraki grup dolana kadar segment çekilir
+            group, done = await run_cpu(next_segment_group, segments, CHUNK_CHARS)
+            if group:
+                pending.append(asyncio.ensure_future(mask_segment_group(group, masking_type, entities, model, stats)))
+            while pending and (len(pending) >= FILE_PIPELINE_DEPTH or done):
+                yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+    print(f"📄 Dosya maskelendi: {stats['paragraphs']} paragraf, {stats['masked']} maske"
+          + (f", ⚠️ {stats['failed_chunks']} parça LLM ile taranamadı" if stats["failed_chunks"] else ""))
+
+def prepare_segment_group(group) -> Tuple[List[Any], List[str], str, List[Dict[str, Any]]]:
+    """Grubun paragraflarını satır satır tek metinde birleştir ve kural motorunu çalıştır (worker'da)"""
+    paragraphs = [segment for segment in group if segment[0] == "para"]
+    pieces = []
+    for i, (_, texts, _) in enumerate(paragraphs):
+        pieces.extend(texts)
+        if i < len(paragraphs) - 1:
+            pieces.append("\n")
+    text = "".join(pieces)
+    return paragraphs, pieces, text, detect_structured_pii(text) if RULES_ENABLED else []
+
+def render_segment_group(group, paragraphs: List[Any], pieces: List[str], text: str,
+                         detected: List[Dict[str, Any]], masking_type: str) -> Tuple[str, int]:
+    """Birleşik metni maskele, maskeleri run'lara dağıtıp grubu yeniden yaz (worker'da); (çıktı, maske sayısı)"""
+    _, masked_entities = mask_text(text, detected, masking_type)
+    masked_pieces = iter(distribute(pieces, masked_entities))
+    output = []
+    for i, segment in enumerate(paragraphs):
+        output_texts = [next(masked_pieces) for _ in segment[1]]
+        if i < len(paragraphs) - 1:
+            next(masked_pieces)  # paragraf ayracı
+        output.append(segment[2](output_texts))
+    rendered = iter(output)
+    return "".join(next(rendered) if segment[0] == "para" else segment[1] for segment in group), len(masked_entities)
+
+async def mask_segment_group(group, masking_type: str, entities: List[str], model: str,
+                             stats: Dict[str, int]) -> str:
+    """Grubu tek metin olarak tara ve maskele; CPU adımları worker'da, LLM çağrısı event loop'ta bekler"""
+    paragraphs, pieces, text, detected = await run_cpu(prepare_segment_group, group)
+    if text.strip() and needs_llm(entities):
+        llm_entities, llm_usage = await detect_pii_with_cache(text, detected, model, llm_types_for(entities))
+        detected = detected + llm_entities
+        stats["failed_chunks"] += llm_usage.get("failed_chunks", 0)
+    if entities:
+        detected = [e for e in detected if e['type'] in entities]
+    output, masked = await run_cpu(render_segment_group, group, paragraphs, pieces, text, detected, masking_type)
+    stats["paragraphs"] += len(paragraphs)
+    stats["masked"] += masked
+    return output
+
+@app.post("/mask/session", response_model=SessionResponse)
+async def create_masking_session(request: TextRequest):
+    """
+    Mask a document and keep it as a versioned session; later versions sent to
+    PUT /mask/session/{session_id} are re-analyzed only where they changed
+    """
+    session = MaskingSession(uuid.uuid4().hex, {
+        "masking_type": request.masking_type, "entities": request.entities, "model": request.model})
+    sessions.add(session)
+    return await update_masking_session(session.id, SessionUpdate(text=request.text))
+
+@app.put("/mask/session/{session_id}", response_model=SessionResponse)
+async def update_masking_session(session_id: str, update: SessionUpdate):
+    """
+    Submit a new version of the session's document and get it re-masked incrementally
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Oturum bulunamadı ya da süresi doldu")
+    try:
+        async with session.lock:
+            text, options = update.text, session.options
+            sentences = split_into_sentences(text)
+            kept, regions, changed = plan_update(session, text, sentences)
+
+            # Yalnızca değişen bölgeler (komşu cümleleriyle) kurallarla ve LLM ile yeniden taranır
+            results = await asyncio.gather(*(detect_region(text, start, end, options) for start, end in regions))
+            entities = kept + [entity for found, _ in results for entity in found]
+            llm_usage = new_llm_usage(0)
+            for _, usage in results:
+                for name, value in usage.items():
+                    llm_usage[name] = llm_usage.get(name, 0) + value
+            response = build_masking_response(
+                text, entities, options["masking_type"], options["entities"],
+                options["model"] if needs_llm(options["entities"]) else "rules", llm_usage)
+
+            # Eksik taranan sürüm kaydedilmez; sonraki sürüm bu sürümün değişikliklerini de yeniden tarar
+            if not llm_usage["failed_chunks"]:
+                session.version += 1
+                session.text, session.sentences, session.entities = text, sentences, entities
+            reanalyzed = sum(end - start for start, end in regions)
+            print(f"✏️ Oturum {session_id[:8]} v{session.version}: {changed} cümle değişti, "
+                  f"{len(kept)} varlık korundu, {reanalyzed} karakter yeniden tarandı")
+            return SessionResponse(**response.dict(), session_id=session_id, version=session.version,
+                                   total_sentences=len(sentences), changed_sentences=changed,
+                                   reanalyzed_chars=reanalyzed)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/mask/session/{session_id}")
+async def delete_masking_session(session_id: str):
+    if not sessions.remove(session_id):
+        raise HTTPException(status_code=404, detail="Oturum bulunamadı ya da süresi doldu")
+    return {"status": "deleted", "session_id": session_id}
+
+async def detect_region(text: str, start: int, end: int,
+                        options: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """text[start:end] bölgesinde kurallar + LLM tespiti; konumlar tüm metne göre döner"""
+    region = text[start:end]
+    found = detect_structured_pii(region) if RULES_ENABLED else []
+    usage = {}
+    if needs_llm(options["entities"]):
+        llm_entities, usage = await detect_pii_with_cache(region, found, options["model"],
+                                                          llm_types_for(options["entities"]))
+        found = found + llm_entities
+    return [dict(e, start=e['start'] + start, end=e['end'] + start) for e in found], usage
+
+def needs_llm(entities: List[str]) -> bool:
+    """Yalnızca yapısal türler istendiyse LLM çağrısı tamamen atlanır"""
+    return not (RULES_ENABLED and entities and set(entities) <= STRUCTURED_TYPES)
+
+def build_masking_response(text: str, detected_entities: List[Dict[str, Any]], masking_type: str,
+                           entities_filter: List[str], model_used: str = "rules",
+                           llm_usage: Dict[str, Any] = None) -> MaskingResponse:
+    """İstenen türlere göre filtrele, maskele ve yanıtı oluştur (/mask ve /mask/batch ortak)"""
+    llm_usage = llm_usage or {}
+    # Filter entities if specific types requested
+    if entities_filter:
+        detected_entities = [e for e in detected_entities if e['type'] in entities_filter]
+
+    # Mask the text
+    masked_text, masked_entities = mask_text(text, detected_entities, masking_type)
+
+    return MaskingResponse(
+        original_text=text,
+        masked_text=masked_text,
+        detected_entities=detected_entities,
+        masked_entities=masked_entities,
+        # LLM taraması eksik kaldıysa metin tam maskelenmemiş olabilir
+        status="partial" if llm_usage.get("failed_chunks") else "success",
+        model_used=model_used,
+        llm_usage=llm_usage
+    )
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    PORT = int(os.getenv("PORT", 8000))
+    uvicorn.run(app, host="0.0.0.0", port=PORT)
@@ -0,0 +1,83 @@
+"""
+Cümle düzeyinde PII tespit önbelleği
+Antet, imza bloğu, yasal dipnot gibi tekrarlayan cümleler her çağrıda yeniden LLM'e gitmez: cümle
+(kurallarla etiketlenmiş hâliyle, boşlukları normalize edilerek) model ve tür kümesiyle birlikte
+özetlenir, bulunan varlıklar cümleye göreli konumlarıyla saklanır ve sonraki dokümanlarda cümlenin
+yeni konumuna taşınır. Kapasite LRU ile sınırlıdır.
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(sentence: str) -> str:
+    return WHITESPACE.sub(" ", sentence).strip()
+
+
+def value_pattern(value: str) -> "re.Pattern[str]":
+    """Değeri, boşluk farklılıklarına (çift boşluk, satır sonu) dayanıklı biçimde ara"""
+    return re.compile(r"\s+".join(map(re.escape, value.split())))
+
+
+def project(entities: List[Dict[str, Any]], text: str, start: int, end: int) -> List[Dict[str, Any]]:
+    """Cümleye göreli varlıkları text[start:end] içindeki geçişlerine taşı (bulunamayanlar atılır);
+    cümle sonunu aşan varlıklar için arama cümleden sonraki metne de uzanır"""
+    projected = []
+    for entity in entities:
+        if not entity["value"].strip():
+            continue
+        limit = max(end, min(len(text), start + entity["end"] + len(entity["value"])))
+        positions = [(m.start(), m.end()) for m in value_pattern(entity["value"]).finditer(text, start, limit)]
+        if not positions:
+            continue
+        s, e = min(positions, key=lambda p: abs(p[0] - start - entity["start"]))
+        projected.append(dict(entity, value=text[s:e], start=s, end=e))
+    return projected
+
+
+class SentenceCache:
+    """Cümle özeti -> cümleye göreli varlık listesi; en uzun süre kullanılmayan kayıt önce atılır"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[Dict[str, Any], ...]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(sentence: str, model: str, types: Tuple[str, ...]) -> str:
+        raw = "\x00".join((model, ",".join(types), normalize(sentence)))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entities = self.entries.get(key)
+        if entities is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return [dict(e) for e in entities]
+
+    def put(self, key: str, entities: List[Dict[str, Any]]):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = tuple(dict(e) for e in entities)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,228 @@
+"""
+Dosya maskeleme için akışlı okuma/yazma yardımcıları
+.txt dosyaları satır satır, .docx dosyaları ise XML parçaları (gövde, üst/alt bilgi, dipnot, yorum)
+üzerinde paragraf paragraf okunur; dosya hiçbir zaman bütünüyle belleğe alınmaz. Her paragraf
+("para", metin parçaları, render) olarak üretilir: maskeleme parçaların (satır ya da run metinleri)
+yeni hâliyle render'ı çağırır, paragraflar arasındaki XML/satır sonları ("raw", metin) olarak aynen geçer.
+Böylece run biçimlendirmesi ve paragraf yapısı olduğu gibi korunur.
+"""
+import codecs
+import html
+import itertools
+import re
+import zipfile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+Segment = Union[Tuple[str, str], Tuple[str, List[str], Callable[[List[str]], str]]]
+
+READ_CHUNK = 64 * 1024
+# Satır sonu gelmeden bu uzunluğa ulaşan metin cümle (yoksa boşluk) sınırından bölünür; tek satırlık
+# büyük dosyalar da belleği şişirmez
+MAX_SEGMENT_CHARS = 8 * 1024
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+# Metin içeren docx parçaları; diğer zip üyeleri (stiller, medya, ilişkiler) aynen kopyalanır
+DOCX_TEXT_PARTS = re.compile(r"word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml")
+# Paragraf açılış/kapanış etiketleri (w:pPr, w:pStyle vb. eşleşmez)
+PARAGRAPH_TAG = re.compile(r"<(/?)w:p(?=[\s/>])[^>]*>")
+# Run metinleri: normal, silinmiş (değişiklik izleme) ve alan kodu metinleri
+RUN_TEXT = re.compile(r"<w:(t|delText|instrText)(\s[^>]*?)?(?:/>|>(.*?)</w:\1>)", re.S)
+
+
+def split_point(text: str, limit: int) -> int:
+    """text[:limit] içindeki son cümle sonu, yoksa son boşluk (parçanın ikinci yarısında); ikisi de yoksa limit"""
+    head = text[:limit]
+    sentence_end = None
+    for sentence_end in SENTENCE_END.finditer(head, limit // 2):
+        pass
+    if sentence_end is not None:
+        return sentence_end.end()
+    space = max(head.rfind(" ", limit // 2), head.rfind("\t", limit // 2))
+    return space + 1 if space != -1 else limit
+
+
+def iter_text_segments(stream: BinaryIO, encoding: str = "utf-8-sig",
+                       max_chars: int = MAX_SEGMENT_CHARS) -> Iterator[Segment]:
+    """Metin dosyasını parça parça çöz; her satırın içeriği bir paragraf, satır sonu ham çıktıdır.
+    max_chars'ı aşan satırlar cümle/boşluk sınırından birden fazla paragrafa bölünür"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+
+    def paragraphs(content: str) -> Iterator[Segment]:
+        while len(content) > max_chars:
+            cut = split_point(content, max_chars)
+            yield "para", [content[:cut]], "".join
+            content = content[cut:]
+        yield "para", [content], "".join
+
+    while True:
+        data = stream.read(READ_CHUNK)
+        pending += decoder.decode(data, final=not data)
+        lines = pending.splitlines(keepends=True)
+        # Son satır (ya da satır sonunun \r\n'in yarısı) sonraki okumada tamamlanabilir
+        pending = lines.pop() if data and lines else ""
+        for line in lines:
+            content = line.rstrip("\r\n")
+            yield from paragraphs(content)
+            if len(line) > len(content):
+                yield "raw", line[len(content):]
+        # Satır sonu gelmeyen uzun satırın tamamlanmış baş kısmı beklemeden yayılır
+        while len(pending) > max_chars:
+            cut = split_point(pending, max_chars)
+            yield "para", [pending[:cut]], "".join
+            pending = pending[cut:]
+        if not data:
+            if pending:
+                yield "para", [pending], "".join
+            return
+
+
+def iter_xml_segments(stream: BinaryIO) -> Iterator[Segment]:
+    """WordprocessingML parçasını en dıştaki <w:p> paragraflarına ayırarak akışla oku;
+    iç içe paragraflar (metin kutuları) dıştaki paragrafla birlikte işlenir"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, start, pos, depth, eof = "", 0, 0, 0, False
+    while True:
+        match = PARAGRAPH_TAG.search(buffer, pos)
+        if match is None:
+            if eof:
+                break
+            # Yarım kalmış olabilecek son etiketten itibaren bekle, öncesini (paragraf dışındaysa) yay
+            lt = buffer.rfind("<", pos)
+            pos = lt if lt != -1 else len(buffer)
+            if depth == 0:
+                if pos > start:
+                    yield "raw", buffer[start:pos]
+                buffer, pos, start = buffer[pos:], 0, 0
+            data = stream.read(READ_CHUNK)
+            eof = not data
+            buffer += decoder.decode(data, final=eof)
+            continue
+
+        closing, self_closing = match.group(1) == "/", match.group().endswith("/>")
+        if not closing and depth == 0:
+            if match.start() > start:
+                yield "raw", buffer[start:match.start()]
+            start = match.start()
+        if closing:
+            depth -= 1
+        elif not self_closing:
+            depth += 1
+        pos = match.end()
+        if depth == 0:
+            yield paragraph_segment(buffer[start:pos])
+            buffer, pos, start = buffer[pos:], 0, 0
+    if start < len(buffer):
+        yield "raw", buffer[start:]
+
+
+def paragraph_segment(xml: str) -> Segment:
+    """Paragraf XML'inden run metinlerini çıkar; render yeni metinleri aynı etiketlere geri yazar"""
+    runs = list(RUN_TEXT.finditer(xml))
+
+    def render(texts: List[str]) -> str:
+        parts, last = [], 0
+        for run, text in zip(runs, texts):
+            parts.append(xml[last:run.start()])
+            tag, attrs = run.group(1), run.group(2) or ""
+            if text and text != text.strip() and "xml:space" not in attrs:
+                attrs += ' xml:space="preserve"'
+            parts.append(f"<w:{tag}{attrs}>{escape(text)}</w:{tag}>" if text or run.group(3) is not None
+                         else run.group())
+            last = run.end()
+        parts.append(xml[last:])
+        return "".join(parts)
+
+    return "para", [html.unescape(run.group(3) or "") for run in runs], render
+
+
+class StreamSink:
+    """zipfile için yalnızca yazılabilir hedef: yazılanlar drain() ile parça parça alınır
+    (tell/seek olmadığından zipfile veri tanımlayıcılı akış modunda yazar)"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def open_docx(stream: BinaryIO) -> zipfile.ZipFile:
+    """Merkezi dizini okuyup zip'i aç; geçerli bir docx değilse BadZipFile/KeyError"""
+    source = zipfile.ZipFile(stream)
+    try:
+        source.getinfo("word/document.xml")
+    except KeyError:
+        source.close()
+        raise
+    return source
+
+
+def next_segment_group(segments: Iterator[Segment], limit: int) -> Tuple[List[Segment], bool]:
+    """Paragraf metinleri toplamı limit'e ulaşana kadar segment oku; (grup, girdi bitti mi) döner"""
+    group, size = [], 0
+    for segment in segments:
+        group.append(segment)
+        if segment[0] == "para":
+            size += sum(map(len, segment[1])) + 1
+            if size >= limit:
+                return group, False
+    return group, True
+
+
+def copy_chunk(src: BinaryIO, dst: BinaryIO, sink: StreamSink) -> Optional[bytes]:
+    """Kaynak üyeden bir parça oku, hedefe sıkıştırarak yaz; üye bittiyse None"""
+    data = src.read(READ_CHUNK)
+    if not data:
+        return None
+    dst.write(data)
+    return sink.drain()
+
+
+def write_text(dst: BinaryIO, sink: StreamSink, text: str) -> bytes:
+    dst.write(text.encode("utf-8"))
+    return sink.drain()
+
+
+def close_and_drain(handle: Any, sink: StreamSink) -> bytes:
+    """Üyeyi/zip'i kapat (veri tanımlayıcısı ya da merkezi dizin yazılır) ve çıkan baytları döndür"""
+    handle.close()
+    return sink.drain()
+
+
+def iter_docx_members(source: zipfile.ZipFile) -> Iterator[Tuple[zipfile.ZipInfo, bool]]:
+    """Zip üyelerini sırayla, metin içeren parça olup olmadıklarıyla döndür"""
+    for info in source.infolist():
+        yield info, bool(DOCX_TEXT_PARTS.fullmatch(info.filename))
+
+
+def distribute(pieces: List[str], masked_entities: List[Dict[str, Any]]) -> List[str]:
+    """Birleşik metin üzerindeki maskeleri parçalara dağıt: maske değeri varlığın başladığı parçaya yazılır,
+    varlığın diğer parçalara taşan karakterleri silinir (run sınırında bölünen isimler için)"""
+    spans = sorted((e["start"], e["end"], e["masked_value"]) for e in masked_entities)
+    starts = [0] + list(itertools.accumulate(len(piece) for piece in pieces))
+    output, first = [], 0
+    for piece, piece_start, piece_end in zip(pieces, starts, starts[1:]):
+        while first < len(spans) and spans[first][1] <= piece_start:
+            first += 1
+        parts, last = [], piece_start
+        for start, end, masked_value in itertools.islice(spans, first, None):
+            if start >= piece_end:
+                break
+            parts.append(piece[last - piece_start:max(start, piece_start) - piece_start])
+            if start >= piece_start:
+                parts.append(masked_value)
+            last = min(end, piece_end)
+        parts.append(piece[last - piece_start:])
+        output.append("".join(parts))
+    return output
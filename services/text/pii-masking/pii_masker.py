@@ -0,0 +1,109 @@
+"""
+Tek geçişli, tüm geçişleri maskeleyen motor
+Tespit edilen tüm değerler bir Aho-Corasick otomatına yüklenir; metin bir kez taranarak her değerin
+her geçişi bulunur. Çakışan aralıklar soldan sağa tek taramada birleşimlerine indirilir (en uzun
+eşleşmenin türüyle maskelenir), maskeli metin tek bir join ile üretilir.
+"""
+import re
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+Span = Tuple[int, int, int]  # (start, end, desen no)
+
+
+class AhoCorasick:
+    """Çoklu desen otomatı: tüm desenlerin tüm geçişlerini O(metin + eşleşme) sürede bulur"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail = [0]
+        self.out: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                node = nxt
+            if pattern:
+                self.out[node] += (index,)
+
+        # Başarısızlık bağlantıları (BFS); bir düğümün çıktıları, bağlandığı düğümün çıktılarını da içerir
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(ch, 0)
+                self.out[child] += self.out[self.fail[child]]
+
+        # Kökteyken hiçbir desenin başlamadığı karakterler regex ile atlanır
+        first_chars = "".join(sorted(self.goto[0]))
+        self.first = re.compile("[" + "".join(map(re.escape, first_chars)) + "]") if first_chars else None
+
+    def find_all(self, text: str) -> Iterator[Span]:
+        if self.first is None:
+            return
+        goto, fail, out = self.goto, self.fail, self.out
+        lengths = [len(p) for p in self.patterns]
+        node, i, n = 0, 0, len(text)
+        while i < n:
+            if not node:
+                m = self.first.search(text, i)
+                if m is None:
+                    return
+                i = m.start()
+            ch = text[i]
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            i += 1
+            for index in out[node]:
+                yield i - lengths[index], i, index
+
+
+def on_word_boundary(text: str, start: int, end: int) -> bool:
+    """Harf/rakamla başlayıp biten değerler, başka bir kelimenin parçası olarak eşleşmez"""
+    if start > 0 and text[start].isalnum() and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end - 1].isalnum() and text[end].isalnum():
+        return False
+    return True
+
+
+def resolve_overlaps(spans: Iterable[Span]) -> List[Span]:
+    """Çakışan aralıkları tek sıralama + doğrusal taramayla birleşimlerine indir; hiçbir tespit edilen karakter
+    maskesiz kalmaz. Birleşik aralık, içindeki en uzun eşleşmenin desen no'sunu alır (eşitlikte önce başlayan,
+    sonra küçük desen no). Başlangıca göre sıralı döner"""
+    chosen: List[Span] = []
+    longest = 0  # son birleşik aralıktaki en uzun eşleşmenin uzunluğu
+    for start, end, index in sorted(spans, key=lambda s: (s[0], s[0] - s[1], s[2])):
+        if chosen and start < chosen[-1][1]:
+            last_start, last_end, last_index = chosen[-1]
+            if end - start > longest:
+                last_index, longest = index, end - start
+            chosen[-1] = (last_start, max(last_end, end), last_index)
+        else:
+            chosen.append((start, end, index))
+            longest = end - start
+    return chosen
+
+
+def apply_spans(text: str, spans: List[Span], replacement: Callable[[int], str]) -> str:
+    """Sıralı, çakışmasız aralıkları değiştirerek maskeli metni tek join ile üret"""
+    parts, last = [], 0
+    for start, end, index in spans:
+        parts.append(text[last:start])
+        parts.append(replacement(index))
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
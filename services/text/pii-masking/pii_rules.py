@@ -0,0 +1,137 @@
+"""
+Yapısal PII için deterministik ön tespit motoru
+TCKN, IBAN, kredi kartı, e-posta, telefon, IP/MAC, IMEI ve plaka gibi sözdizimsel varlıklar
+tek bir derlenmiş regex ile metin üzerinde tek geçişte bulunur; aday eşleşmeler checksum /
+yapı kontrolünden geçmeden raporlanmaz. LLM'e yalnızca anlamsal kategoriler kalır.
+"""
+import ipaddress
+import re
+from typing import Any, Dict, List
+
+# Bu modülün tam olarak tespit ettiği türler (LLM'e gerek kalmadan)
+STRUCTURED_TYPES = frozenset({
+    "ID_NUMBER", "IBAN", "CREDIT_CARD", "EMAIL", "PHONE",
+    "IP_ADDRESS", "MAC_ADDRESS", "IMEI", "LICENSE_PLATE",
+})
+
+# Sıra önemlidir: aynı konumda birden fazla kural eşleşebiliyorsa ilk yazılan kazanır
+_RULES = [
+    ("EMAIL", r"(?<![\w.%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?![\w-])"),
+    ("IBAN", r"(?<![A-Za-z0-9])[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?(?![A-Za-z0-9])"),
+    ("MAC_ADDRESS", r"(?<![\w:-])(?:[0-9A-Fa-f]{2}(?P<macsep>[:-])(?:[0-9A-Fa-f]{2}(?P=macsep)){4}[0-9A-Fa-f]{2}"
+                    r"|[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4})(?![\w:-])"),
+    ("IPV4", r"(?<![\d.])(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(?!\.?\d)"),
+    ("IPV6", r"(?<![\w:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}(?![\w:])"),
+    # 13-19 hane, tutarlı ayraçla gruplanmış (4-4-4-x, Amex 4-6-5); 15 hane IMEI de buraya düşer
+    ("CARD", r"(?<![\d-])(?:\d{4}(?P<cardsep>[ -]?)\d{4}(?P=cardsep)\d{4}(?P=cardsep)\d{1,7}"
+             r"|\d{4}[ -]\d{6}[ -]\d{5}|\d{2}-\d{6}-\d{6}-\d)(?![\d-])"),
+    ("ID_NUMBER", r"(?<!\d)[1-9]\d{10}(?!\d)"),
+    ("PHONE", r"(?<![\w+])(?:(?:\+|00)90[ -]?\(?0?|\(?0)[ -]?\(?[2-58]\d{2}\)?[ -]?\d{3}[ -]?\d{2}[ -]?\d{2}(?!\d)"
+              r"|(?<![\w+])5\d{2}[ -]?\d{3}[ -]?\d{2}[ -]?\d{2}(?!\d)"),
+    ("LICENSE_PLATE", r"(?<![\w])(?:0[1-9]|[1-7]\d|8[01]) ?[A-PR-VYZ]{1,3} ?\d{2,4}(?![\w])"),
+]
+
+# Harfin hemen ardından eşleşme başlatılmaz: kelime içindeki konumlar tek kontrolle elenir (~4x hız)
+PATTERN = re.compile(r"(?<![^\W\d_])(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _RULES) + ")")
+
+# Ülke koduna göre IBAN uzunlukları (yaygın olanlar; diğerleri için 15-34 aralığı kabul edilir)
+IBAN_LENGTHS = {"TR": 26, "DE": 22, "GB": 22, "FR": 27, "NL": 18, "IT": 27, "ES": 24, "AT": 20, "CH": 21, "BE": 16}
+
+
+def tckn_valid(digits: str) -> bool:
+    """T.C. Kimlik No: 10. ve 11. hane kontrol basamakları"""
+    if len(digits) != 11 or digits[0] == "0":
+        return False
+    d = [int(c) for c in digits]
+    tenth = ((d[0] + d[2] + d[4] + d[6] + d[8]) * 7 - (d[1] + d[3] + d[5] + d[7])) % 10
+    return d[9] == tenth and d[10] == sum(d[:10]) % 10
+
+
+def iban_valid(iban: str) -> bool:
+    """ISO 13616 mod-97 kontrolü"""
+    iban = iban.replace(" ", "")
+    expected = IBAN_LENGTHS.get(iban[:2])
+    if (expected and len(iban) != expected) or not 15 <= len(iban) <= 34:
+        return False
+    rearranged = iban[4:] + iban[:4]
+    return int("".join(str(int(c, 36)) for c in rearranged)) % 97 == 1
+
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for i, c in enumerate(reversed(digits)):
+        n = int(c)
+        if i % 2:
+            n = n * 2 - 9 if n > 4 else n * 2
+        total += n
+    return total % 10 == 0
+
+
+def plate_valid(plate: str) -> bool:
+    """Türk plakası: 1 harf + 4 rakam, 2 harf + 3-4 rakam, 3 harf + 2-3 rakam"""
+    m = re.fullmatch(r"(\d{2}) ?([A-Z]+) ?(\d+)", plate)
+    if not m:
+        return False
+    letters, numbers = len(m.group(2)), len(m.group(3))
+    return (letters, numbers) in {(1, 4), (2, 3), (2, 4), (3, 2), (3, 3)}
+
+
+def classify(rule: str, value: str) -> str:
+    """Aday eşleşmeyi doğrula; geçerliyse PII türünü, değilse boş string döndür"""
+    if rule == "EMAIL":
+        return "EMAIL"
+    if rule == "IBAN":
+        return "IBAN" if iban_valid(value) else ""
+    if rule == "MAC_ADDRESS":
+        return "MAC_ADDRESS"
+    if rule in ("IPV4", "IPV6"):
+        try:
+            ipaddress.ip_address(value)
+        except ValueError:
+            return ""
+        return "IP_ADDRESS"
+    if rule == "CARD":
+        digits = re.sub(r"\D", "", value)
+        if not 13 <= len(digits) <= 19 or not luhn_valid(digits):
+            return ""
+        # 15 haneli Luhn geçerli numaralar Amex (34/37) değilse IMEI'dir
+        if len(digits) == 15 and digits[:2] not in ("34", "37"):
+            return "IMEI"
+        return "CREDIT_CARD"
+    if rule == "ID_NUMBER":
+        return "ID_NUMBER" if tckn_valid(value) else ""
+    if rule == "PHONE":
+        return "PHONE"
+    if rule == "LICENSE_PLATE":
+        return "LICENSE_PLATE" if plate_valid(value) else ""
+    return ""
+
+
+def detect(text: str, types=None) -> List[Dict[str, Any]]:
+    """Metni tek geçişte tara, doğrulanmış yapısal varlıkları konumlarıyla döndür"""
+    entities = []
+    for match in PATTERN.finditer(text):
+        pii_type = classify(match.lastgroup, match.group())
+        if pii_type and (not types or pii_type in types):
+            entities.append({
+                "type": pii_type,
+                "value": match.group(),
+                "start": match.start(),
+                "end": match.end(),
+                "confidence": 1.0,
+                "source": "rule",
+            })
+    return entities
+
+
+def redact(text: str, entities: List[Dict[str, Any]]) -> str:
+    """Bulunan varlıkları [TÜR] etiketiyle değiştir (LLM'e giden metin için)"""
+    parts, last = [], 0
+    for entity in sorted(entities, key=lambda e: e["start"]):
+        if entity["start"] < last:
+            continue
+        parts.append(text[last:entity["start"]])
+        parts.append(f"[{entity['type']}]")
+        last = entity["end"]
+    parts.append(text[last:])
+    return "".join(parts)
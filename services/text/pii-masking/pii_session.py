@@ -0,0 +1,113 @@
+"""
+Sürümlü maskeleme oturumları
+Bir oturum, belgenin son sürümünü, cümle aralıklarını ve tespit edilen varlıkları saklar. Yeni sürüm
+gelince cümle listeleri karşılaştırılır: değişmeyen cümlelerdeki varlıkların yalnızca konumları
+kaydırılır, tespit (kurallar + LLM) sadece değişen cümlelerde ve bir komşu cümlelik bağlamlarında
+yeniden çalışır.
+"""
+import asyncio
+import bisect
+import difflib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+
+class MaskingSession:
+    def __init__(self, session_id: str, options: Dict[str, Any]):
+        self.id = session_id
+        self.options = options  # masking_type, entities, model (oturum boyunca sabit)
+        self.version = 0
+        self.text = ""
+        self.sentences: List[Span] = []
+        self.entities: List[Dict[str, Any]] = []
+        self.lock = asyncio.Lock()
+        self.touched = time.monotonic()
+
+
+class SessionStore:
+    """Oturumlar bellekte tutulur; en eski kullanılan önce atılır, ttl saniye dokunulmayan oturum düşer"""
+
+    def __init__(self, max_sessions: int, ttl: float):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions: "OrderedDict[str, MaskingSession]" = OrderedDict()
+
+    def add(self, session: MaskingSession):
+        self.sessions[session.id] = session
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[MaskingSession]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if time.monotonic() - session.touched > self.ttl:
+            del self.sessions[session_id]
+            return None
+        session.touched = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+
+def diff_sentences(old: List[str], new: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """Cümle listelerinin farkı (difflib opcodes); ortak baş/son önceden ayrılır ki tek cümlelik
+    düzenleme uzun belgede de doğrusal sürede çözülsün"""
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(old), len(new)) - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    opcodes = [("equal", 0, prefix, 0, prefix)] if prefix else []
+    matcher = difflib.SequenceMatcher(None, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix],
+                                      autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(("equal", len(old) - suffix, len(old), len(new) - suffix, len(new)))
+    return opcodes
+
+
+def plan_update(session: MaskingSession, text: str,
+                sentences: List[Span]) -> Tuple[List[Dict[str, Any]], List[Span], int]:
+    """Yeni metin için (konumu kaydırılarak korunan varlıklar, yeniden taranacak bölgeler, değişen cümle sayısı)"""
+    old = [session.text[s:e] for s, e in session.sentences]
+    new = [text[s:e] for s, e in sentences]
+
+    mapping: Dict[int, int] = {}  # değişmeyen eski cümle -> yeni cümle
+    dirty = set()  # yeniden taranacak yeni cümleler (değişenler ve birer komşuları)
+    changed = 0
+    for tag, i1, i2, j1, j2 in diff_sentences(old, new):
+        if tag == "equal":
+            mapping.update(zip(range(i1, i2), range(j1, j2)))
+            continue
+        changed += max(i2 - i1, j2 - j1)
+        dirty.update(range(max(j1 - 1, 0), min(j2 + 1, len(new))))
+
+    starts = [s for s, _ in session.sentences]
+    kept = []
+    for entity in session.entities:
+        i = max(bisect.bisect_right(starts, entity["start"]) - 1, 0)
+        j = mapping.get(i)
+        if j is None or j in dirty:
+            continue
+        shift = sentences[j][0] - session.sentences[i][0]
+        start, end = entity["start"] + shift, entity["end"] + shift
+        # Cümleler arası boşluk değiştiyse cümle sınırını aşan varlık tutmaz; bölge yeniden taranmaz, atılır
+        if text[start:end] == entity["value"]:
+            kept.append(dict(entity, start=start, end=end))
+
+    regions: List[Span] = []
+    for j in sorted(dirty):
+        if regions and j - 1 in dirty:
+            regions[-1] = (regions[-1][0], sentences[j][1])
+        else:
+            regions.append(sentences[j])
+    return kept, regions, changed
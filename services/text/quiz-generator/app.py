@@ -1,14 +1,22 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from enum import Enum
 import uvicorn
-import requests
+import asyncio
 import json
 import uuid
 import os
-from datetime import datetime
+import sys
+import time
+
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from ollama_client import AsyncOllamaClient, OllamaError
+from quiz_store import QuizStore
+from quiz_bank import QuestionBank
+from quiz_dedup import QuestionIndex
 
 class QuestionType(str, Enum):
     MULTIPLE_CHOICE = "multiple_choice"
@@ -35,9 +43,123 @@ app.add_middleware(
 # Ollama konfigürasyonu
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:27b")
+ollama = AsyncOllamaClient("quiz-generator", base_url=OLLAMA_BASE_URL, model=MODEL_NAME)
+
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+
+# Soru tipi başına LLM çağrıları eşzamanlı yapılır; eksik dönen tip aynı turda en fazla bu kadar tamamlanır
+QUIZ_GENERATION_CONCURRENCY = int(os.getenv("QUIZ_GENERATION_CONCURRENCY", "4"))
+QUIZ_REFILL_ATTEMPTS = int(os.getenv("QUIZ_REFILL_ATTEMPTS", "2"))
+
+# Yakın tekrar filtresi: kabul edilmiş bir soruya kök kümesi Jaccard benzerliği bu eşiği geçen soru atılır ve
+# yalnızca açık kadar soru, son QUIZ_EXCLUDE_PROMPT_LIMIT kabul edilmiş soru prompt'a eklenerek yeniden istenir
+# (QUIZ_DUPLICATE_THRESHOLD > 1: kapalı)
+QUIZ_DUPLICATE_THRESHOLD = float(os.getenv("QUIZ_DUPLICATE_THRESHOLD", "0.6"))
+QUIZ_EXCLUDE_PROMPT_LIMIT = int(os.getenv("QUIZ_EXCLUDE_PROMPT_LIMIT", "30"))
+
+# Quiz session yönetimi: oturumlar SQLite (WAL) deposunda tutulur; eski JSON oturumları açılışta aktarılır
+QUIZ_SESSIONS_DIR = os.getenv("QUIZ_SESSIONS_DIR", "/app/quiz_sessions")
+QUIZ_DB_PATH = os.getenv("QUIZ_DB_PATH", os.path.join(QUIZ_SESSIONS_DIR, "quiz.db"))
+QUIZ_SESSION_TTL = float(os.getenv("QUIZ_SESSION_TTL", str(7 * 24 * 3600)))
+QUIZ_PURGE_INTERVAL = float(os.getenv("QUIZ_PURGE_INTERVAL", "3600"))
+
+# Soru bankası: doküman başına tip/zorluk kovaları; kullanıcıya sorulmamış soru sayısı QUIZ_BANK_LOW_WATERMARK'ın
+# altına inen kova arka planda QUIZ_BANK_REFILL_BATCH soruyla doldurulur (QUIZ_BANK_MAX_PER_BUCKET=0: kapalı)
+QUIZ_BANK_MAX_PER_BUCKET = int(os.getenv("QUIZ_BANK_MAX_PER_BUCKET", "200"))
+QUIZ_BANK_LOW_WATERMARK = int(os.getenv("QUIZ_BANK_LOW_WATERMARK", "10"))
+QUIZ_BANK_REFILL_BATCH = int(os.getenv("QUIZ_BANK_REFILL_BATCH", "10"))
+QUIZ_BANK_WORKERS = int(os.getenv("QUIZ_BANK_WORKERS", "1"))
+QUIZ_BANK_TTL = float(os.getenv("QUIZ_BANK_TTL", str(30 * 24 * 3600)))
+# Doldurma çağrısından hiç yeni (tekrar olmayan) soru çıkmayan kova bu süre boyunca yeniden doldurulmaz
+QUIZ_BANK_EXHAUSTED_BACKOFF = float(os.getenv("QUIZ_BANK_EXHAUSTED_BACKOFF", "3600"))
+
+quiz_store: Optional[QuizStore] = None
+question_bank: Optional[QuestionBank] = None
+background_tasks: List[asyncio.Task] = []
+refill_queue: Optional["asyncio.Queue[Tuple[str, str, str]]"] = None
+refill_pending = set()  # kuyrukta ya da işlenmekte olan (doküman, tip, zorluk) kovaları
+refill_exhausted: Dict[Tuple[str, str, str], float] = {}  # yeni soru çıkmayan kova -> son deneme zamanı
+
+async def purge_expired_quizzes():
+    """Süresi dolan quiz oturumlarını ve uzun süre kullanılmayan banka dokümanlarını periyodik olarak sil"""
+    while True:
+        try:
+            deleted = await quiz_store.run(quiz_store.purge_expired)
+            if deleted:
+                print(f"🧹 Süresi dolan {deleted} quiz oturumu silindi")
+            deleted = await quiz_store.run(question_bank.purge_expired)
+            if deleted:
+                print(f"🧹 Kullanılmayan {deleted} dokümanın soru bankası silindi")
+            expired = [job for job, at in refill_exhausted.items() if time.time() - at >= QUIZ_BANK_EXHAUSTED_BACKOFF]
+            for job in expired:
+                del refill_exhausted[job]
+        except Exception as e:
+            print(f"⚠️ Quiz oturumu temizliği başarısız: {e}")
+        await asyncio.sleep(QUIZ_PURGE_INTERVAL)
+
+async def refill_question_bank():
+    """Kuyruktaki kovalar için arka planda soru üretip bankaya ekle"""
+    while True:
+        job = await refill_queue.get()
+        doc_key, question_type, difficulty = job
+        try:
+            text = await quiz_store.run(question_bank.document_text, doc_key)
+            if text is None:
+                continue
+            questions_data = await call_ollama_for_quiz_generation(
+                text=text,
+                num_questions=QUIZ_BANK_REFILL_BATCH,
+                difficulty=difficulty,
+                question_type=question_type,
+                exclude=await quiz_store.run(question_bank.recent_questions, doc_key, QUIZ_EXCLUDE_PROMPT_LIMIT)
+            )
+            questions = build_questions(questions_data, QuestionType(question_type), DifficultyLevel(difficulty))
+            added = await quiz_store.run(question_bank.add, doc_key, text, [q.dict() for q in questions])
+            if not added:
+                refill_exhausted[job] = time.time()
+            print(f"🏦 Soru bankası dolduruldu: {doc_key[:8]} {question_type}/{difficulty} +{added} "
+                  f"({len(questions) - added} tekrar/fazla atıldı)")
+        except Exception as e:
+            print(f"⚠️ Soru bankası doldurulamadı ({question_type}/{difficulty}): {e}")
+        finally:
+            refill_pending.discard(job)
+
+async def schedule_bank_refill(doc_key: str, buckets: List[Tuple[str, str]], user_id: Optional[str]) -> int:
+    """Azalan kovaları arka plan doldurma kuyruğuna ekle; eklenen kova sayısını döner"""
+    scheduled = 0
+    for bucket in await quiz_store.run(question_bank.low_buckets, doc_key, buckets, user_id):
+        job = (doc_key, *bucket)
+        exhausted_at = refill_exhausted.get(job)
+        if exhausted_at is not None and time.time() - exhausted_at < QUIZ_BANK_EXHAUSTED_BACKOFF:
+            continue
+        if job not in refill_pending:
+            refill_pending.add(job)
+            refill_queue.put_nowait(job)
+            scheduled += 1
+    return scheduled
+
+@app.on_event("startup")
+async def open_quiz_store():
+    global quiz_store, question_bank, refill_queue
+    quiz_store = QuizStore(QUIZ_DB_PATH, QUIZ_SESSION_TTL)
+    refill_queue = asyncio.Queue()
+    question_bank = QuestionBank(quiz_store, QUIZ_BANK_MAX_PER_BUCKET, QUIZ_BANK_LOW_WATERMARK, QUIZ_BANK_TTL,
+                                 QUIZ_DUPLICATE_THRESHOLD)
+    imported = await quiz_store.run(quiz_store.import_json_sessions, QUIZ_SESSIONS_DIR)
+    if imported:
+        print(f"📦 {imported} JSON quiz oturumu SQLite deposuna aktarıldı")
+    background_tasks.append(asyncio.create_task(purge_expired_quizzes()))
+    if question_bank.enabled:
+        background_tasks.extend(asyncio.create_task(refill_question_bank()) for _ in range(QUIZ_BANK_WORKERS))
 
-# Quiz session yönetimi
-QUIZ_SESSIONS_DIR = "/app/quiz_sessions"
+@app.on_event("shutdown")
+async def close_quiz_store():
+    for task in background_tasks:
+        task.cancel()
+    if quiz_store:
+        quiz_store.close()
 
 class QuizRequest(BaseModel):
     text: str
@@ -45,6 +167,7 @@ class QuizRequest(BaseModel):
     question_types: List[QuestionType] = [QuestionType.MULTIPLE_CHOICE]
     difficulty: DifficultyLevel = DifficultyLevel.MEDIUM
     topics: List[str] = []
+    user_id: Optional[str] = None  # Verilirse bankadan bu kullanıcıya daha önce sorulmamış sorular seçilir
 
 class Question(BaseModel):
     question: str
@@ -54,19 +177,37 @@ class Question(BaseModel):
     explanation: Optional[str] = None
     difficulty: DifficultyLevel
 
+def quiz_source(bank_count: int, live_count: int) -> str:
+    if not bank_count and not live_count:
+        return "none"
+    return "bank" if not live_count else "live" if not bank_count else "mixed"
+
 class QuizResponse(BaseModel):
     quiz_id: str
     questions: List[Question]
     total_questions: int
     estimated_time: int  # in minutes
-    status: str
+    status: str  # "success" ya da istenenden az soru üretilebildiyse "partial"
+    requested_questions: int = 0
+    missing_questions: int = 0  # tekrar filtresi ve tamamlama çağrılarından sonra hâlâ eksik kalan soru
+    source: str = "live"  # "bank", "live", "mixed" ya da soru üretilemediyse "none"
+    bank_questions: int = 0
+    live_questions: int = 0
+    duplicates_removed: int = 0
+    bank_key: Optional[str] = None
 
-def call_ollama_for_quiz_generation(text: str, num_questions: int, difficulty: str, question_type: str) -> List[Dict]:
-    """Ollama ile quiz soruları üret"""
+async def call_ollama_for_quiz_generation(text: str, num_questions: int, difficulty: str, question_type: str,
+                                          exclude: Optional[List[str]] = None) -> List[Dict]:
+    """Ollama ile quiz soruları üret; exclude'daki sorular ve benzerleri tekrar istenmez"""
     try:
+        exclusions = ""
+        if exclude:
+            exclusions = ("\nAşağıdaki sorular zaten var; bunları ya da aynı bilgiyi soran benzerlerini tekrar üretme:\n"
+                          + "\n".join(f"- {question}" for question in exclude) + "\n")
         prompt = f"""Aşağıdaki metinden {num_questions} adet {difficulty} seviyesinde {question_type} sorusu üret.
 
 Metin: {text}
+{exclusions}
 
 Her soru için şu JSON formatını kullan:
 {{
@@ -89,41 +230,29 @@ Kurallar:
 
 JSON:"""
 
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3,
-                    "top_p": 0.9
-                }
-            },
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            llm_response = result.get("response", "")
-            
-            # JSON parse
-            try:
-                json_start = llm_response.find('{')
-                json_end = llm_response.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    json_str = llm_response[json_start:json_end]
-                    parsed = json.loads(json_str)
-                    return parsed.get("questions", [])
-            except json.JSONDecodeError:
-                pass
-            
-            # Fallback manual parsing
-            return parse_quiz_response_manually(llm_response)
-        else:
-            print(f"Ollama API error: {response.status_code}")
-            return []
-            
+        result = await ollama.generate(prompt, options={
+            "temperature": 0.3,
+            "top_p": 0.9
+        })
+        llm_response = result.text
+
+        # JSON parse
+        try:
+            json_start = llm_response.find('{')
+            json_end = llm_response.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                json_str = llm_response[json_start:json_end]
+                parsed = json.loads(json_str)
+                return parsed.get("questions", [])
+        except json.JSONDecodeError:
+            pass
+
+        # Fallback manual parsing
+        return parse_quiz_response_manually(llm_response)
+
+    except OllamaError as e:
+        print(f"Ollama API error: {e}")
+        return []
     except Exception as e:
         print(f"Error calling Ollama: {e}")
         return []
@@ -135,20 +264,112 @@ def parse_quiz_response_manually(response: str) -> List[Dict]:
     # Bu kısım LLM yanıtı başarısız olursa fallback olarak çalışır
     return questions
 
+# LLM'in Türkçe ya da farklı yazımla döndürdüğü zorluk değerleri
+DIFFICULTY_ALIASES = {"kolay": DifficultyLevel.EASY, "orta": DifficultyLevel.MEDIUM, "zor": DifficultyLevel.HARD}
+
+def parse_difficulty(value: Any, default: DifficultyLevel) -> DifficultyLevel:
+    """LLM'in döndürdüğü zorluğu enum'a çevir; tanınmayan değerde istenen zorluk kullanılır"""
+    normalized = str(value or "").strip().lower()
+    try:
+        return DifficultyLevel(normalized)
+    except ValueError:
+        return DIFFICULTY_ALIASES.get(normalized, default)
+
+def build_questions(questions_data: List[Dict], question_type: QuestionType,
+                    difficulty: DifficultyLevel) -> List[Question]:
+    """LLM'den gelen soru sözlüklerini Question objelerine dönüştür; doğrulanamayan soru atlanır
+    (tek bir bozuk alan aynı turdaki diğer tiplerin sorularını düşürmesin)"""
+    questions = []
+    for q_data in questions_data:
+        try:
+            questions.append(Question(
+                question=q_data.get("question", ""),
+                question_type=question_type,
+                options=q_data.get("options", []),
+                correct_answer=q_data.get("correct_answer", ""),
+                explanation=q_data.get("explanation", ""),
+                difficulty=parse_difficulty(q_data.get("difficulty"), difficulty)
+            ))
+        except (AttributeError, ValueError) as e:
+            print(f"⚠️ Geçersiz soru atlandı ({question_type.value}): {e}")
+    return questions
+
+def split_question_quota(num_questions: int, question_types: List[QuestionType]) -> List[Tuple[QuestionType, int]]:
+    """Soru sayısını tiplere böl; kalan sorular ilk tiplere birer birer dağıtılır (ayrı bir tamamlama çağrısı gerekmez)"""
+    base, extra = divmod(num_questions, len(question_types))
+    quotas = [(question_type, base + (i < extra)) for i, question_type in enumerate(question_types)]
+    return [(question_type, count) for question_type, count in quotas if count > 0]
+
+async def generate_questions_concurrently(text: str, quotas: List[Tuple[QuestionType, int]],
+                                          difficulty: DifficultyLevel, seen: Optional[List[Question]] = None,
+                                          index: Optional[QuestionIndex] = None
+                                          ) -> Tuple[List[List[Question]], Dict[str, int]]:
+    """Her tip için soruları QUIZ_GENERATION_CONCURRENCY sınırıyla eşzamanlı üret. Gelen sorular, tipten
+    bağımsız olarak kabul edilmiş (ve seen'deki) sorularla yakın tekrar filtresinden geçer; tekrarlar yüzünden
+    ya da eksik dönen tipin açığı, o çağrı biter bitmez (diğerleri sürerken) kabul edilen sorular prompt'a
+    eklenerek yeni bir çağrıyla istenir; quotas sırasıyla soru listeleri döner. index verilirse (dokümanın
+    banka indeksinin kopyası) sorular bankadaki tüm sorularla da karşılaştırılır"""
+    semaphore = asyncio.Semaphore(QUIZ_GENERATION_CONCURRENCY)
+    if index is None:
+        index = QuestionIndex(QUIZ_DUPLICATE_THRESHOLD)
+    accepted: List[str] = []
+    for question in seen or []:
+        index.add(("quiz", len(accepted)), question.question)
+        accepted.append(question.question)
+
+    async def generate(slot: int, question_type: QuestionType, count: int, attempt: int):
+        async with semaphore:
+            questions_data = await call_ollama_for_quiz_generation(
+                text=text,
+                num_questions=count,
+                difficulty=difficulty.value,
+                question_type=question_type.value,
+                exclude=accepted[-QUIZ_EXCLUDE_PROMPT_LIMIT:] if QUIZ_EXCLUDE_PROMPT_LIMIT > 0 else None
+            )
+        return slot, question_type, count, attempt, questions_data
+
+    by_slot: Dict[int, List[Question]] = {slot: [] for slot in range(len(quotas))}
+    pending = {asyncio.ensure_future(generate(slot, question_type, count, 0))
+               for slot, (question_type, count) in enumerate(quotas) if count > 0}
+    stats = {"llm_calls": len(pending), "refill_calls": 0}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                slot, question_type, count, attempt, questions_data = task.result()
+                questions = []
+                for question in build_questions(questions_data, question_type, difficulty):
+                    if len(questions) == count:
+                        break
+                    if index.check_and_add(("quiz", len(accepted)), question.question) is None:
+                        accepted.append(question.question)
+                        questions.append(question)
+                by_slot[slot].extend(questions)
+                deficit = count - len(questions)
+                if deficit > 0 and attempt < QUIZ_REFILL_ATTEMPTS:
+                    pending.add(asyncio.ensure_future(generate(slot, question_type, deficit, attempt + 1)))
+                    stats["llm_calls"] += 1
+                    stats["refill_calls"] += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+    stats["duplicates"] = index.duplicates
+    return [by_slot[slot] for slot in range(len(quotas))], stats
+
 @app.get("/health")
 async def health_check():
-    try:
-        # Ollama bağlantı testi
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        ollama_status = "connected" if response.status_code == 200 else "disconnected"
-    except:
-        ollama_status = "disconnected"
-    
+    # Ollama bağlantı testi
+    ollama_status = "connected" if await ollama.is_healthy() else "disconnected"
+
     return {
         "status": "healthy", 
         "service": "quiz-generator",
         "ollama": ollama_status,
-        "model": MODEL_NAME
+        "model": MODEL_NAME,
+        "llm_stats": ollama.stats(),
+        "quiz_store": await quiz_store.run(quiz_store.stats),
+        "question_bank": dict(await quiz_store.run(question_bank.stats), refill_queue=len(refill_pending))
     }
 
 @app.post("/generate", response_model=QuizResponse)
@@ -163,72 +384,65 @@ async def generate_quiz(request: QuizRequest):
         # Quiz ID oluştur
         quiz_id = str(uuid.uuid4())
         
-        # Her soru tipi için sorular üret
-        all_questions = []
-        
-        for question_type in request.question_types:
-            questions_for_type = call_ollama_for_quiz_generation(
-                text=request.text,
-                num_questions=request.num_questions // len(request.question_types),
-                difficulty=request.difficulty.value,
-                question_type=question_type.value
-            )
-            
-            # Question objelerine dönüştür
-            for q_data in questions_for_type:
-                question = Question(
-                    question=q_data.get("question", ""),
-                    question_type=question_type,
-                    options=q_data.get("options", []),
-                    correct_answer=q_data.get("correct_answer", ""),
-                    explanation=q_data.get("explanation", ""),
-                    difficulty=DifficultyLevel(q_data.get("difficulty", request.difficulty.value))
-                )
-                all_questions.append(question)
-        
-        # Kalan soruları tamamla
-        remaining_questions = request.num_questions - len(all_questions)
-        if remaining_questions > 0:
-            extra_questions = call_ollama_for_quiz_generation(
-                text=request.text,
-                num_questions=remaining_questions,
-                difficulty=request.difficulty.value,
-                question_type=request.question_types[0].value
-            )
-            
-            for q_data in extra_questions:
-                question = Question(
-                    question=q_data.get("question", ""),
-                    question_type=request.question_types[0],
-                    options=q_data.get("options", []),
-                    correct_answer=q_data.get("correct_answer", ""),
-                    explanation=q_data.get("explanation", ""),
-                    difficulty=DifficultyLevel(q_data.get("difficulty", request.difficulty.value))
-                )
-                all_questions.append(question)
-        
-        # Quiz session kaydet
-        quiz_data = {
-            "quiz_id": quiz_id,
-            "questions": [q.dict() for q in all_questions],
-            "created_at": datetime.now().isoformat(),
-            "total_questions": len(all_questions),
-            "current_question": 0,
-            "score": 0,
-            "answers": []
-        }
+        start_time = time.time()
+        quotas = split_question_quota(request.num_questions, request.question_types)
+        buckets = [(question_type.value, request.difficulty.value) for question_type, _ in quotas]
+        bank_key = QuestionBank.key(request.text, MODEL_NAME) if question_bank.enabled else None
+
+        # Önce bankadan, kullanıcıya daha önce sorulmamış sorular alınır; canlı sorular bankadaki tüm
+        # sorularla (kullanıcının önceki quiz'lerinde sorulanlar dahil) tekrar filtresinden geçer
+        banked: List[List[Question]] = [[] for _ in quotas]
+        bank_index = None
+        if bank_key:
+            taken = await quiz_store.run(question_bank.take, bank_key, list(zip(buckets, (n for _, n in quotas))),
+                                         request.user_id)
+            banked = [build_questions(data, question_type, request.difficulty)
+                      for data, (question_type, _) in zip(taken, quotas)]
+            if sum(count for _, count in quotas) > sum(map(len, banked)):
+                bank_index = await quiz_store.run(question_bank.index_snapshot, bank_key)
+
+        # Eksikler tüm soru tipleri için tek turda, eşzamanlı üretilir ve bankaya eklenir
+        live, stats = await generate_questions_concurrently(
+            request.text,
+            [(question_type, count - len(from_bank)) for (question_type, count), from_bank in zip(quotas, banked)],
+            request.difficulty,
+            seen=[q for from_bank in banked for q in from_bank],
+            index=bank_index
+        )
+        all_questions = [q for from_bank, generated in zip(banked, live) for q in from_bank + generated]
+        bank_count = sum(map(len, banked))
+        live_count = len(all_questions) - bank_count
+        missing = max(request.num_questions - len(all_questions), 0)
+        if bank_key:
+            if live_count:
+                await quiz_store.run(question_bank.add, bank_key, request.text,
+                                     [q.dict() for generated in live for q in generated], request.user_id)
+            await schedule_bank_refill(bank_key, buckets, request.user_id)
+        print(f"🧠 {len(all_questions)}/{request.num_questions} soru {time.time() - start_time:.1f}s'de hazırlandı "
+              f"({bank_count} bankadan, {live_count} canlı; {stats['llm_calls']} LLM çağrısı, "
+              f"{stats['refill_calls']} tamamlama, {stats['duplicates']} tekrar atıldı)")
+        if missing:
+            print(f"⚠️ Quiz eksik kaldı: {missing} soru üretilemedi (QUIZ_REFILL_ATTEMPTS={QUIZ_REFILL_ATTEMPTS})")
         
-        os.makedirs(QUIZ_SESSIONS_DIR, exist_ok=True)
-        with open(f"{QUIZ_SESSIONS_DIR}/{quiz_id}.json", "w", encoding="utf-8") as f:
-            json.dump(quiz_data, f, ensure_ascii=False, indent=2)
+        # Quiz session kaydet (sorular bir kez yazılır)
+        await quiz_store.run(quiz_store.create_quiz, quiz_id, [q.dict() for q in all_questions])
         
         return QuizResponse(
             quiz_id=quiz_id,
             questions=all_questions,
             total_questions=len(all_questions),
             estimated_time=len(all_questions) * 2,  # 2 dakika per soru
-            status="success"
+            status="partial" if missing else "success",
+            requested_questions=request.num_questions,
+            missing_questions=missing,
+            source=quiz_source(bank_count, live_count),
+            bank_questions=bank_count,
+            live_questions=live_count,
+            duplicates_removed=stats["duplicates"],
+            bank_key=bank_key
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in generate_quiz: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -253,56 +467,16 @@ class AnswerResponse(BaseModel):
 async def submit_answer(request: AnswerRequest):
     """Submit answer for a quiz question"""
     try:
-        # Quiz session yükle
-        quiz_file = f"{QUIZ_SESSIONS_DIR}/{request.quiz_id}.json"
-        if not os.path.exists(quiz_file):
+        # Cevap eklenir ve skor aynı işlemde güncellenir
+        result = await quiz_store.run(quiz_store.answer, request.quiz_id, request.question_index, request.user_answer)
+        if result is None:
             raise HTTPException(status_code=404, detail="Quiz not found")
+        return AnswerResponse(**result)
         
-        with open(quiz_file, "r", encoding="utf-8") as f:
-            quiz_data = json.load(f)
-        
-        # Geçerli soru kontrolü
-        if request.question_index >= len(quiz_data["questions"]):
-            raise HTTPException(status_code=400, detail="Invalid question index")
-        
-        current_question = quiz_data["questions"][request.question_index]
-        correct = request.user_answer.strip() == current_question["correct_answer"].strip()
-        
-        # Cevabı kaydet
-        quiz_data["answers"].append({
-            "question_index": request.question_index,
-            "user_answer": request.user_answer,
-            "correct": correct,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Skoru güncelle
-        if correct:
-            quiz_data["score"] += 1
-        
-        # Sonraki soruyu hazırla
-        next_question_index = request.question_index + 1
-        next_question = None
-        quiz_completed = next_question_index >= len(quiz_data["questions"])
-        
-        if not quiz_completed:
-            next_question = quiz_data["questions"][next_question_index]
-            quiz_data["current_question"] = next_question_index
-        
-        # Session'ı güncelle
-        with open(quiz_file, "w", encoding="utf-8") as f:
-            json.dump(quiz_data, f, ensure_ascii=False, indent=2)
-        
-        return AnswerResponse(
-            correct=correct,
-            correct_answer=current_question["correct_answer"],
-            explanation=current_question.get("explanation", ""),
-            score=quiz_data["score"],
-            total_questions=len(quiz_data["questions"]),
-            next_question=next_question,
-            quiz_completed=quiz_completed
-        )
-        
+    except IndexError:
+        raise HTTPException(status_code=400, detail="Invalid question index")
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in submit_answer: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -311,33 +485,46 @@ async def submit_answer(request: AnswerRequest):
 async def get_quiz_status(quiz_id: str):
     """Get current quiz status"""
     try:
-        quiz_file = f"{QUIZ_SESSIONS_DIR}/{quiz_id}.json"
-        if not os.path.exists(quiz_file):
+        status = await quiz_store.run(quiz_store.status, quiz_id)
+        if status is None:
             raise HTTPException(status_code=404, detail="Quiz not found")
+        return status
         
-        with open(quiz_file, "r", encoding="utf-8") as f:
-            quiz_data = json.load(f)
-        
-        current_question_index = quiz_data.get("current_question", 0)
-        current_question = None
-        
-        if current_question_index < len(quiz_data["questions"]):
-            current_question = quiz_data["questions"][current_question_index]
-        
-        return {
-            "quiz_id": quiz_id,
-            "current_question_index": current_question_index,
-            "current_question": current_question,
-            "score": quiz_data.get("score", 0),
-            "total_questions": len(quiz_data["questions"]),
-            "completed": current_question_index >= len(quiz_data["questions"]),
-            "answers": quiz_data.get("answers", [])
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_quiz_status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Question Bank Endpoints
+
+class BankPrefillRequest(BaseModel):
+    text: str
+    question_types: List[QuestionType] = [QuestionType.MULTIPLE_CHOICE]
+    difficulties: List[DifficultyLevel] = [DifficultyLevel.MEDIUM]
+
+@app.post("/bank/prefill")
+async def prefill_question_bank(request: BankPrefillRequest):
+    """Doküman için soru bankasını arka planda doldurmaya başla (yanıt beklemeden döner)"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text content is required")
+    if not question_bank.enabled:
+        raise HTTPException(status_code=400, detail="Question bank is disabled")
+    bank_key = QuestionBank.key(request.text, MODEL_NAME)
+    await quiz_store.run(question_bank.add, bank_key, request.text, [])
+    buckets = [(t.value, d.value) for t in request.question_types for d in request.difficulties]
+    scheduled = await schedule_bank_refill(bank_key, buckets, None)
+    return {"bank_key": bank_key, "scheduled_buckets": scheduled}
+
+@app.get("/bank/{bank_key}")
+async def get_question_bank(bank_key: str):
+    """Doküman bankasındaki soru sayıları (tip/zorluk kovalarına göre)"""
+    summary = await quiz_store.run(question_bank.summary, bank_key)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Question bank not found")
+    summary["refilling"] = sorted(f"{t}/{d}" for key, t, d in refill_pending if key == bank_key)
+    return summary
+
 @app.get("/")
 async def index():
     return {
@@ -348,7 +535,9 @@ async def index():
             "health": "/health",
             "generate": "/generate (POST) - Create new quiz from text",
             "answer": "/answer (POST) - Submit answer and get feedback",
-            "status": "/quiz/{quiz_id} (GET) - Get quiz progress"
+            "status": "/quiz/{quiz_id} (GET) - Get quiz progress",
+            "bank_prefill": "/bank/prefill (POST) - Pre-generate questions for a document",
+            "bank": "/bank/{bank_key} (GET) - Question bank contents"
         },
         "usage": "1. Generate quiz with /generate, 2. Play with /answer, 3. Check progress with /quiz/{id}"
     }
@@ -356,7 +545,3 @@ async def index():
 if __name__ == "__main__":
     port = int(os.getenv("PORT", "8006"))
     uvicorn.run(app, host="0.0.0.0", port=port)
-
-
-
-
@@ -0,0 +1,211 @@
+"""
+Önceden üretilmiş soru bankası
+Her doküman (normalize edilmiş metin + model özeti) için sorular soru tipi ve zorluk seviyesine göre
+saklanır. Quiz istenince sorular bankadan, kullanıcıya daha önce sorulmamış olanlar arasından rastgele
+seçilir; eksik kalan sorular canlı üretilip bankaya eklenir. Bir kova kullanıcı için azaldığında
+arka planda yeniden doldurulmak üzere işaretlenir. Banka, quiz oturumlarıyla aynı SQLite dosyasını
+ve aynı tek iş parçacıklı executor'ı kullanır. Eklenen sorular dokümandaki tüm sorularla (tip ve zorluktan
+bağımsız) yakın tekrar filtresinden geçer; doküman başına LSH indeksi bellekte tutulur.
+"""
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from quiz_dedup import QuestionIndex
+from quiz_store import QuizStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bank_documents (
+    doc_key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bank_documents_last_used ON bank_documents(last_used);
+CREATE TABLE IF NOT EXISTS bank_questions (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL REFERENCES bank_documents(doc_key) ON DELETE CASCADE,
+    question_type TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bank_questions_bucket ON bank_questions(doc_key, question_type, difficulty);
+CREATE TABLE IF NOT EXISTS bank_served (
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES bank_questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bank_served_question ON bank_served(question_id);
+"""
+
+WHITESPACE = re.compile(r"\s+")
+INDEX_CACHE_DOCUMENTS = 256  # bellekte tekrar indeksi tutulan en fazla doküman
+
+Bucket = Tuple[str, str]  # (soru tipi, zorluk)
+
+
+def enum_value(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+class QuestionBank:
+    def __init__(self, store: QuizStore, max_per_bucket: int, low_watermark: int, ttl: float,
+                 duplicate_threshold: float):
+        self.store = store
+        self.max_per_bucket = max_per_bucket
+        self.low_watermark = low_watermark
+        self.ttl = ttl
+        self.duplicate_threshold = duplicate_threshold
+        self.indexes: "OrderedDict[str, QuestionIndex]" = OrderedDict()
+        self.served = 0
+        self.added = 0
+        self.duplicates = 0
+        self.purged = 0
+        store.conn.executescript(SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_per_bucket > 0
+
+    @staticmethod
+    def key(text: str, model: str) -> str:
+        normalized = WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+        return hashlib.blake2b(f"{model}\x00{normalized}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def take(self, doc_key: str, buckets: List[Tuple[Bucket, int]],
+             user_id: Optional[str]) -> List[List[Dict[str, Any]]]:
+        """Her kova için en fazla istenen sayıda soruyu, kullanıcıya daha önce sorulmamışlar arasından rastgele
+        seç ve kullanıcıya sorulmuş olarak işaretle; kova sırasıyla soru listeleri döner"""
+        taken: List[List[Dict[str, Any]]] = []
+        with self.store.transaction() as conn:
+            if conn.execute("UPDATE bank_documents SET last_used = ? WHERE doc_key = ?",
+                            (time.time(), doc_key)).rowcount == 0:
+                return [[] for _ in buckets]
+            for (question_type, difficulty), count in buckets:
+                rows = conn.execute(
+                    "SELECT id, data FROM bank_questions q WHERE doc_key = ? AND question_type = ? AND difficulty = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM bank_served s WHERE s.user_id = ? AND s.question_id = q.id) "
+                    "ORDER BY random() LIMIT ?",
+                    (doc_key, question_type, difficulty, user_id or "", count)).fetchall()
+                if user_id:
+                    conn.executemany("INSERT OR IGNORE INTO bank_served (user_id, question_id) VALUES (?, ?)",
+                                     [(user_id, row["id"]) for row in rows])
+                taken.append([json.loads(row["data"]) for row in rows])
+        self.served += sum(map(len, taken))
+        return taken
+
+    def _index(self, doc_key: str) -> QuestionIndex:
+        index = self.indexes.pop(doc_key, None)
+        if index is None:
+            index = QuestionIndex(self.duplicate_threshold)
+            for row in self.store.conn.execute("SELECT id, data FROM bank_questions WHERE doc_key = ?", (doc_key,)):
+                index.add(row["id"], json.loads(row["data"])["question"])
+        self.indexes[doc_key] = index
+        while len(self.indexes) > INDEX_CACHE_DOCUMENTS:
+            self.indexes.popitem(last=False)
+        return index
+
+    def add(self, doc_key: str, text: str, questions: List[Dict[str, Any]], user_id: Optional[str] = None) -> int:
+        """Soruları bankaya ekle (kova dolduysa fazlası, bankadakilerin yakın tekrarları atılır); user_id verilirse
+        eklenen soru ya da tekrar ettiği banka sorusu bu kullanıcıya sorulmuş sayılır. Eklenen soru sayısını döner"""
+        added = 0
+        try:
+            with self.store.transaction() as conn:
+                conn.execute("INSERT INTO bank_documents (doc_key, text, last_used) VALUES (?, ?, ?) "
+                             "ON CONFLICT(doc_key) DO UPDATE SET last_used = excluded.last_used",
+                             (doc_key, text, time.time()))
+                index = self._index(doc_key)
+                sizes: Dict[Bucket, int] = {}
+                for question in questions:
+                    duplicate = index.find(question["question"])
+                    if duplicate is not None:
+                        self.duplicates += 1
+                        if user_id:
+                            conn.execute("INSERT OR IGNORE INTO bank_served (user_id, question_id) VALUES (?, ?)",
+                                         (user_id, duplicate))
+                        continue
+                    bucket = (enum_value(question["question_type"]), enum_value(question["difficulty"]))
+                    if bucket not in sizes:
+                        sizes[bucket] = conn.execute(
+                            "SELECT COUNT(*) FROM bank_questions WHERE doc_key = ? AND question_type = ? AND difficulty = ?",
+                            (doc_key, *bucket)).fetchone()[0]
+                    if sizes[bucket] >= self.max_per_bucket:
+                        continue
+                    sizes[bucket] += 1
+                    question_id = conn.execute(
+                        "INSERT INTO bank_questions (doc_key, question_type, difficulty, data) VALUES (?, ?, ?, ?)",
+                        (doc_key, *bucket, json.dumps(question, ensure_ascii=False))).lastrowid
+                    index.add(question_id, question["question"])
+                    if user_id:
+                        conn.execute("INSERT INTO bank_served (user_id, question_id) VALUES (?, ?)", (user_id, question_id))
+                    added += 1
+        except BaseException:
+            # Geri alınan satırlar indekste kalmasın; indeks bir sonraki kullanımda veritabanından kurulur
+            self.indexes.pop(doc_key, None)
+            raise
+        self.added += added
+        return added
+
+    def index_snapshot(self, doc_key: str) -> QuestionIndex:
+        """Dokümanın tekrar indeksinin kopyası; canlı üretim event loop'ta bunu genişletir, banka indeksi değişmez"""
+        return self._index(doc_key).copy()
+
+    def recent_questions(self, doc_key: str, limit: int) -> List[str]:
+        """Dokümana en son eklenen soru metinleri (doldurma prompt'una tekrar istenmemesi için eklenir)"""
+        if limit <= 0:
+            return []
+        rows = self.store.conn.execute("SELECT data FROM bank_questions WHERE doc_key = ? ORDER BY id DESC LIMIT ?",
+                                       (doc_key, limit)).fetchall()
+        return [json.loads(row["data"])["question"] for row in rows]
+
+    def low_buckets(self, doc_key: str, buckets: List[Bucket], user_id: Optional[str]) -> List[Bucket]:
+        """Kullanıcıya sorulmamış soru sayısı low_watermark'ın altına inen ve dolu olmayan kovalar"""
+        low = []
+        for question_type, difficulty in buckets:
+            total, unseen = self.store.conn.execute(
+                "SELECT COUNT(*), SUM(NOT EXISTS (SELECT 1 FROM bank_served s WHERE s.user_id = ? AND s.question_id = q.id)) "
+                "FROM bank_questions q WHERE doc_key = ? AND question_type = ? AND difficulty = ?",
+                (user_id or "", doc_key, question_type, difficulty)).fetchone()
+            if (unseen or 0) < self.low_watermark and total < self.max_per_bucket:
+                low.append((question_type, difficulty))
+        return low
+
+    def document_text(self, doc_key: str) -> Optional[str]:
+        row = self.store.conn.execute("SELECT text FROM bank_documents WHERE doc_key = ?", (doc_key,)).fetchone()
+        return row["text"] if row else None
+
+    def summary(self, doc_key: str) -> Optional[Dict[str, Any]]:
+        if self.document_text(doc_key) is None:
+            return None
+        rows = self.store.conn.execute(
+            "SELECT question_type, difficulty, COUNT(*) AS total FROM bank_questions WHERE doc_key = ? "
+            "GROUP BY question_type, difficulty", (doc_key,)).fetchall()
+        return {
+            "doc_key": doc_key,
+            "buckets": [dict(row) for row in rows],
+            "total_questions": sum(row["total"] for row in rows)
+        }
+
+    def purge_expired(self) -> int:
+        with self.store.transaction() as conn:
+            deleted = conn.execute("DELETE FROM bank_documents WHERE last_used < ?", (time.time() - self.ttl,)).rowcount
+        if deleted:
+            self.indexes.clear()
+        self.purged += deleted
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self.store.conn
+        return {
+            "documents": conn.execute("SELECT COUNT(*) FROM bank_documents").fetchone()[0],
+            "questions": conn.execute("SELECT COUNT(*) FROM bank_questions").fetchone()[0],
+            "max_per_bucket": self.max_per_bucket,
+            "served": self.served,
+            "added": self.added,
+            "duplicates_rejected": self.duplicates,
+            "indexed_documents": len(self.indexes),
+            "purged_documents": self.purged
+        }
@@ -0,0 +1,108 @@
+"""
+Yakın tekrar soru filtresi (MinHash + LSH)
+Soru metni normalize edilir (Türkçe küçük harf, noktalama ve soru kalıpları atılır), kelimeler ilk
+STEM_CHARS harfine kırpılır (eklemeli dilde "kurulmuştur" / "kuruldu" aynı köke düşer) ve bu kökler
+kümesi için MinHash imzası hesaplanır. İmza bantlara bölünüp LSH kovalarında saklanır; yalnızca en az
+bir bantta çakışan adaylar için gerçek Jaccard benzerliği hesaplanır, böylece her yeni soru birikmiş
+tüm sorularla karşılaştırılmadan kontrol edilir.
+"""
+import hashlib
+import random
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+TOKEN = re.compile(r"(\w+)(?:['’]\w+)?")  # kesme işaretinden sonraki ek atılır: "Türkiye'nin" -> "türkiye"
+STEM_CHARS = 5
+# Soru kalıpları ve bağlaçlar; aynı sorunun farklı sorulma biçimleri bunlarla ayrışmasın
+STOPWORDS = {
+    "ve", "ile", "veya", "ya", "bir", "bu", "şu", "o", "da", "de", "ki", "mi", "mı", "mu", "mü",
+    "ne", "neden", "nedir", "nasıl", "kim", "kimdir", "nerede", "neresidir", "hangi", "hangisi",
+    "hangisidir", "kaç", "aşağıdakilerden", "aşağıdaki", "için", "olarak", "olan", "göre", "metne",
+    "metinde", "doğru", "yanlış", "değildir", "midir", "mıdır", "mudur", "müdür", "nelerdir", "vardır",
+    "olur", "olmuş", "olmuştur", "edilir", "edildi", "edilmiştir", "yapılır", "yapıldı", "yapılmıştır",
+    "gerçekleşir", "gerçekleşti", "gerçekleşmiştir",
+}
+# Kırpmadan sağ çıkan kısa kelimelerdeki bulunma/ayrılma ekleri ("yılda" -> "yıl", "aydan" -> "ay")
+SUFFIXES = ("dan", "den", "tan", "ten", "da", "de", "ta", "te")
+MERSENNE = (1 << 61) - 1
+NUM_PERM = 64
+BANDS = 16  # 16 bant x 4 satır: Jaccard ~0.5 üzeri çiftler yüksek olasılıkla aday olur
+
+_rng = random.Random(20250101)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE), _rng.randrange(0, MERSENNE)) for _ in range(NUM_PERM)]
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).replace("İ", "i").replace("I", "ı")
+    return text.lower()
+
+
+def stem(word: str) -> str:
+    if len(word) <= STEM_CHARS:
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+                return word[:-len(suffix)]
+    return word[:STEM_CHARS]
+
+
+def shingles(text: str) -> FrozenSet[str]:
+    stems = frozenset(stem(t) for t in TOKEN.findall(normalize(text)) if len(t) > 1 and t not in STOPWORDS)
+    return stems or frozenset([normalize(text).strip()])
+
+
+def signature(items: FrozenSet[str]) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in items]
+    return tuple(min((a * h + b) % MERSENNE for h in hashes) for a, b in PERMUTATIONS)
+
+
+class QuestionIndex:
+    """Eklenen soruların kök kümelerini ve LSH kovalarını tutar; threshold üzeri benzerlik tekrar sayılır"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.rows = NUM_PERM // BANDS
+        self.items: Dict[Hashable, FrozenSet[str]] = {}
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[Hashable]] = {}
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _bands(self, sig: Tuple[int, ...]):
+        return [(band, sig[band * self.rows:(band + 1) * self.rows]) for band in range(BANDS)]
+
+    def find(self, text: str) -> Optional[Hashable]:
+        """Benzerliği eşiği aşan en yakın kayıtlı sorunun anahtarı (yoksa None)"""
+        if self.threshold > 1:
+            return None
+        items = shingles(text)
+        candidates = {key for band in self._bands(signature(items)) for key in self.buckets.get(band, ())}
+        best, best_score = None, self.threshold
+        for key in candidates:
+            other = self.items[key]
+            score = len(items & other) / len(items | other)
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def add(self, key: Hashable, text: str):
+        items = shingles(text)
+        self.items[key] = items
+        for band in self._bands(signature(items)):
+            self.buckets.setdefault(band, []).append(key)
+
+    def copy(self) -> "QuestionIndex":
+        clone = QuestionIndex(self.threshold)
+        clone.items = dict(self.items)
+        clone.buckets = {band: list(keys) for band, keys in self.buckets.items()}
+        return clone
+
+    def check_and_add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Soru yeniyse kaydedip None, tekrarsa benzediği sorunun anahtarını döner"""
+        duplicate = self.find(text)
+        if duplicate is not None:
+            self.duplicates += 1
+            return duplicate
+        self.add(key, text)
+        return None
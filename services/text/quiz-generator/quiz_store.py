@@ -0,0 +1,220 @@
+"""
+Quiz oturum deposu (SQLite, WAL)
+Sorular quiz oluşturulurken bir kez yazılır, her cevap tek bir işlemde eklenir ve skor aynı işlemde
+artırılır; böylece /answer maliyeti quiz boyutundan bağımsızdır ve eşzamanlı cevaplar birbirinin
+güncellemesini ezmez. Her soru bir kez cevaplanır (quiz_id, question_index benzersiz): tekrar gönderilen
+cevap (yeniden deneme, çift tıklama) yok sayılır ve skoru ikinci kez artırmaz. Son etkinliğinden bu yana ttl saniye geçen quiz'ler okunmaz ve periyodik
+temizlikte silinir (sorular ve cevaplar ON DELETE CASCADE ile gider).
+"""
+import asyncio
+import functools
+import glob
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quizzes (
+    quiz_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    total_questions INTEGER NOT NULL,
+    current_question INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS quizzes_updated_at ON quizzes(updated_at);
+CREATE TABLE IF NOT EXISTS questions (
+    quiz_id TEXT NOT NULL REFERENCES quizzes(quiz_id) ON DELETE CASCADE,
+    question_index INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (quiz_id, question_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    quiz_id TEXT NOT NULL REFERENCES quizzes(quiz_id) ON DELETE CASCADE,
+    question_index INTEGER NOT NULL,
+    user_answer TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+"""
+ANSWERS_UNIQUE = "answers_quiz_question"
+
+
+class QuizStore:
+    """Tek bağlantı, tek iş parçacıklı executor üzerinden kullanılır (SQLite zaten tek yazıcıya izin verir);
+    birden fazla süreç aynı dosyayı WAL ve busy_timeout sayesinde paylaşabilir"""
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.purged = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+        self._unique_answers()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-store")
+
+    async def run(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    @contextmanager
+    def transaction(self):
+        # IMMEDIATE: yazma kilidi baştan alınır, okuma->yazma yükseltmesinde kilitlenme olmaz
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _unique_answers(self):
+        """Soru başına tek cevap indeksini kur; eski veritabanlarındaki tekrar cevaplardan ilki kalır ve
+        tekrarı olan quiz'lerin skoru kalan cevaplardan yeniden hesaplanır"""
+        with self.transaction() as conn:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+                            (ANSWERS_UNIQUE,)).fetchone():
+                return
+            duplicated = conn.execute("SELECT DISTINCT quiz_id FROM answers GROUP BY quiz_id, question_index "
+                                      "HAVING COUNT(*) > 1").fetchall()
+            conn.execute("DELETE FROM answers WHERE id NOT IN "
+                         "(SELECT MIN(id) FROM answers GROUP BY quiz_id, question_index)")
+            conn.executemany("UPDATE quizzes SET score = (SELECT COUNT(*) FROM answers "
+                             "WHERE answers.quiz_id = quizzes.quiz_id AND correct) WHERE quiz_id = ?",
+                             [(row[0],) for row in duplicated])
+            conn.execute(f"CREATE UNIQUE INDEX {ANSWERS_UNIQUE} ON answers(quiz_id, question_index)")
+            conn.execute("DROP INDEX IF EXISTS answers_quiz_id")  # benzersiz indeks quiz_id aramalarını da karşılar
+        if duplicated:
+            print(f"🧹 {len(duplicated)} quiz'de tekrar eden cevaplar silindi, skorlar yeniden hesaplandı")
+
+    def create_quiz(self, quiz_id: str, questions: List[Dict[str, Any]], created_at: Optional[str] = None,
+                    current_question: int = 0, score: int = 0, answers: Optional[List[Dict[str, Any]]] = None):
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO quizzes (quiz_id, created_at, updated_at, total_questions, current_question, score) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (quiz_id, created_at or datetime.now().isoformat(), time.time(), len(questions),
+                          current_question, score))
+            conn.executemany("INSERT INTO questions (quiz_id, question_index, data) VALUES (?, ?, ?)",
+                             [(quiz_id, i, json.dumps(q, ensure_ascii=False)) for i, q in enumerate(questions)])
+            conn.executemany("INSERT INTO answers (quiz_id, question_index, user_answer, correct, timestamp) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             [(quiz_id, a["question_index"], a["user_answer"], int(a["correct"]), a["timestamp"])
+                              for a in answers or []])
+
+    def _quiz(self, conn: sqlite3.Connection, quiz_id: str) -> Optional[sqlite3.Row]:
+        return conn.execute("SELECT * FROM quizzes WHERE quiz_id = ? AND updated_at >= ?",
+                            (quiz_id, time.time() - self.ttl)).fetchone()
+
+    def _question(self, conn: sqlite3.Connection, quiz_id: str, index: int) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT data FROM questions WHERE quiz_id = ? AND question_index = ?",
+                           (quiz_id, index)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def answer(self, quiz_id: str, question_index: int, user_answer: str) -> Optional[Dict[str, Any]]:
+        """Cevabı ekle ve skoru aynı işlemde güncelle; quiz yoksa None, soru indeksi geçersizse IndexError.
+        Soru zaten cevaplandıysa hiçbir şey yazılmaz, ilk cevabın sonucu döner"""
+        with self.transaction() as conn:
+            quiz = self._quiz(conn, quiz_id)
+            if quiz is None:
+                return None
+            question = self._question(conn, quiz_id, question_index) if question_index >= 0 else None
+            if question is None:
+                raise IndexError(question_index)
+
+            correct = user_answer.strip() == question["correct_answer"].strip()
+            inserted = conn.execute("INSERT OR IGNORE INTO answers (quiz_id, question_index, user_answer, correct, "
+                                    "timestamp) VALUES (?, ?, ?, ?, ?)",
+                                    (quiz_id, question_index, user_answer, int(correct),
+                                     datetime.now().isoformat())).rowcount
+
+            next_index = question_index + 1
+            quiz_completed = next_index >= quiz["total_questions"]
+            if inserted:
+                conn.execute("UPDATE quizzes SET score = score + ?, updated_at = ?, "
+                             "current_question = CASE WHEN ? THEN current_question ELSE ? END WHERE quiz_id = ?",
+                             (int(correct), time.time(), quiz_completed, next_index, quiz_id))
+                score = quiz["score"] + int(correct)
+            else:
+                correct = bool(conn.execute("SELECT correct FROM answers WHERE quiz_id = ? AND question_index = ?",
+                                            (quiz_id, question_index)).fetchone()["correct"])
+                score = quiz["score"]
+            return {
+                "correct": correct,
+                "correct_answer": question["correct_answer"],
+                "explanation": question.get("explanation") or "",
+                "score": score,
+                "total_questions": quiz["total_questions"],
+                "next_question": None if quiz_completed else self._question(conn, quiz_id, next_index),
+                "quiz_completed": quiz_completed
+            }
+
+    def status(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        quiz = self._quiz(self.conn, quiz_id)
+        if quiz is None:
+            return None
+        answers = self.conn.execute("SELECT question_index, user_answer, correct, timestamp FROM answers "
+                                    "WHERE quiz_id = ? ORDER BY id", (quiz_id,)).fetchall()
+        current = quiz["current_question"]
+        return {
+            "quiz_id": quiz_id,
+            "current_question_index": current,
+            "current_question": self._question(self.conn, quiz_id, current),
+            "score": quiz["score"],
+            "total_questions": quiz["total_questions"],
+            "completed": current >= quiz["total_questions"],
+            "answers": [dict(a, correct=bool(a["correct"])) for a in answers]
+        }
+
+    def purge_expired(self) -> int:
+        with self.transaction() as conn:
+            deleted = conn.execute("DELETE FROM quizzes WHERE updated_at < ?", (time.time() - self.ttl,)).rowcount
+        self.purged += deleted
+        return deleted
+
+    def import_json_sessions(self, directory: str) -> int:
+        """Eski {quiz_id}.json oturum dosyalarını depoya taşı; aktarılan dosya silinir"""
+        imported = 0
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                # Eski dosyalarda aynı soru birden çok kez cevaplanmış olabilir: ilk cevap kalır, skor
+                # kalan cevaplardan yeniden hesaplanır
+                answers, score = {}, data.get("score", 0)
+                for answer in data.get("answers", []):
+                    answers.setdefault(answer["question_index"], answer)
+                if len(answers) < len(data.get("answers", [])):
+                    score = sum(bool(answer["correct"]) for answer in answers.values())
+                self.create_quiz(data["quiz_id"], data["questions"], created_at=data.get("created_at"),
+                                 current_question=data.get("current_question", 0), score=score,
+                                 answers=list(answers.values()))
+            except sqlite3.IntegrityError:
+                pass  # önceki bir aktarımda yazılmış, dosya silinemeden kalmış
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Quiz oturumu aktarılamadı ({path}): {e}")
+                continue
+            os.remove(path)
+            imported += 1
+        return imported
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "quizzes": self.conn.execute("SELECT COUNT(*) FROM quizzes").fetchone()[0],
+            "ttl_seconds": self.ttl,
+            "purged": self.purged
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.conn.close()
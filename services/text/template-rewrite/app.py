@@ -4,9 +4,10 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import uvicorn
-import requests
+import asyncio
 import json
 import os
+import sys
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -14,6 +15,11 @@ from docx.shared import Pt
 import uuid
 from datetime import datetime
 
+# Ortak Ollama istemcisi (Docker imajında app.py ile aynı dizine kopyalanır)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from cpu_pool import CpuPool
+from ollama_client import AsyncOllamaClient, OllamaError
+
 app = FastAPI(title="Template Rewrite Service", version="1.0.0")
 
 # Enable CORS
@@ -31,6 +37,11 @@ app.mount("/outputs", StaticFiles(directory="/app/outputs"), name="outputs")
 
 # Ollama configuration
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+ollama = AsyncOllamaClient("template-rewrite", base_url=OLLAMA_BASE_URL)
+
+# Şablon okuma ve Word (python-docx) üretimi event loop'u bloklamasın diye bu havuzda çalışır
+cpu_pool = CpuPool("template-cpu")
+run_cpu = cpu_pool.run
 
 class ImzaKisi(BaseModel):
     isim: str
@@ -54,34 +65,27 @@ class TemplateResponse(BaseModel):
     filename: str
     content: str
 
+@app.on_event("shutdown")
+async def close_ollama_client():
+    await ollama.close()
+    cpu_pool.shutdown()
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "template-rewrite"}
+    return {"status": "healthy", "service": "template-rewrite", "llm_stats": ollama.stats()}
 
-def call_ollama_for_content(prompt: str, model: str = "gemma3:27b") -> str:
+async def call_ollama_for_content(prompt: str, model: str = "gemma3:27b") -> str:
     """Call Ollama to generate content"""
     try:
-        response = requests.post(
-            f"{OLLAMA_BASE_URL}/api/generate",
-            json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
-            },
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("response", "")
-        else:
-            print(f"Ollama API error: {response.status_code}")
-            return ""
-            
+        result = await ollama.generate(prompt, model=model, options={
+            "temperature": 0.7,
+            "top_p": 0.9
+        })
+        return result.text
+
+    except OllamaError as e:
+        print(f"Ollama API error: {e}")
+        return ""
     except Exception as e:
         print(f"Error calling Ollama: {e}")
         return ""
@@ -231,11 +235,11 @@ def load_template_examples():
     
     return examples
 
-def generate_belgenet_content(konu: str, icerik_konusu: str) -> tuple:
+async def generate_belgenet_content(konu: str, icerik_konusu: str) -> tuple:
     """Generate belgenet content and title using LLM with template examples"""
     
     # Örnek şablonları yükle
-    examples = load_template_examples()
+    examples = await run_cpu(load_template_examples)
     
     # Örnekleri prompt'a ekle
     examples_text = ""
@@ -274,7 +278,7 @@ def generate_belgenet_content(konu: str, icerik_konusu: str) -> tuple:
     [Resmi yazı içeriği - 2-3 paragraf, "Bilgilerinizi ve gereğini arz ederim" ile bitir]
     """
     
-    content = call_ollama_for_content(prompt)
+    content = await call_ollama_for_content(prompt)
     
     # Başlık ve dosya adını ayır
     new_title = konu
@@ -300,11 +304,11 @@ def generate_belgenet_content(konu: str, icerik_konusu: str) -> tuple:
     
     return new_title, content, new_filename
 
-def generate_gerekce_content(konu: str, icerik_konusu: str) -> tuple:
+async def generate_gerekce_content(konu: str, icerik_konusu: str) -> tuple:
     """Generate gerekce content and title using LLM with template examples"""
     
     # Örnek şablonları yükle
-    examples = load_template_examples()
+    examples = await run_cpu(load_template_examples)
     
     # Örnekleri prompt'a ekle
     examples_text = ""
@@ -341,7 +345,7 @@ def generate_gerekce_content(konu: str, icerik_konusu: str) -> tuple:
     Örnek şablonlardaki yapıyı ve tarzı takip et.
     """
     
-    content = call_ollama_for_content(prompt)
+    content = await call_ollama_for_content(prompt)
     
     # Başlık ve dosya adını ayır
     new_title = konu
@@ -474,13 +478,14 @@ async def generate_document(request: BelgenetRequest):
     try:
         if request.format_type == "belgenet":
             # Belgenet formatında içerik oluştur
-            title, content, filename_base = generate_belgenet_content(
+            title, content, filename_base = await generate_belgenet_content(
                 request.konu, 
                 request.icerik_konusu
             )
             
             # Belgenet Word belgesi oluştur
-            filepath, filename = create_belgenet_word_document(
+            filepath, filename = await run_cpu(
+                create_belgenet_word_document,
                 title, 
                 content, 
                 request.imza_atacaklar,
@@ -496,13 +501,14 @@ async def generate_document(request: BelgenetRequest):
             )
         else:
             # Gerekçe formatında içerik oluştur
-            title, content, filename_base = generate_gerekce_content(
+            title, content, filename_base = await generate_gerekce_content(
                 request.konu, 
                 request.icerik_konusu
             )
             
             # Gerekçe Word belgesi oluştur
-            filepath, filename = create_gerekce_word_document(
+            filepath, filename = await run_cpu(
+                create_gerekce_word_document,
                 title, 
                 content, 
                 request.imza_atacaklar,
@@ -526,13 +532,14 @@ async def generate_gerekce(request: GerekceRequest):
     """Generate gerekce document"""
     try:
         # LLM ile içerik, başlık ve dosya adı oluştur
-        title, content, filename_base = generate_gerekce_content(request.konu, request.icerik_konusu)
+        title, content, filename_base = await generate_gerekce_content(request.konu, request.icerik_konusu)
         
         if not content:
             raise HTTPException(status_code=500, detail="İçerik oluşturulamadı")
         
         # Word belgesi oluştur
-        filepath, filename = create_gerekce_word_document(
+        filepath, filename = await run_cpu(
+            create_gerekce_word_document,
             title, 
             content, 
             request.imza_atacaklar,
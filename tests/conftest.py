@@ -0,0 +1,24 @@
+"""
+Servis testleri için ortak yardımcılar
+Her servis kendi dizininde tek bir app.py'dir; testler servisi benzersiz bir modül adıyla yükler ki
+farklı servislerin app.py dosyaları aynı pytest oturumunda çakışmasın.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_service(service_dir: str, name: str, module: str = "app"):
+    """services/ altındaki bir servisin modülünü yükle (servis dizini sys.path'e eklenir)"""
+    directory = os.path.join(ROOT, "services", service_dir)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, f"{module}.py"))
+    loaded = importlib.util.module_from_spec(spec)
+    sys.modules[name] = loaded
+    spec.loader.exec_module(loaded)
+    return loaded
@@ -0,0 +1,78 @@
+"""Ortak Ollama istemcisi: bozuk yanıt gövdeleri OllamaError olarak döner"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "services", "common"))
+from ollama_client import AsyncOllamaClient, OllamaClient, OllamaError
+
+BODIES = [
+    b'{"response": "yar',  # kesik gövde
+    b"<html>502 Bad Gateway</html>",  # proxy'nin JSON olmayan yanıtı
+    b'["response"]',  # nesne olmayan JSON
+]
+
+
+def sync_client(body: bytes, calls: list) -> OllamaClient:
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, content=body)
+
+    client = OllamaClient("test", base_url="http://ollama", max_retries=2)
+    client.client = httpx.Client(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def async_client(body: bytes, calls: list) -> AsyncOllamaClient:
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, content=body)
+
+    client = AsyncOllamaClient("test", base_url="http://ollama", max_retries=2)
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.parametrize("body", BODIES)
+def test_sync_invalid_body_raises_ollama_error(body):
+    calls = []
+    client = sync_client(body, calls)
+    with pytest.raises(OllamaError):
+        client.generate("merhaba")
+    assert len(calls) == 1  # çözülemeyen gövde yeniden denenmez
+    assert client.totals["errors"] == 1
+    with pytest.raises(OllamaError):
+        list(client.stream("merhaba"))
+    assert client.is_healthy() is False
+
+
+@pytest.mark.parametrize("body", BODIES)
+def test_async_invalid_body_raises_ollama_error(body):
+    async def scenario():
+        calls = []
+        client = async_client(body, calls)
+        with pytest.raises(OllamaError):
+            await client.generate("merhaba")
+        assert len(calls) == 1
+        with pytest.raises(OllamaError):
+            async for _ in client.stream("merhaba"):
+                pass
+        assert await client.is_healthy() is False
+        await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_stream_reports_truncated_line_after_valid_chunks():
+    calls = []
+    client = sync_client(b'{"response": "Mer", "done": false}\n{"response": "ha', calls)
+    chunks = []
+    with pytest.raises(OllamaError):
+        for chunk in client.stream("merhaba"):
+            chunks.append(chunk)
+    assert [c["response"] for c in chunks] == ["Mer"]
@@ -0,0 +1,58 @@
+"""ollama_proxy: birebir aynı eşzamanlı istekler upstream'e tek çağrı olarak gider (single-flight)"""
+import asyncio
+import json
+import os
+import sys
+
+import aiohttp
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from fake_ollama import start_fake_ollama  # noqa: E402
+from proxy_stream_bench import start_proxy  # noqa: E402
+
+CLIENTS = 10
+
+
+@pytest.fixture
+def proxy():
+    fake = start_fake_ollama(tokens=10, token_delay=0.05)
+    proc, port = start_proxy(fake.server_address[1], streaming=True)
+    try:
+        yield fake, port
+    finally:
+        proc.terminate()
+        proc.wait()
+        fake.shutdown()
+
+
+async def fire(port: int, prompts, stream: bool):
+    async with aiohttp.ClientSession() as session:
+        async def one(prompt):
+            body = json.dumps({"model": "gemma3:27b", "prompt": prompt, "stream": stream,
+                               "options": {"temperature": 0.1}})
+            async with session.post(f"http://127.0.0.1:{port}/api/generate", data=body) as resp:
+                return resp.status, await resp.read(), resp.headers.get("X-Proxy-Coalesced")
+
+        return await asyncio.gather(*(one(prompt) for prompt in prompts))
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["non-streamed", "streamed"])
+def test_identical_concurrent_requests_share_one_upstream_call(proxy, stream):
+    fake, port = proxy
+    results = asyncio.run(fire(port, ["aynı soru"] * CLIENTS, stream))
+
+    assert fake.calls == 1
+    assert {status for status, _, _ in results} == {200}
+    assert len({body for _, body, _ in results}) == 1
+    assert sum(1 for _, _, coalesced in results if coalesced == "follower") == CLIENTS - 1
+
+
+def test_different_requests_are_not_coalesced(proxy):
+    fake, port = proxy
+    results = asyncio.run(fire(port, [f"soru {i}" for i in range(3)], stream=False))
+
+    assert fake.calls == 3
+    assert {status for status, _, _ in results} == {200}
@@ -0,0 +1,54 @@
+"""pii-masking: LLM yanıtının ayrıştırılması, başarısız parçalar ve toplu maskelemenin kullanım raporu"""
+import asyncio
+import json
+
+import pytest
+
+from conftest import load_service
+
+app = load_service("text/pii-masking", "pii_masking_app")
+from ollama_client import OllamaResult  # noqa: E402  (servis dizini load_service ile sys.path'te)
+
+
+@pytest.fixture
+def llm_reply(monkeypatch):
+    replies = []
+
+    async def fake_generate(prompt, model=None, options=None, **kwargs):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return OllamaResult(text=reply, model=model or "test")
+
+    monkeypatch.setattr(app.ollama, "generate", fake_generate)
+    return replies
+
+
+@pytest.mark.parametrize("reply", ['{"entities": "yok"}', '{"entities": ["Ahmet"]}', '{"entities": {"type": "NAME"}}'])
+def test_unexpected_json_shape_falls_back_to_manual_parse(llm_reply, reply):
+    llm_reply.append(reply + "\n- NAME: Ahmet Yılmaz")
+    entities, _ = asyncio.run(app.call_llm_for_pii_detection("Ahmet Yılmaz geldi."))
+    assert [(e["type"], e["value"]) for e in entities] == [("NAME", "Ahmet Yılmaz")]
+
+
+def test_unexpected_error_counts_chunk_as_failed(llm_reply):
+    llm_reply.append(RuntimeError("beklenmeyen"))
+    entities, usage = asyncio.run(app.detect_pii_in_chunks("Ahmet Yılmaz geldi.", [], "test"))
+    assert entities == []
+    assert usage["failed_chunks"] == 1
+
+
+def test_batch_reports_pack_usage_once_per_pack(llm_reply):
+    from fastapi.testclient import TestClient
+
+    texts = ["Ahmet geldi.", "Ayşe gitti.", "Mehmet kaldı."]
+    llm_reply.append('{"entities": [{"type": "PERSON", "value": "Ayşe"}]}')
+    with TestClient(app.app) as client:
+        response = client.post("/mask/batch", json={"texts": texts})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["status"] for line in lines] == ["success"] * 3
+    assert "Ayşe" not in lines[1]["masked_text"]
+    pack_usage = [line["pack_usage"] for line in lines if "pack_usage" in line]
+    assert len(pack_usage) == 1 and pack_usage[0]["texts_in_call"] == 3 and pack_usage[0]["calls"] == 1
+    assert all(line["llm_usage"] == {"pack": 0, "failed_chunks": 0} for line in lines)
@@ -0,0 +1,38 @@
+"""pii-masking: akışlı dosya okuma"""
+import io
+
+from conftest import load_service
+
+pii_files = load_service("text/pii-masking", "pii_files_module", module="pii_files")
+
+
+def rebuild(data: bytes, **kwargs):
+    output, longest = [], 0
+    for segment in pii_files.iter_text_segments(io.BytesIO(data), **kwargs):
+        if segment[0] == "para":
+            output.append(segment[2](segment[1]))
+            longest = max(longest, len(segment[1][0]))
+        else:
+            output.append(segment[1])
+    return "".join(output), longest
+
+
+def test_single_line_file_is_split_into_bounded_segments():
+    text = "Ahmet Yılmaz Ankara'da yaşıyor. Telefonu 0532 111 22 33! " * 20000  # satır sonu yok
+    rebuilt, longest = rebuild(text.encode("utf-8"), max_chars=4000)
+    assert rebuilt == text
+    assert longest <= 4000
+
+
+def test_split_prefers_sentence_then_whitespace_boundaries():
+    sentence = "Ahmet Yılmaz geldi. "
+    assert pii_files.split_point(sentence * 10, 50) == 40
+    assert pii_files.split_point("kelime " * 20, 50) == 49
+    assert pii_files.split_point("x" * 100, 50) == 50
+
+
+def test_line_endings_and_long_lines_round_trip():
+    text = "satır bir\r\nsatır iki\n" + "y " * 3000 + "\nson"
+    rebuilt, longest = rebuild(text.encode("utf-8"), max_chars=1000)
+    assert rebuilt == text
+    assert longest <= 1000
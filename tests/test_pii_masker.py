@@ -0,0 +1,36 @@
+"""pii-masking: çakışan aralıkların çözümü"""
+from conftest import load_service
+
+pii_masker = load_service("text/pii-masking", "pii_masker_module", module="pii_masker")
+resolve_overlaps = pii_masker.resolve_overlaps
+
+
+def test_contained_span_is_dropped():
+    text = "Adres: Çankaya, Ankara"
+    address, city = (7, len(text), 0), (16, len(text), 1)
+    assert resolve_overlaps([city, address]) == [address]
+
+
+def test_longest_wins_at_same_start_then_pattern_index():
+    assert resolve_overlaps([(0, 5, 2), (0, 12, 3), (0, 12, 1)]) == [(0, 12, 1)]
+
+
+def test_partial_overlap_is_merged_under_longest_match():
+    # Kısa [0,5) ve uzun [3,20): hiçbir karakter açıkta kalmaz, birleşik aralık uzun eşleşmenin desenini alır
+    assert resolve_overlaps([(0, 5, 0), (3, 20, 1)]) == [(0, 20, 1)]
+
+
+def test_overlap_chain_merges_and_disjoint_spans_stay_apart():
+    spans = [(9, 20, 2), (2, 10, 1), (0, 4, 0), (20, 25, 3)]
+    assert resolve_overlaps(spans) == [(0, 20, 2), (20, 25, 3)]
+
+
+def test_mask_text_leaves_no_character_of_overlapping_values():
+    app = load_service("text/pii-masking", "pii_masking_app")
+    text = "Müşteri: Ahmet Yılmaz Kaya geldi"
+    entities = [{"type": "PERSON", "value": "Ahmet Yılmaz", "start": 9},
+                {"type": "PERSON", "value": "Yılmaz Kaya", "start": 15}]
+    masked, masked_entities = app.mask_text(text, entities, "redact")
+    assert "Ahmet" not in masked and "Yılmaz" not in masked and "Kaya" not in masked
+    assert masked.endswith(" geldi")
+    assert [e["original_value"] for e in masked_entities] == ["Ahmet Yılmaz Kaya"]
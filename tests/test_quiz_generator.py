@@ -0,0 +1,102 @@
+"""quiz-generator: eşzamanlı soru üretimi"""
+import asyncio
+
+import pytest
+
+from conftest import load_service
+
+quiz = load_service("text/quiz-generator", "quiz_generator_app")
+
+
+def make_questions(question_type, count, difficulty="medium"):
+    return [{"question": f"{question_type} maddesi {i:04d} nedir?", "options": ["A) 1", "B) 2"],
+             "correct_answer": "A) 1", "explanation": "", "difficulty": difficulty} for i in range(count)]
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    replies = {}
+    calls = []
+
+    async def fake(text, num_questions, difficulty, question_type, exclude=None):
+        calls.append((question_type, num_questions))
+        return replies.get(question_type, lambda n: make_questions(question_type, n))(num_questions)
+
+    monkeypatch.setattr(quiz, "call_ollama_for_quiz_generation", fake)
+    return replies, calls
+
+
+def test_invalid_difficulty_does_not_drop_other_types(fake_llm):
+    replies, _ = fake_llm
+    replies["true_false"] = lambda n: make_questions("true_false", n, difficulty="orta_seviye")
+    replies["fill_blank"] = lambda n: make_questions("fill_blank", n, difficulty="Kolay")
+    quotas = [(quiz.QuestionType.MULTIPLE_CHOICE, 2), (quiz.QuestionType.TRUE_FALSE, 2),
+              (quiz.QuestionType.FILL_BLANK, 2)]
+
+    by_slot, _ = asyncio.run(quiz.generate_questions_concurrently("metin", quotas, quiz.DifficultyLevel.HARD))
+
+    assert [len(questions) for questions in by_slot] == [2, 2, 2]
+    assert {q.difficulty for q in by_slot[1]} == {quiz.DifficultyLevel.HARD}  # tanınmayan -> istenen zorluk
+    assert {q.difficulty for q in by_slot[2]} == {quiz.DifficultyLevel.EASY}
+
+
+def test_malformed_question_is_skipped():
+    data = make_questions("multiple_choice", 2) + ["bozuk", {"question": "X?", "options": "A, B"}]
+    questions = quiz.build_questions(data, quiz.QuestionType.MULTIPLE_CHOICE, quiz.DifficultyLevel.MEDIUM)
+    assert len(questions) == 2
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(quiz, "QUIZ_SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(quiz, "QUIZ_DB_PATH", str(tmp_path / "quiz.db"))
+    monkeypatch.setattr(quiz, "QUIZ_BANK_LOW_WATERMARK", 0)  # arka plan doldurması testin sorularını değiştirmesin
+    with TestClient(quiz.app) as test_client:
+        yield test_client
+
+
+def test_live_questions_are_checked_against_whole_bank(monkeypatch, client):
+    replies = iter([["Türkiye Cumhuriyeti hangi yıl kurulmuştur?"]]
+                   + [["Türkiye Cumhuriyeti hangi tarihte kuruldu?"]] * 10)
+
+    async def fake(text, num_questions, difficulty, question_type, exclude=None):
+        return [{"question": q, "options": ["A) 1923", "B) 1920"], "correct_answer": "A) 1923",
+                 "difficulty": difficulty} for q in next(replies)]
+
+    monkeypatch.setattr(quiz, "call_ollama_for_quiz_generation", fake)
+    request = {"text": "Cumhuriyet 1923'te kuruldu.", "num_questions": 1, "user_id": "ogrenci-1"}
+
+    first = client.post("/generate", json=request).json()
+    assert first["source"] == "live" and first["total_questions"] == 1
+
+    # Bankadaki tek soru bu kullanıcıya soruldu; canlı üretilen başka ifadesi de tekrar sayılmalı
+    second = client.post("/generate", json=request).json()
+    assert second["total_questions"] == 0
+    assert second["duplicates_removed"] >= 1
+    assert second["source"] == "none"
+
+
+def test_shortfall_is_reported(monkeypatch, client):
+    async def fake(text, num_questions, difficulty, question_type, exclude=None):
+        # Model hep aynı bilgiyi farklı ifadelerle sorar; tekrarlar atılınca quiz doldurulamaz
+        return [{"question": q, "options": ["A) 1923", "B) 1920"], "correct_answer": "A) 1923",
+                 "difficulty": difficulty}
+                for q in ["Türkiye Cumhuriyeti hangi yıl kurulmuştur?",
+                          "Türkiye Cumhuriyeti hangi tarihte kuruldu?"][:num_questions]]
+
+    monkeypatch.setattr(quiz, "call_ollama_for_quiz_generation", fake)
+    body = client.post("/generate", json={"text": "Cumhuriyet 1923'te kuruldu.", "num_questions": 7,
+                                          "question_types": ["multiple_choice", "true_false"]}).json()
+
+    assert body["requested_questions"] == 7
+    assert body["total_questions"] == 1
+    assert body["missing_questions"] == 6
+    assert body["status"] == "partial"
+
+
+def test_full_quiz_reports_success(fake_llm, client):
+    body = client.post("/generate", json={"text": "metin", "num_questions": 4,
+                                          "question_types": ["multiple_choice", "true_false"]}).json()
+    assert (body["status"], body["total_questions"], body["missing_questions"]) == ("success", 4, 0)
@@ -0,0 +1,56 @@
+"""quiz-generator: SQLite oturum deposunda cevapların tekilliği"""
+import json
+import sqlite3
+
+from conftest import load_service
+
+quiz_store = load_service("text/quiz-generator", "quiz_store_module", module="quiz_store")
+
+QUESTIONS = [{"question": f"Soru {i}?", "correct_answer": "A", "explanation": ""} for i in range(3)]
+
+
+def test_repeated_answer_does_not_change_score(tmp_path):
+    store = quiz_store.QuizStore(str(tmp_path / "quiz.db"), ttl=3600)
+    store.create_quiz("q", QUESTIONS)
+
+    first = store.answer("q", 0, "A")
+    again = store.answer("q", 0, "A")
+    changed = store.answer("q", 0, "B")
+
+    assert first["score"] == again["score"] == changed["score"] == 1
+    assert again["correct"] and changed["correct"]  # ilk cevabın sonucu döner
+    status = store.status("q")
+    assert status["score"] == 1 and status["current_question_index"] == 1
+    assert [a["question_index"] for a in status["answers"]] == [0]
+    store.close()
+
+
+def test_existing_database_is_deduplicated(tmp_path):
+    path = str(tmp_path / "quiz.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(quiz_store.SCHEMA)
+    conn.execute("INSERT INTO quizzes VALUES ('q', '2025-01-01', 1e12, 3, 1, 3)")
+    conn.executemany("INSERT INTO answers (quiz_id, question_index, user_answer, correct, timestamp) "
+                     "VALUES ('q', 0, ?, ?, '2025-01-01')", [("A", 1), ("A", 1), ("B", 0)])
+    conn.commit()
+    conn.close()
+
+    store = quiz_store.QuizStore(path, ttl=3600)
+    assert store.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] == 1
+    assert store.conn.execute("SELECT score FROM quizzes").fetchone()[0] == 1
+    store.close()
+
+
+def test_json_import_keeps_first_answer_per_question(tmp_path):
+    answers = [{"question_index": 0, "user_answer": "A", "correct": True, "timestamp": "t"},
+               {"question_index": 0, "user_answer": "A", "correct": True, "timestamp": "t"},
+               {"question_index": 1, "user_answer": "B", "correct": False, "timestamp": "t"}]
+    (tmp_path / "q.json").write_text(json.dumps({"quiz_id": "q", "questions": QUESTIONS, "current_question": 2,
+                                                 "score": 2, "answers": answers}), encoding="utf-8")
+    store = quiz_store.QuizStore(str(tmp_path / "quiz.db"), ttl=3600)
+
+    assert store.import_json_sessions(str(tmp_path)) == 1
+    status = store.status("q")
+    assert status["score"] == 1
+    assert [a["question_index"] for a in status["answers"]] == [0, 1]
+    store.close()